@@ -0,0 +1,62 @@
+"""Measure time to import the package, in a new interpreter each time.
+
+Heavy modules must not be imported until they are used.
+With --check, exit with status 1 if any of them is imported by ``import odpttraininfo``.
+
+Usage: python benchmarks/bench_import.py [--repeat 10] [--check]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_HEAVY_MODULES = ["asyncio", "concurrent.futures", "http.client", "http.server", "sqlite3", "ssl", "urllib.request", "dotenv", "odpttraininfo.cache", "odpttraininfo.odpt_components"]
+
+_STATEMENTS = {
+    "import": "import odpttraininfo",
+    "import + TrainInformation": "import odpttraininfo; odpttraininfo.TrainInformation",
+    "import + fetch_info": "import odpttraininfo; odpttraininfo.fetch_info",
+}
+
+_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+%s
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+def measure(statement: str) -> tuple[float, list[str]]:
+
+    output = subprocess.run([sys.executable, "-c", _SCRIPT % statement], capture_output=True, text=True, check=True, cwd=_ROOT).stdout
+    result = json.loads(output)
+    return result["seconds"], result["modules"]
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser(description="Measure import time of odpttraininfo.")
+    parser.add_argument("--repeat", type=int, default=10, help="number of interpreters to start (default: 10)")
+    parser.add_argument("--check", action="store_true", help="fail if heavy modules are imported by 'import odpttraininfo'")
+    args = parser.parse_args()
+
+    heavy: list[str] = []
+    for name, statement in _STATEMENTS.items():
+        times: list[float] = []
+        for _ in range(args.repeat):
+            seconds, modules = measure(statement)
+            times.append(seconds)
+        if name == "import":
+            heavy = [ module for module in _HEAVY_MODULES if module in modules ]
+        print("%-28s min %8.2f ms" % (name, min(times) * 1000))
+
+    if heavy:
+        print("Heavy modules imported: %s" % ", ".join(heavy))
+        if args.check:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Measure memory used per ``TrainInformation`` record.
+
+Usage: python benchmarks/bench_memory.py [COUNT]
+"""
+
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from payload import generate
+
+from odpttraininfo import TrainInformation
+
+
+def measure(count: int) -> float:
+
+    # Decode from JSON text, as cache does, so no string is shared with the payload.
+    text = json.dumps(generate(count))
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    info = TrainInformation.from_jsonlist(text)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert len(info) == count
+    return (after - before) / count
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print("%d records: %.1f bytes/record" % (count, measure(count)))
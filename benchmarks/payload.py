@@ -0,0 +1,65 @@
+"""Generator of synthetic ``odpt:TrainInformation`` payloads for benchmarks."""
+
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+_JST = timezone(timedelta(hours=+9), 'JST')
+
+_OPERATORS = ["JR-East", "TokyoMetro", "Toei", "Tokyu", "Odakyu", "Keio", "Seibu", "Tobu", "Keikyu", "Keisei", "TWR", "Yurikamome"]
+
+_TEXTS = [
+    {"ja": "平常通り運転しています。", "en": "Service is operating normally."},
+    {"ja": "人身事故の影響で、一部列車に遅れが出ています。", "en": "Some trains are delayed due to an accident resulting in injury or death.", "ko": "인신사고의 영향으로 일부 열차가 지연되고 있습니다.", "zh-Hans": "因人身事故的影响，部分列车出现延误。", "zh-Hant": "因人身事故的影響，部分列車出現延誤。"},
+    {"ja": "信号確認の影響で、運転を見合わせています。", "en": "Service is suspended due to a signal check."},
+]
+
+_STATUSES = [
+    {"ja": "遅延", "en": "Delay"},
+    {"ja": "運転見合わせ", "en": "Suspended", "ja-Hrkt": "うんてんみあわせ"},
+    {"ja": "運転再開", "en": "Resumed"},
+]
+
+def generate(count: int, seed: int = 0, abnormal_ratio: float = 0.2) -> list[dict[str,object]]:
+    """Generate count records deterministically from seed.
+
+    Every key of ``odpt:TrainInformation`` appears in abnormal records.
+    """
+
+    rng = random.Random(seed)
+    base = datetime(2022, 4, 1, 7, 0, tzinfo=_JST)
+    result: list[dict[str,object]] = []
+
+    for i in range(count):
+        operator = _OPERATORS[i % len(_OPERATORS)]
+        line = "%s.Line%d" % (operator, i // len(_OPERATORS))
+        date = base + timedelta(seconds=rng.randrange(3600))
+        record: dict[str,object] = {
+            "@context": "http://vocab.odpt.org/context_odpt.jsonld",
+            "@id": "urn:uuid:%s" % uuid.UUID(int=rng.getrandbits(128)),
+            "@type": "odpt:TrainInformation",
+            "dc:date": date.isoformat(),
+            "dct:valid": (date + timedelta(minutes=5)).isoformat(),
+            "odpt:operator": "odpt.Operator:%s" % operator,
+            "odpt:timeOfOrigin": (date - timedelta(minutes=rng.randrange(120))).isoformat(),
+            "owl:sameAs": "odpt.TrainInformation:%s" % line,
+            "odpt:railway": "odpt.Railway:%s" % line,
+            "odpt:trainInformationText": _TEXTS[0],
+        }
+        if rng.random() < abnormal_ratio:
+            record.update({
+                "odpt:trainInformationStatus": rng.choice(_STATUSES),
+                "odpt:trainInformationText": rng.choice(_TEXTS[1:]),
+                "odpt:railDirection": "odpt.RailDirection:Inbound",
+                "odpt:trainInformationArea": {"ja": "全線", "en": "Whole line"},
+                "odpt:trainInformationKind": {"ja": "遅延", "en": "Delay"},
+                "odpt:stationFrom": "odpt.Station:%s.Station%d" % (line, rng.randrange(20)),
+                "odpt:stationTo": "odpt.Station:%s.Station%d" % (line, rng.randrange(20)),
+                "odpt:trainInformationRange": {"ja": "上下線", "en": "Both directions"},
+                "odpt:trainInformationCause": {"ja": "人身事故", "en": "Accident"},
+                "odpt:transferRailways": ["odpt.Railway:%s.Line%d" % (rng.choice(_OPERATORS), rng.randrange(10)) for _ in range(rng.randrange(1, 4))],
+                "odpt:resumeEstimate": (date + timedelta(minutes=30)).isoformat(),
+            })
+        result.append(record)
+
+    return result
@@ -0,0 +1,219 @@
+"""Benchmark suite of decoding, encoding, diffing, cache and fetch_info.
+
+Payloads are generated from a fixed seed, so results are comparable across commits.
+Each benchmark is run once for warm-up and then repeated, with garbage collection disabled
+while timing, and the minimum and median seconds are reported.
+
+Usage:
+    python benchmarks/run.py [--sizes 100,1000,10000] [--repeat 5] [--filter decode]
+                             [--output results.json] [--compare baseline.json]
+
+Save the results of a commit with --output, and pass them to --compare on another commit.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Iterator
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from payload import generate
+from server import serve
+
+import odpttraininfo as odpt
+from odpttraininfo import cache
+from odpttraininfo.odpt_components import TrainInformation
+
+Case = Callable[[int], Iterator[Callable[[], object]]]
+"""Generator taking number of records, which sets up and yields the function to time, then cleans up."""
+
+_cases: dict[str, Case] = {}
+
+def case(function: Case) -> Case:
+    _cases[function.__name__] = function
+    return function
+
+def _text(count: int) -> str:
+    return json.dumps(generate(count), ensure_ascii=False)
+
+def _modified(count: int) -> list[TrainInformation]:
+    """Same records as generate(count), with every 10th one modified and a few added."""
+
+    payload = generate(count)
+    for record in payload[::10]:
+        record["odpt:trainInformationText"] = {"ja": "運転を再開しました。", "en": "Service has resumed."}
+    payload += generate(count // 100 + 1, seed=1)
+    return TrainInformation.from_list(payload)
+
+def _forget_json(info: list[TrainInformation]) -> list[TrainInformation]:
+    """Drop encoded JSON cached on each record, so that encoding is timed cold as well as before it was cached."""
+
+    for single in info:
+        single._json = None
+    return info
+
+def _temporary_cache(format: str) -> str:
+
+    directory = tempfile.mkdtemp(prefix="odpt-bench-")
+    odpt.config.set_cache_dir(directory)
+    odpt.config.set_cache_format(format) # type: ignore
+    return directory
+
+@case
+def decode(count: int) -> Iterator[Callable[[], object]]:
+    text = _text(count)
+    yield lambda: TrainInformation.from_jsonlist(text)
+
+@case
+def encode(count: int) -> Iterator[Callable[[], object]]:
+    info = TrainInformation.from_jsonlist(_text(count))
+    yield lambda: b"".join(cache._iter_json_chunks(_forget_json(info)))
+
+@case
+def encode_cached(count: int) -> Iterator[Callable[[], object]]:
+    # Encoding the same records again only joins JSON cached on each record.
+    info = TrainInformation.from_jsonlist(_text(count))
+    yield lambda: b"".join(cache._iter_json_chunks(info))
+
+@case
+def to_dict(count: int) -> Iterator[Callable[[], object]]:
+    info = TrainInformation.from_jsonlist(_text(count))
+    yield lambda: [ single.to_dict() for single in info ]
+
+@case
+def diff(count: int) -> Iterator[Callable[[], object]]:
+    old = TrainInformation.from_jsonlist(_text(count))
+    new = _modified(count)
+    yield lambda: TrainInformation.list_changes(new, old)
+
+def _cache_save(count: int, format: str) -> Iterator[Callable[[], object]]:
+    info = TrainInformation.from_jsonlist(_text(count))
+    directory = _temporary_cache(format)
+    yield lambda: cache._save(odpt.Distributor.ODPT_CENTER, _forget_json(info))
+    shutil.rmtree(directory)
+
+def _cache_load(count: int, format: str) -> Iterator[Callable[[], object]]:
+    directory = _temporary_cache(format)
+    cache._save(odpt.Distributor.ODPT_CENTER, TrainInformation.from_jsonlist(_text(count)))
+
+    def load() -> object:
+        # Skip memory tier to measure reading and decoding.
+        cache._memory_cache.clear()
+        return cache._load(odpt.Distributor.ODPT_CENTER, expire_second=3600)
+
+    yield load
+    shutil.rmtree(directory)
+
+@case
+def cache_save_json(count: int) -> Iterator[Callable[[], object]]:
+    yield from _cache_save(count, "json")
+
+@case
+def cache_save_binary(count: int) -> Iterator[Callable[[], object]]:
+    yield from _cache_save(count, "binary")
+
+@case
+def cache_load_json(count: int) -> Iterator[Callable[[], object]]:
+    yield from _cache_load(count, "json")
+
+@case
+def cache_load_binary(count: int) -> Iterator[Callable[[], object]]:
+    yield from _cache_load(count, "binary")
+
+@case
+def fetch_info(count: int) -> Iterator[Callable[[], object]]:
+    server, url = serve(_text(count).encode("utf-8"))
+    distributor = odpt.Distributor.ODPT_CENTER
+    original_url, original_key = distributor.URL, distributor.consumer_key
+    distributor.URL = url
+    distributor.set_consumer_key("benchmark")
+    directory = _temporary_cache("json")
+
+    def fetch() -> object:
+        # Expire cache so that every call downloads, decodes and saves.
+        cache._memory_cache.clear()
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        return odpt.fetch_info()
+
+    yield fetch
+    distributor.URL = original_url
+    distributor.consumer_key = original_key
+    server.shutdown()
+    shutil.rmtree(directory)
+
+def measure(function: Callable[[], object], repeat: int) -> list[float]:
+
+    function()
+    times: list[float] = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - started)
+        finally:
+            gc.enable()
+    return times
+
+def _commit() -> str|None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser(description="Run benchmarks of odpttraininfo.")
+    parser.add_argument("--sizes", default="100,1000,10000", help="comma separated numbers of records (default: 100,1000,10000)")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timed runs (default: 5)")
+    parser.add_argument("--filter", default="", help="run only benchmarks whose name contains this")
+    parser.add_argument("--output", help="save results to this JSON file")
+    parser.add_argument("--compare", help="JSON file saved by --output to compare with")
+    args = parser.parse_args()
+
+    baseline: dict[str, dict[str, float]] = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    results: dict[str, dict[str, float]] = {}
+    for size in [ int(size) for size in args.sizes.split(",") ]:
+        for name, function in _cases.items():
+            if args.filter not in name:
+                continue
+            key = "%s[%d]" % (name, size)
+            steps = function(size)
+            times = measure(next(steps), args.repeat)
+            next(steps, None)
+            results[key] = {"min": min(times), "median": statistics.median(times)}
+
+            line = "%-28s min %10.3f ms  median %10.3f ms" % (key, min(times) * 1000, statistics.median(times) * 1000)
+            if key in baseline:
+                line += "  x%.2f" % (min(times) / baseline[key]["min"])
+            print(line, flush=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "commit": _commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "repeat": args.repeat,
+                "results": results,
+            }, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Local HTTP stand-in for a distributor, serving a fixed payload."""
+
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def serve(body: bytes) -> tuple[ThreadingHTTPServer, str]:
+    """Serve body as the train information API in a background thread.
+
+    Response is gzip-compressed if requested, and it is always sent in full
+    (no validator), so every request downloads and decodes the whole payload.
+
+    Returns
+    -------
+    tuple[ThreadingHTTPServer, str]
+        Server, which should be shut down, and URL of the API.
+    """
+
+    compressed = gzip.compress(body, compresslevel=6)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            content = body
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                content = compressed
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, "http://127.0.0.1:%d/api/v4/odpt:TrainInformation" % server.server_address[1]
@@ -1,7 +1,70 @@
-from . import config
-from .cache import fetch_info, refresh_cache
-from .odpt_components import Distributor, TrainInformation, to_json_default
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from . import columnar, config, metrics
+    from .cache import (async_fetch_info, async_fetch_snapshot,
+                        async_refresh_cache, async_run_refresher, fetch_info,
+                        fetch_snapshot, refresh_cache, start_refresher,
+                        stop_refresher)
+    from .history import HistoryEntry, HistoryStore
+    from .odpt_components import (Distributor, TrainInformation,
+                                  TrainInformationChanges, dump_json,
+                                  to_json_default)
+    from .odpt_client import iter_info
+    from .retry import CircuitBreaker, RetryPolicy
+    from .scheduler import AdaptiveSchedule
+    from .snapshot import Snapshot
+    from .feed import (ChangeEvent, async_watch, changes_since, current_token,
+                       watch)
 
 __version__ = "0.1.3"
 
-__all__ = ["config","fetch_info","refresh_cache","Distributor","TrainInformation","to_json_default"]
\ No newline at end of file
+__all__ = ["config","metrics","columnar","fetch_info","refresh_cache","async_fetch_info","async_refresh_cache","fetch_snapshot","iter_info","async_fetch_snapshot","start_refresher","stop_refresher","async_run_refresher","AdaptiveSchedule","RetryPolicy","CircuitBreaker","watch","async_watch","changes_since","current_token","ChangeEvent","HistoryStore","HistoryEntry","Distributor","TrainInformation","TrainInformationChanges","Snapshot","dump_json","to_json_default"]
+
+_lazy_attributes: dict[str, tuple[str, str|None]] = {
+    "config": ("config", None),
+    "metrics": ("metrics", None),
+    "columnar": ("columnar", None),
+    "fetch_info": ("cache", "fetch_info"),
+    "refresh_cache": ("cache", "refresh_cache"),
+    "async_fetch_info": ("cache", "async_fetch_info"),
+    "async_refresh_cache": ("cache", "async_refresh_cache"),
+    "fetch_snapshot": ("cache", "fetch_snapshot"),
+    "async_fetch_snapshot": ("cache", "async_fetch_snapshot"),
+    "start_refresher": ("cache", "start_refresher"),
+    "stop_refresher": ("cache", "stop_refresher"),
+    "async_run_refresher": ("cache", "async_run_refresher"),
+    "iter_info": ("odpt_client", "iter_info"),
+    "AdaptiveSchedule": ("scheduler", "AdaptiveSchedule"),
+    "RetryPolicy": ("retry", "RetryPolicy"),
+    "CircuitBreaker": ("retry", "CircuitBreaker"),
+    "watch": ("feed", "watch"),
+    "async_watch": ("feed", "async_watch"),
+    "changes_since": ("feed", "changes_since"),
+    "current_token": ("feed", "current_token"),
+    "ChangeEvent": ("feed", "ChangeEvent"),
+    "HistoryStore": ("history", "HistoryStore"),
+    "HistoryEntry": ("history", "HistoryEntry"),
+    "Distributor": ("odpt_components", "Distributor"),
+    "TrainInformation": ("odpt_components", "TrainInformation"),
+    "TrainInformationChanges": ("odpt_components", "TrainInformationChanges"),
+    "dump_json": ("odpt_components", "dump_json"),
+    "to_json_default": ("odpt_components", "to_json_default"),
+    "Snapshot": ("snapshot", "Snapshot"),
+}
+"""Module and attribute name of each public name, imported on first access to keep importing package fast."""
+
+def __getattr__(name: str) -> object:
+
+    if name not in _lazy_attributes:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+    module_name, attribute = _lazy_attributes[name]
+    module = importlib.import_module("." + module_name, __name__)
+    value = module if attribute == None else getattr(module, attribute)
+    globals()[name] = value
+    return value
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_lazy_attributes))
@@ -0,0 +1,32 @@
+"""Storage backends of cache.
+
+A backend stores bytes of each cache key with the time it was last updated,
+validator headers of the response, and a lock to let only one caller refresh the cache.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+from .base import CacheBackend, CacheEntry, CacheLock, CacheStat
+from .filesystem import FileSystemBackend
+
+if TYPE_CHECKING:
+    from .redis import RedisBackend
+    from .sqlite import SQLiteBackend
+
+__all__ = ["CacheBackend","CacheEntry","CacheLock","CacheStat","FileSystemBackend","RedisBackend","SQLiteBackend"]
+
+_lazy_attributes: dict[str, str] = {
+    "RedisBackend": "redis",
+    "SQLiteBackend": "sqlite",
+}
+"""Module of each backend which is not used by default, imported on first access."""
+
+def __getattr__(name: str) -> object:
+
+    if name not in _lazy_attributes:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    return getattr(importlib.import_module("." + _lazy_attributes[name], __name__), name)
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_lazy_attributes))
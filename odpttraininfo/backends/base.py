@@ -0,0 +1,82 @@
+"""Interface of cache storage backends."""
+
+from __future__ import annotations
+
+import mmap
+from abc import ABC, abstractmethod
+from typing import Hashable, Iterable, NamedTuple, Protocol
+
+class CacheStat(NamedTuple):
+    """Status of cached data."""
+
+    updated: float
+    """Unix time when data was saved or last marked as up to date."""
+    version: Hashable
+    """Value which changes whenever data is saved or marked as up to date."""
+
+class CacheEntry(NamedTuple):
+    """Cached data and its status."""
+
+    stat: CacheStat
+    data: bytes|mmap.mmap
+
+class CacheLock(Protocol):
+    """Lock shared by every caller using the same backend."""
+
+    def acquire(self, timeout: float) -> bool:
+        """Acquire lock, waiting up to timeout seconds. Return False if timed out."""
+        ...
+
+    def release(self) -> None:
+        ...
+
+class CacheBackend(ABC):
+    """Base class of cache storage."""
+
+    @abstractmethod
+    def stat(self, key: str) -> CacheStat|None:
+        """Return status of data, or None if not found."""
+
+    @abstractmethod
+    def get(self, key: str) -> CacheEntry|None:
+        """Return data and its status, or None if not found."""
+
+    def get_previous(self, key: str) -> CacheEntry|None:
+        """Return data which was replaced by the latest :meth:`set`, if backend keeps it."""
+
+        return None
+
+    @abstractmethod
+    def set(self, key: str, data: bytes|Iterable[bytes]) -> CacheStat:
+        """Save data atomically and return its status.
+
+        Data may be given as chunks.
+        """
+
+    @abstractmethod
+    def touch(self, key: str) -> tuple[CacheStat, CacheStat]|None:
+        """Mark data as up to date without changing it.
+
+        Returns
+        -------
+        tuple[CacheStat, CacheStat]|None
+            Status before and after touching, or None if not found.
+        """
+
+    @abstractmethod
+    def get_validator(self, key: str) -> dict[str,str]:
+        """Return validator headers saved for key, or an empty dict."""
+
+    @abstractmethod
+    def set_validator(self, key: str, validator: dict[str,str]) -> None:
+        """Save validator headers for key. Empty validator deletes the saved one."""
+
+    @abstractmethod
+    def lock(self, key: str) -> CacheLock:
+        """Return lock to refresh data of key."""
+
+def join_chunks(data: bytes|Iterable[bytes]) -> bytes:
+
+    if isinstance(data, bytes):
+        return data
+    return b"".join(data)
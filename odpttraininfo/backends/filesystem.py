@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import secrets
+from typing import Iterable
+
+from ..lock import RefreshLock
+from .base import CacheBackend, CacheEntry, CacheStat
+
+_TEMP_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+
+def _to_stat(stat: os.stat_result) -> CacheStat:
+    return CacheStat(stat.st_mtime_ns / 1e9, (stat.st_ino, stat.st_size, stat.st_mtime_ns))
+
+class FileSystemBackend(CacheBackend):
+    """Save each key as a file in a directory.
+
+    Files are replaced atomically, and the replaced file is kept as the previous snapshot.
+    Files of key "NAME.ext" are:
+
+    - NAME.ext: data, whose mtime is the updated time
+    - NAME.prev.ext: previous data
+    - NAME.ext.validator.json: validator headers, which belong to data of the same format only
+    - NAME.lock: lock file
+    """
+
+    dir: str
+    """Directory to save files."""
+
+    def __init__(self, dir: str) -> None:
+        self.dir = dir
+
+    def _path(self, key: str, suffix: str|None = None) -> str:
+        if suffix == None:
+            return os.path.join(self.dir, key)
+        return os.path.join(self.dir, os.path.splitext(key)[0]+suffix)
+
+    def _validator_path(self, key: str) -> str:
+        return os.path.join(self.dir, key+".validator.json")
+
+    def _previous_path(self, key: str) -> str:
+        stem, extension = os.path.splitext(key)
+        return os.path.join(self.dir, stem+".prev"+extension)
+
+    def stat(self, key: str) -> CacheStat|None:
+        try:
+            return _to_stat(os.stat(self._path(key)))
+        except FileNotFoundError:
+            return None
+
+    def get(self, key: str) -> CacheEntry|None:
+        return self._read(self._path(key))
+
+    def get_previous(self, key: str) -> CacheEntry|None:
+        return self._read(self._previous_path(key))
+
+    @staticmethod
+    def _read(path: str) -> CacheEntry|None:
+        try:
+            with open(path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                if stat.st_size == 0:
+                    return CacheEntry(_to_stat(stat), b"")
+                # Mapping stays valid after the file is replaced.
+                return CacheEntry(_to_stat(stat), mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, data: bytes|Iterable[bytes]) -> CacheStat:
+
+        os.makedirs(self.dir, exist_ok=True)
+
+        path = self._path(key)
+        self._keep_previous(path, self._previous_path(key))
+        return _to_stat(self._write_atomic(path, data))
+
+    def touch(self, key: str) -> tuple[CacheStat, CacheStat]|None:
+
+        path = self._path(key)
+        try:
+            before = os.stat(path)
+            os.utime(path)
+            after = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return _to_stat(before), _to_stat(after)
+
+    def get_validator(self, key: str) -> dict[str,str]:
+
+        try:
+            with open(self._validator_path(key), encoding='utf-8') as f:
+                validator = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+        if not isinstance(validator, dict):
+            return {}
+        return validator
+
+    def set_validator(self, key: str, validator: dict[str,str]) -> None:
+
+        validator_path = self._validator_path(key)
+
+        if validator:
+            os.makedirs(self.dir, exist_ok=True)
+            self._write_atomic(validator_path, json.dumps(validator).encode('utf-8'))
+        else:
+            try:
+                os.remove(validator_path)
+            except FileNotFoundError:
+                pass
+
+    def lock(self, key: str) -> RefreshLock:
+        return RefreshLock(self._path(key, ".lock"))
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes|Iterable[bytes]) -> os.stat_result:
+        """Write data to a temporary file in the same directory and rename it to path,
+        so readers never see a partially written file.
+
+        Returns
+        -------
+        os.stat_result
+            Status of the written file.
+        """
+
+        fd, temp_path = FileSystemBackend._create_temp(path)
+        try:
+            with open(fd, "wb") as f:
+                if isinstance(data, bytes):
+                    f.write(data)
+                else:
+                    for chunk in data:
+                        f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+                stat = os.fstat(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+        return stat
+
+    @staticmethod
+    def _create_temp(path: str) -> tuple[int, str]:
+        """Create a new file with random name next to path, and return its descriptor and path.
+
+        Unlike ``mkstemp``, which makes the file readable only by owner,
+        mode of the file follows umask like files made by ``open``, so other users sharing cache can read it.
+        """
+
+        while True:
+            temp_path = "%s.%s.tmp" % (path, secrets.token_hex(8))
+            try:
+                return os.open(temp_path, _TEMP_FLAGS, 0o666), temp_path
+            except FileExistsError:
+                continue
+
+    @staticmethod
+    def _keep_previous(path: str, previous_path: str) -> None:
+        """Hard-link current file as previous snapshot."""
+
+        temp_path = previous_path + ".tmp"
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        try:
+            os.link(path, temp_path)
+        except FileNotFoundError:
+            return
+        except OSError:
+            # Filesystem without hard link support.
+            return
+        os.replace(temp_path, previous_path)
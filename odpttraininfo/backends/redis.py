@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import json
+import socket
+import threading
+import time
+import uuid
+from typing import Iterable, Union
+
+from ..errors import RedisError
+from .base import CacheBackend, CacheEntry, CacheStat, join_chunks
+
+_Reply = Union[bytes, int, list["_Reply"], None]
+
+class _RedisConnection():
+    """Minimal client of Redis serialization protocol (RESP2)."""
+
+    def __init__(self, host: str, port: int, db: int, password: str|None, timeout: float) -> None:
+
+        self._socket = socket.create_connection((host, port), timeout=timeout)
+        self._file = self._socket.makefile("rb")
+        if password != None:
+            self.execute("AUTH", password)
+        if db:
+            self.execute("SELECT", db)
+
+    def close(self) -> None:
+        self._file.close()
+        self._socket.close()
+
+    def execute(self, *args: bytes|str|int|float) -> _Reply:
+
+        command = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode('utf-8')
+            command.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        self._socket.sendall(b"".join(command))
+        return self._read()
+
+    def _read(self) -> _Reply:
+
+        line = self._file.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connection closed by Redis server.")
+        prefix, rest = line[:1], line[1:-2]
+        match prefix:
+            case b"+":
+                return rest
+            case b"-":
+                raise RedisError(rest.decode('utf-8', 'replace'))
+            case b":":
+                return int(rest)
+            case b"$":
+                length = int(rest)
+                if length < 0:
+                    return None
+                data = self._file.read(length + 2)
+                return data[:-2]
+            case b"*":
+                count = int(rest)
+                if count < 0:
+                    return None
+                return [ self._read() for _ in range(count) ]
+            case _:
+                raise ConnectionError("Invalid reply from Redis server.")
+
+class RedisBackend(CacheBackend):
+    """Save cache in a Redis (or Redis-protocol compatible) server.
+
+    Every node connecting to the same server shares the cache and locks.
+    Data of each key is a hash holding data, updated time and a random version token.
+    Each thread uses its own connection.
+    """
+
+    prefix: str
+    """Prefix of Redis keys."""
+
+    lock_ttl: float
+    """Seconds after which a lock is released even if its holder doesn't release it."""
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0, password: str|None = None,
+                 prefix: str = "odpttraininfo:", timeout: float = 10, lock_ttl: float = 60) -> None:
+
+        self.prefix = prefix
+        self.lock_ttl = lock_ttl
+        self._connection_args = (host, port, db, password, timeout)
+        self._local = threading.local()
+
+    def execute(self, *args: bytes|str|int|float) -> _Reply:
+        """Execute command, reconnecting once if the connection was lost."""
+
+        connection: _RedisConnection|None = getattr(self._local, "connection", None)
+        if connection != None:
+            try:
+                return connection.execute(*args)
+            except OSError:
+                connection.close()
+                self._local.connection = None
+        connection = _RedisConnection(*self._connection_args)
+        self._local.connection = connection
+        return connection.execute(*args)
+
+    def _key(self, key: str, suffix: str = "") -> str:
+        return self.prefix + key + suffix
+
+    @staticmethod
+    def _to_stat(updated: _Reply, version: _Reply) -> CacheStat|None:
+        if not isinstance(updated, bytes) or not isinstance(version, bytes):
+            return None
+        return CacheStat(float(updated), version)
+
+    def stat(self, key: str) -> CacheStat|None:
+
+        reply = self.execute("HMGET", self._key(key), "updated", "version")
+        assert isinstance(reply, list)
+        return self._to_stat(*reply)
+
+    def get(self, key: str) -> CacheEntry|None:
+
+        reply = self.execute("HMGET", self._key(key), "data", "updated", "version")
+        assert isinstance(reply, list)
+        data, updated, version = reply
+        stat = self._to_stat(updated, version)
+        if stat == None or not isinstance(data, bytes):
+            return None
+        return CacheEntry(stat, data)
+
+    def set(self, key: str, data: bytes|Iterable[bytes]) -> CacheStat:
+
+        stat = CacheStat(time.time(), uuid.uuid4().hex.encode())
+        # Single HSET is atomic, so readers never see data with other's version.
+        self.execute("HSET", self._key(key), "data", join_chunks(data), "updated", repr(stat.updated), "version", stat.version)
+        return stat
+
+    def touch(self, key: str) -> tuple[CacheStat, CacheStat]|None:
+
+        before = self.stat(key)
+        if before == None:
+            return None
+        after = CacheStat(time.time(), uuid.uuid4().hex.encode())
+        self.execute("HSET", self._key(key), "updated", repr(after.updated), "version", after.version)
+        return before, after
+
+    def get_validator(self, key: str) -> dict[str,str]:
+
+        reply = self.execute("GET", self._key(key, ":validator"))
+        if not isinstance(reply, bytes):
+            return {}
+        try:
+            validator = json.loads(reply)
+        except ValueError:
+            return {}
+        if not isinstance(validator, dict):
+            return {}
+        return validator
+
+    def set_validator(self, key: str, validator: dict[str,str]) -> None:
+
+        if validator:
+            self.execute("SET", self._key(key, ":validator"), json.dumps(validator))
+        else:
+            self.execute("DEL", self._key(key, ":validator"))
+
+    def lock(self, key: str) -> RedisLock:
+        return RedisLock(self, self._key(key, ":lock"))
+
+class RedisLock():
+    """Lock by ``SET NX PX``, expiring after lock_ttl of backend."""
+
+    def __init__(self, backend: RedisBackend, key: str) -> None:
+        self._backend = backend
+        self._key = key
+        self._owner = uuid.uuid4().hex
+
+    def acquire(self, timeout: float) -> bool:
+
+        deadline = time.monotonic() + timeout
+        while True:
+            reply = self._backend.execute("SET", self._key, self._owner, "NX", "PX", int(self._backend.lock_ttl * 1000))
+            if reply == b"OK":
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+    def release(self) -> None:
+
+        # Not atomic, but lock of other owner can be deleted only if it expires in between.
+        if self._backend.execute("GET", self._key) == self._owner.encode():
+            self._backend.execute("DEL", self._key)
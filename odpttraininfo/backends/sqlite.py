@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Iterable
+
+from .base import CacheBackend, CacheEntry, CacheStat, join_chunks
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    updated REAL NOT NULL,
+    version INTEGER NOT NULL,
+    previous BLOB,
+    previous_updated REAL,
+    validator TEXT
+);
+CREATE TABLE IF NOT EXISTS lock (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+
+class SQLiteBackend(CacheBackend):
+    """Save cache in a SQLite database.
+
+    Every process opening the same database file shares the cache and locks.
+    Each thread uses its own connection.
+    """
+
+    path: str
+    """Path of database file."""
+
+    lock_ttl: float
+    """Seconds after which a lock is released even if its holder doesn't release it."""
+
+    def __init__(self, path: str, lock_ttl: float = 60) -> None:
+
+        self.path = path
+        self.lock_ttl = lock_ttl
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+
+        connection: sqlite3.Connection|None = getattr(self._local, "connection", None)
+        if connection == None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def stat(self, key: str) -> CacheStat|None:
+
+        row = self._connect().execute("SELECT updated, version FROM cache WHERE key = ?", (key,)).fetchone()
+        if row == None:
+            return None
+        return CacheStat(row[0], row[1])
+
+    def get(self, key: str) -> CacheEntry|None:
+
+        row = self._connect().execute("SELECT data, updated, version FROM cache WHERE key = ?", (key,)).fetchone()
+        if row == None:
+            return None
+        return CacheEntry(CacheStat(row[1], row[2]), row[0])
+
+    def get_previous(self, key: str) -> CacheEntry|None:
+
+        row = self._connect().execute("SELECT previous, previous_updated, version FROM cache WHERE key = ?", (key,)).fetchone()
+        if row == None or row[0] == None:
+            return None
+        return CacheEntry(CacheStat(row[1], ("previous", row[2])), row[0])
+
+    def set(self, key: str, data: bytes|Iterable[bytes]) -> CacheStat:
+
+        updated = time.time()
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT INTO cache (key, data, updated, version) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT (key) DO UPDATE SET "
+                "previous = data, previous_updated = updated, "
+                "data = excluded.data, updated = excluded.updated, version = version + 1",
+                (key, join_chunks(data), updated)
+            )
+        stat = self.stat(key)
+        assert stat != None
+        return stat
+
+    def touch(self, key: str) -> tuple[CacheStat, CacheStat]|None:
+
+        with self._connect() as connection:
+            before = connection.execute("SELECT updated, version FROM cache WHERE key = ?", (key,)).fetchone()
+            if before == None:
+                return None
+            connection.execute("UPDATE cache SET updated = ?, version = version + 1 WHERE key = ?", (time.time(), key))
+            after = connection.execute("SELECT updated, version FROM cache WHERE key = ?", (key,)).fetchone()
+        return CacheStat(before[0], before[1]), CacheStat(after[0], after[1])
+
+    def get_validator(self, key: str) -> dict[str,str]:
+
+        row = self._connect().execute("SELECT validator FROM cache WHERE key = ?", (key,)).fetchone()
+        if row == None or row[0] == None:
+            return {}
+        try:
+            validator = json.loads(row[0])
+        except ValueError:
+            return {}
+        if not isinstance(validator, dict):
+            return {}
+        return validator
+
+    def set_validator(self, key: str, validator: dict[str,str]) -> None:
+
+        with self._connect() as connection:
+            connection.execute("UPDATE cache SET validator = ? WHERE key = ?", (json.dumps(validator) if validator else None, key))
+
+    def lock(self, key: str) -> SQLiteLock:
+        return SQLiteLock(self, key)
+
+class SQLiteLock():
+    """Lock stored as a row of lock table, expiring after lock_ttl of backend."""
+
+    def __init__(self, backend: SQLiteBackend, key: str) -> None:
+        self._backend = backend
+        self._key = key
+        self._owner = uuid.uuid4().hex
+
+    def acquire(self, timeout: float) -> bool:
+
+        deadline = time.monotonic() + timeout
+        while True:
+            now = time.time()
+            with self._backend._connect() as connection:
+                cursor = connection.execute(
+                    "INSERT INTO lock (key, owner, expires) VALUES (?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, expires = excluded.expires "
+                    "WHERE lock.expires < ?",
+                    (self._key, self._owner, now + self._backend.lock_ttl, now)
+                )
+            if cursor.rowcount == 1:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+    def release(self) -> None:
+
+        with self._backend._connect() as connection:
+            connection.execute("DELETE FROM lock WHERE key = ? AND owner = ?", (self._key, self._owner))
@@ -0,0 +1,204 @@
+"""Compact binary cache format with lazy decoding.
+
+Layout (integers are little-endian)::
+
+    magic           8 bytes  b"ODPTTI\\x02\\x00"
+    count           uint32
+    offsets         uint32 * count    offset of each record from start of file
+    records
+    checksum        uint32            CRC-32 of all the above
+
+Each record is::
+
+    field_count     uint8
+    fields          (uint8 field, uint32 offset, uint32 length) * field_count
+    values          JSON text of each value, at offset from start of record
+
+Field number is the position of the attribute in ``_TrainInfo_attribute2key``.
+Records are decoded field by field when the field is accessed,
+so truncated or broken data is detected by checksum on load instead.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+import zlib
+from typing import Iterable, Iterator
+
+from .odpt_components import (TrainInformation, _TrainInfo_attribute2key,
+                              _TrainInfo_decoder, to_json_default)
+
+MAGIC = b"ODPTTI\x02\x00"
+
+_count = struct.Struct("<I")
+_field_count = struct.Struct("<B")
+_field = struct.Struct("<BII")
+
+_attributes: tuple[str, ...] = tuple(_TrainInfo_attribute2key)
+_keys: tuple[str, ...] = tuple(_TrainInfo_attribute2key.values())
+_field_of_attribute: dict[str, int] = { attribute: field for field, attribute in enumerate(_attributes) }
+
+def _encode_record(info: TrainInformation) -> bytes:
+
+    values: list[tuple[int, bytes]] = []
+    for field, attribute in enumerate(_attributes):
+        value = info.__getattribute__(attribute)
+        if value != None:
+            values.append((field, json.dumps(value, ensure_ascii=False, default=to_json_default).encode('utf-8')))
+
+    offset = _field_count.size + _field.size * len(values)
+    header = [_field_count.pack(len(values))]
+    for field, value in values:
+        header.append(_field.pack(field, offset, len(value)))
+        offset += len(value)
+
+    return b"".join(header + [ value for _, value in values ])
+
+def dumps(info: Iterable[TrainInformation]) -> bytes:
+    """Encode information to binary format."""
+
+    records = [ _encode_record(single) for single in info ]
+
+    offset = len(MAGIC) + _count.size * (1 + len(records))
+    offsets: list[bytes] = []
+    for record in records:
+        offsets.append(_count.pack(offset))
+        offset += len(record)
+
+    parts = [MAGIC, _count.pack(len(records))] + offsets + records
+    checksum = 0
+    for part in parts:
+        checksum = zlib.crc32(part, checksum)
+    parts.append(_count.pack(checksum))
+    return b"".join(parts)
+
+def loads(buffer: bytes|mmap.mmap) -> list[TrainInformation]:
+    """Return lazily decoded views of records in buffer.
+
+    Raises
+    ------
+    ValueError
+        Buffer is not in binary format or is truncated.
+    """
+
+    return [ TrainInformationView(buffer, offset) for offset in _offsets(buffer) ]
+
+def iter_dicts(buffer: bytes|mmap.mmap) -> Iterator[dict[str,object]]:
+    """Yield each record as a dictionary of JSON values, without making TrainInformation.
+
+    Raises
+    ------
+    ValueError
+        Buffer is not in binary format or is truncated.
+    """
+
+    for offset in _offsets(buffer):
+        yield _record_dict(buffer, offset)
+
+def _offsets(buffer: bytes|mmap.mmap) -> tuple[int, ...]:
+    """Return offset of each record, checking that buffer is not truncated or broken.
+
+    Records are decoded lazily, so broken data must be found here to fall back to the previous cache.
+    """
+
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a binary cache.")
+
+    end = len(buffer) - _count.size
+    if end < len(MAGIC) + _count.size:
+        raise ValueError("Binary cache is truncated.")
+    with memoryview(buffer)[:end] as view:
+        checksum = zlib.crc32(view)
+    if _count.unpack_from(buffer, end)[0] != checksum:
+        raise ValueError("Binary cache is truncated or broken.")
+
+    try:
+        (count,) = _count.unpack_from(buffer, len(MAGIC))
+        offsets: tuple[int, ...] = struct.unpack_from("<%dI" % count, buffer, len(MAGIC) + _count.size)
+    except struct.error as e:
+        raise ValueError("Binary cache is truncated.") from e
+
+    if offsets and offsets[-1] >= end:
+        raise ValueError("Binary cache is truncated.")
+
+    return offsets
+
+def _record_dict(buffer: bytes|mmap.mmap, offset: int) -> dict[str,object]:
+
+    result: dict[str,object] = {}
+    try:
+        (field_count,) = _field_count.unpack_from(buffer, offset)
+        for i in range(field_count):
+            field, value_offset, length = _field.unpack_from(buffer, offset + _field_count.size + _field.size * i)
+            start = offset + value_offset
+            result[_keys[field]] = json.loads(buffer[start:start+length])
+    except struct.error as e:
+        raise ValueError("Binary cache is truncated.") from e
+    return result
+
+def _find(buffer: bytes|mmap.mmap, offset: int, field: int) -> tuple[int, int]|None:
+
+    try:
+        (field_count,) = _field_count.unpack_from(buffer, offset)
+        for i in range(field_count):
+            found, value_offset, length = _field.unpack_from(buffer, offset + _field_count.size + _field.size * i)
+            if found == field:
+                return offset + value_offset, length
+    except struct.error as e:
+        raise ValueError("Binary cache is truncated.") from e
+    return None
+
+def _decode(buffer: bytes|mmap.mmap, offset: int, field: int) -> object:
+
+    found = _find(buffer, offset, field)
+    if found == None:
+        return None
+    start, length = found
+    value = json.loads(buffer[start:start+length])
+    if value == None:
+        return None
+    return _TrainInfo_decoder[_keys[field]][1](value)
+
+class TrainInformationView(TrainInformation):
+    """Train information backed by a record in binary cache.
+
+    Each attribute is decoded on first access.
+    """
+
+    __slots__ = ("_buffer", "_offset")
+
+    def __init__(self, buffer: bytes|mmap.mmap, offset: int) -> None:
+        self._buffer = buffer
+        self._offset = offset
+        self._json = None
+
+    def __reduce__(self):
+        # Pickle as a plain TrainInformation, since buffer may be memory-mapped.
+        return (TrainInformation, (self._source_dict(),))
+
+    def _source_dict(self) -> dict[str,object]:
+        return _record_dict(self._buffer, self._offset)
+
+def _lazy_property(attribute: str) -> property:
+
+    slot = TrainInformation.__dict__[attribute]
+    field = _field_of_attribute[attribute]
+
+    def getter(self: TrainInformationView) -> object:
+        try:
+            return slot.__get__(self)
+        except AttributeError:
+            value = _decode(self._buffer, self._offset, field)
+            slot.__set__(self, value)
+            return value
+
+    def setter(self: TrainInformationView, value: object) -> None:
+        slot.__set__(self, value)
+
+    return property(getter, setter)
+
+for _attribute in _attributes:
+    setattr(TrainInformationView, _attribute, _lazy_property(_attribute))
+del _attribute
@@ -1,15 +1,75 @@
-import json
+import asyncio
+import contextvars
+import itertools
+import logging
+import mmap
 import os
-from datetime import datetime, timedelta, timezone
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Literal, NamedTuple, TypeVar
 
-from .errors import TooOldCacheError
-from .odpt_client import download
-from .odpt_components import Distributor, TrainInformation, to_json_default
+from . import binary_format, metrics
+from .backends import CacheBackend, CacheLock, CacheStat, FileSystemBackend
+from .errors import CircuitOpenError, TooOldCacheError
+from .odpt_client import (RETRYABLE_ERRORS, DownloadResult, Validator,
+                          async_download_if_modified, download_if_modified,
+                          is_circuit_open)
+from .odpt_components import Distributor, TrainInformation
+from .refresher import Refresher
+from .scheduler import AdaptiveSchedule
+from .snapshot import Snapshot
+from .feed import publish
 
-_JST = timezone(timedelta(hours=+9), 'JST')
+_logger = logging.getLogger(__name__)
 
-_cache_dir = os.path.join("./__odptcache__/")
+_T = TypeVar("_T")
 
+_backend: CacheBackend = FileSystemBackend(os.path.join("./__odptcache__/"))
+
+class _MemoryCache(NamedTuple):
+    """Parsed content of cached data, identified by its version."""
+
+    stat: CacheStat
+    info: tuple[TrainInformation, ...]
+
+    def age(self) -> float:
+        return time.time() - self.stat.updated
+
+    def match(self, stat: CacheStat) -> bool:
+        return self.stat.version == stat.version
+
+_lock_timeout: float = 10
+
+_CACHE_EXTENSIONS: dict[str,str] = {"json": ".json", "binary": ".bin"}
+_cache_format: Literal["json","binary"] = "json"
+
+_memory_cache: dict[str, _MemoryCache] = {}
+"""Memory tier in front of backend. Key is name of distributor."""
+
+_snapshot: Snapshot|None = None
+_snapshot_versions = itertools.count(1)
+_snapshot_sources: tuple[tuple[TrainInformation, ...], ...] = ()
+"""Information in memory tier the snapshot was built from."""
+
+_refresher: Refresher|None = None
+_schedule: AdaptiveSchedule|None = None
+_async_refreshers: int = 0
+
+_async_refresh_locks: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Lock]] = weakref.WeakKeyDictionary()
+"""Lock of each distributor in each event loop, so that only one coroutine per loop waits for backend lock in a worker thread."""
+
+_max_workers: int = 4
+_executor: ThreadPoolExecutor|None = None
+_executor_lock = threading.Lock()
+
+
+def _remember(distributor: Distributor, memory: _MemoryCache) -> None:
+    """Keep information in memory tier and notify watchers of changes."""
+
+    _memory_cache[distributor.name] = memory
+    publish(distributor.name, memory.info)
 
 def set_cache_dir(dir: str) -> None:
     """Set directory to save cache.
@@ -19,15 +79,69 @@ def set_cache_dir(dir: str) -> None:
 
     os.makedirs(dir, exist_ok=True)
     if os.path.isdir(dir):
-        global _cache_dir
-        _cache_dir = dir
+        set_cache_backend(FileSystemBackend(dir))
     else:
         raise ValueError("Not a directory or failed to make directory.")
 
-def _build_cache_path(distributor: Distributor) -> str:
-    return os.path.join( _cache_dir, distributor.name+".json" )
+def set_cache_backend(backend: CacheBackend) -> None:
+    """Set storage of cache.
+
+    Default is :class:`~odpttraininfo.backends.FileSystemBackend` saving files in "./__odptcache__/".
+    Share a :class:`~odpttraininfo.backends.SQLiteBackend` or :class:`~odpttraininfo.backends.RedisBackend`
+    between processes or nodes, so that one refresh serves all of them.
+    """
+
+    global _backend
+    _backend = backend
+    _memory_cache.clear()
+
+def set_lock_timeout(second: float) -> None:
+    """Set how long to wait for other thread or process downloading the same information.
+
+    If it times out, stale cache is used instead.
+    """
+
+    if second < 0:
+        raise ValueError("Timeout must not be negative.")
+    global _lock_timeout
+    _lock_timeout = second
+
+def set_max_workers(workers: int) -> None:
+    """Set how many distributors are fetched in parallel, by default 4."""
+
+    if workers < 1:
+        raise ValueError("Number of workers must be 1 or more.")
+
+    global _max_workers, _executor
+    with _executor_lock:
+        _max_workers = workers
+        old_executor, _executor = _executor, None
+    if old_executor != None:
+        old_executor.shutdown(wait=False)
+
+def set_cache_format(format: Literal["json","binary"]) -> None:
+    """Set format of cache files.
+
+    "json" (default) is a JSON list of train information.
+    "binary" is a compact indexed format, which is memory-mapped on load and decoded lazily field by field.
+    """
+
+    if format not in _CACHE_EXTENSIONS:
+        raise ValueError("Unknown cache format '%s'." % format)
+    global _cache_format
+    _cache_format = format
+    _memory_cache.clear()
 
-def _load(distributor: Distributor, expire_second: int = 40) -> list[TrainInformation] | None:
+def _build_cache_key(distributor: Distributor) -> str:
+    return distributor.name+_CACHE_EXTENSIONS[_cache_format]
+
+def _decode(data: bytes|mmap.mmap) -> list[TrainInformation]:
+    if _cache_format == "binary":
+        return binary_format.loads(data)
+    else:
+        return TrainInformation.from_jsonlist(bytes(data).decode('utf-8'))
+
+def _load(distributor: Distributor, expire_second: float = 40) -> list[TrainInformation] | None:
     """Load cache
 
     Return List of train information if cache is younger than expire_second, None otherwise.
@@ -35,81 +149,573 @@ def _load(distributor: Distributor, expire_second: int = 40) -> list[TrainInform
     Parameters
     ----------
     distributor : Distributor
-    expire_second : int, optional
+    expire_second : float, optional
         (default 40)
 
     Returns
     -------
     list[TrainInformation] | None
         List of train information which is loaded from cache.
+        Parsed information is kept in memory and shared between calls
+        until cached data is modified.
     """
 
-    cache_path = _build_cache_path(distributor=distributor)
+    info, tier = _lookup(distributor=distributor, expire_second=expire_second)
+    metrics.count("cache_lookups", {"distributor": distributor.name, "tier": tier})
+    return info
 
-    try:
-        cache_age = datetime.now(_JST) - datetime.fromtimestamp(os.path.getmtime(cache_path), _JST)
-    except FileNotFoundError:
-        return None
+def _lookup(distributor: Distributor, expire_second: float) -> tuple[list[TrainInformation]|None, str]:
+    """Body of :func:`_load`, also returning which tier the information was found in."""
 
-    if cache_age > timedelta(seconds=expire_second):
-        return None
+    memory = _memory_cache.get(distributor.name)
+    if memory != None and memory.age() <= expire_second:
+        return list(memory.info), "memory"
 
-    try:
-        with open(cache_path, encoding='utf-8') as loadedCacheJSON:
-            return TrainInformation.from_jsonlist(loadedCacheJSON.read())
-    except FileNotFoundError:
-        return None
+    key = _build_cache_key(distributor=distributor)
+
+    stat = _backend.stat(key)
+    if stat == None:
+        return None, "miss"
+
+    if time.time() - stat.updated > expire_second:
+        return None, "expired"
+
+    if memory != None and memory.match(stat):
+        return list(memory.info), "memory"
 
+    # If cached data is broken, fall back to the previous good snapshot.
+    for tier, get in [("backend", _backend.get), ("previous", _backend.get_previous)]:
 
-def _set(distributor: Distributor, max_try : int) -> list[TrainInformation]|None:
+        entry = get(key)
+        if entry == None:
+            return None, "miss"
+
+        if time.time() - entry.stat.updated > expire_second:
+            return None, "expired"
+
+        if memory != None and memory.match(entry.stat):
+            return list(memory.info), "memory"
+
+        try:
+            info = _decode(entry.data)
+        except ValueError:
+            continue
+
+        _remember(distributor, _MemoryCache(entry.stat, tuple(info)))
+        return info, tier
+
+    return None, "miss"
+
+
+def _set(distributor: Distributor, max_try : int, expire_second: float|None = None) -> list[TrainInformation]|None:
     """Download information and save it to cache.
 
+    Only one caller among threads and processes downloads at a time.
+    Others wait for it up to lock timeout, and then load the cache it saved.
+    Request is conditional on the validator of the cache,
+    and if information is not modified, cache is just marked as up to date.
+
     Parameters
     ----------
     distributor : Distributor
     max_try : int
         Try to download information up to max_try times.
+    expire_second : float | None, optional
+        If cache younger than this is found after waiting for other caller, it is returned without downloading.
+        (default None)
 
     Returns
     -------
     list[TrainInformation]|None
-        List of train information which is downloaded from distributor, or None if failed to download max_try times.
+        List of train information which is downloaded from distributor,
+        or None if failed to download max_try times or timed out waiting for other caller.
+    """
+
+    with metrics.span("cache.set", {"distributor": distributor.name}) as span:
+        lock = _backend.lock(_build_cache_key(distributor=distributor))
+        if not lock.acquire(timeout=_lock_timeout):
+            span.attributes["result"] = "timeout"
+            return None
+
+        try:
+            if expire_second != None:
+                cache = _load(distributor=distributor, expire_second=expire_second)
+                if cache != None:
+                    span.attributes["result"] = "waited"
+                    return cache
+
+            result = download_if_modified(distributor=distributor, validator=_load_validator(distributor=distributor), max_try=max_try)
+            if result != None and result.info == None:
+                cache = _touch(distributor=distributor)
+                if cache == None:
+                    # Cache vanished after validator was sent.
+                    result = download_if_modified(distributor=distributor, validator={}, max_try=max_try)
+                else:
+                    span.attributes["result"] = "not_modified"
+                    return cache
+
+            span.attributes["result"] = "downloaded"
+            return _store(distributor=distributor, result=result)
+        finally:
+            lock.release()
+
+async def _async_set(distributor: Distributor, max_try : int, expire_second: float|None = None) -> list[TrainInformation]|None:
+    """Asynchronous version of :func:`_set`.
+
+    Backend I/O and decoding run in worker threads as well as requests, so they don't block the event loop.
+    Coroutines of the same event loop wait for each other on the event loop, not in worker threads,
+    since waiting threads would starve the one holding lock of workers.
+    """
+
+    with metrics.span("cache.set", {"distributor": distributor.name}) as span:
+        deadline = time.monotonic() + _lock_timeout
+        local_lock = _async_refresh_lock(distributor)
+        try:
+            await asyncio.wait_for(local_lock.acquire(), timeout=_lock_timeout)
+        except asyncio.TimeoutError:
+            span.attributes["result"] = "timeout"
+            return None
+
+        try:
+            lock = _backend.lock(_build_cache_key(distributor=distributor))
+            if not await _async_acquire(lock, timeout=max(deadline - time.monotonic(), 0)):
+                span.attributes["result"] = "timeout"
+                return None
+
+            try:
+                if expire_second != None:
+                    cache = await asyncio.to_thread(_load, distributor=distributor, expire_second=expire_second)
+                    if cache != None:
+                        span.attributes["result"] = "waited"
+                        return cache
+
+                validator = await asyncio.to_thread(_load_validator, distributor=distributor)
+                result = await async_download_if_modified(distributor=distributor, validator=validator, max_try=max_try)
+                if result != None and result.info == None:
+                    cache = await asyncio.to_thread(_touch, distributor=distributor)
+                    if cache == None:
+                        result = await async_download_if_modified(distributor=distributor, validator={}, max_try=max_try)
+                    else:
+                        span.attributes["result"] = "not_modified"
+                        return cache
+
+                span.attributes["result"] = "downloaded"
+                return await asyncio.to_thread(_store, distributor=distributor, result=result)
+            finally:
+                await _async_release(lock)
+        finally:
+            local_lock.release()
+
+def _async_refresh_lock(distributor: Distributor) -> asyncio.Lock:
+
+    locks = _async_refresh_locks.setdefault(asyncio.get_running_loop(), {})
+    lock = locks.get(distributor.name)
+    if lock == None:
+        lock = locks[distributor.name] = asyncio.Lock()
+    return lock
+
+async def _async_acquire(lock: CacheLock, timeout: float) -> bool:
+    """Acquire lock in a worker thread.
+
+    If the caller is cancelled while waiting, lock is released as soon as the worker acquires it,
+    since nobody else would release it.
     """
 
-    get_dict = download(distributor=distributor, max_try=max_try)
+    task = asyncio.ensure_future(asyncio.to_thread(lock.acquire, timeout=timeout))
 
-    if get_dict == None:
+    def release_orphan(task: asyncio.Future[bool]) -> None:
+        if not task.cancelled() and task.exception() == None and task.result():
+            asyncio.get_running_loop().run_in_executor(None, lock.release)
+
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        task.add_done_callback(release_orphan)
+        raise
+
+async def _async_release(lock: CacheLock) -> None:
+    """Release lock in a worker thread, since it may be a database write or network round trips.
+
+    Lock is released even if the caller is cancelled while waiting for it.
+    """
+
+    await asyncio.shield(asyncio.ensure_future(asyncio.to_thread(lock.release)))
+
+def _store(distributor: Distributor, result: DownloadResult|None) -> list[TrainInformation]|None:
+
+    if result == None or result.info == None:
         return None
+
+    _save(distributor=distributor, info=result.info)
+    _save_validator(distributor=distributor, validator=result.validator)
+    return result.info
+
+def _save(distributor: Distributor, info: list[TrainInformation]) -> None:
+    """Save information to backend."""
+
+    key = _build_cache_key(distributor=distributor)
+
+    if _cache_format == "binary":
+        stat = _backend.set(key, binary_format.dumps(info))
     else:
-        cache_path = _build_cache_path(distributor=distributor)
+        stat = _backend.set(key, _iter_json_chunks(info))
+
+    _remember(distributor, _MemoryCache(stat, tuple(info)))
+
+def _iter_json_chunks(info: Iterable[TrainInformation]) -> Iterator[bytes]:
+    """Encode information to a JSON list record by record."""
+
+    separator = b"["
+    for single in info:
+        yield separator
+        yield single.to_json_bytes()
+        separator = b","
+    yield b"]" if separator == b"," else b"[]"
+
+def _touch(distributor: Distributor) -> list[TrainInformation]|None:
+    """Mark cache as up to date without rewriting it.
+
+    Returns
+    -------
+    list[TrainInformation]|None
+        Information in the cache, or None if cache is not found.
+    """
+
+    memory = _memory_cache.get(distributor.name)
+
+    touched = _backend.touch(_build_cache_key(distributor=distributor))
+    if touched == None:
+        return None
+    before, after = touched
+
+    if memory != None and memory.match(before):
+        _memory_cache[distributor.name] = memory._replace(stat=after)
+        return list(memory.info)
+
+    _memory_cache.pop(distributor.name, None)
+    return _load(distributor=distributor)
 
-        os.makedirs(_cache_dir, exist_ok=True)
+def _load_validator(distributor: Distributor) -> Validator:
 
-        with open(cache_path, "w", encoding='utf-8') as saveCacheJSON:
-            saveCacheJSON.write(json.dumps(get_dict,ensure_ascii=False,default=to_json_default))
+    key = _build_cache_key(distributor=distributor)
 
-        return get_dict
+    if _backend.stat(key) == None:
+        return {}
+
+    validator: Validator = {}
+    saved = _backend.get_validator(key)
+    if isinstance(saved.get("etag"), str): validator["etag"] = saved["etag"]
+    if isinstance(saved.get("last_modified"), str): validator["last_modified"] = saved["last_modified"]
+    return validator
+
+def _save_validator(distributor: Distributor, validator: Validator) -> None:
+
+    _backend.set_validator(_build_cache_key(distributor=distributor), dict(validator))
+
+def _valid_distributors() -> list[Distributor]:
+    return [ distributor for distributor in Distributor if distributor.is_valid() ]
+
+def _map(function: Callable[[Distributor], _T], distributors: list[Distributor]) -> list[_T]:
+    """Call function for each distributor in thread pool, and return results in the same order."""
+
+    if len(distributors) <= 1:
+        return [ function(distributor) for distributor in distributors ]
+
+    global _executor
+    with _executor_lock:
+        if _executor == None:
+            _executor = ThreadPoolExecutor(max_workers=_max_workers, thread_name_prefix="odpttraininfo")
+        executor = _executor
+
+    futures = [ executor.submit(contextvars.copy_context().run, function, distributor) for distributor in distributors ]
+    return [ future.result() for future in futures ]
 
 def refresh_cache() -> None:
     """Refresh caches which is older than 40sec.
 
+    Caches of distributors are refreshed in parallel.
     If Failed to download information, it tries to download up to 4 times.
     """
 
-    for distributor in Distributor:
-        if not distributor.is_valid():
-            continue
-        if _load(distributor=distributor, expire_second=40) in [None, {}]:
-            _set(distributor=distributor, max_try=4)
+    _refresh_cache(expire_second=40)
+
+def _refresh_cache(expire_second: float) -> None:
+
+    def refresh(distributor: Distributor) -> None:
+        if is_circuit_open(distributor):
+            return
+        if _load(distributor=distributor, expire_second=expire_second) in [None, {}]:
+            _set(distributor=distributor, max_try=4, expire_second=expire_second)
+
+    _map(refresh, _valid_distributors())
+
+async def async_refresh_cache() -> None:
+    """Asynchronous version of :func:`refresh_cache`.
+
+    Caches of all distributors are refreshed concurrently.
+    """
+
+    await _async_refresh_cache(expire_second=40)
+
+async def _async_refresh_cache(expire_second: float) -> None:
+
+    async def refresh(distributor: Distributor) -> None:
+        if is_circuit_open(distributor):
+            return
+        if await asyncio.to_thread(_load, distributor=distributor, expire_second=expire_second) in [None, {}]:
+            await _async_set(distributor=distributor, max_try=4, expire_second=expire_second)
+
+    await asyncio.gather(*[ refresh(distributor) for distributor in _valid_distributors() ])
+
+def start_refresher(interval: float = 30, schedule: AdaptiveSchedule|None = None) -> None:
+    """Start refreshing caches in a background thread.
+
+    Caches older than interval are refreshed every interval seconds.
+    While refresher is running, :func:`fetch_info` returns cache younger than
+    stale_second of distributor (140sec by default) immediately instead of downloading by itself.
+
+    Parameters
+    ----------
+    interval : float, optional
+        Seconds between refreshes, by default 30
+    schedule : AdaptiveSchedule | None, optional
+        If given, each distributor is refreshed on its own interval adapted by schedule instead.
+        :func:`fetch_info` waits for the next scheduled refresh as well, rather than downloading by itself.
+
+    Raises
+    ------
+    RuntimeError
+        Refresher is already running.
+    """
+
+    global _refresher, _schedule
+    if _refresher != None and _refresher.is_alive():
+        raise RuntimeError("Refresher is already running.")
+    if schedule == None:
+        _refresher = Refresher(lambda: _refresh_cache(expire_second=interval), interval=interval)
+    else:
+        _refresher = Refresher(lambda: _refresh_scheduled(schedule), interval=schedule.min_interval)
+    _schedule = schedule
+    _refresher.start()
+
+def _refresh_scheduled(schedule: AdaptiveSchedule) -> float:
+    """Refresh caches which are due in schedule, and return seconds until the next refresh."""
+
+    def refresh(distributor: Distributor) -> None:
+
+        before = _memory_cache.get(distributor.name)
+        try:
+            # Cache refreshed by other process just now is used as it is.
+            _set(distributor=distributor, max_try=4, expire_second=schedule.min_interval)
+        except CircuitOpenError:
+            pass
+        except Exception:
+            # Failure counts as no change, so that interval gets longer.
+            _logger.exception("Failed to refresh cache of %s.", distributor.name)
+        after = _memory_cache.get(distributor.name)
+
+        changes = 0
+        if before != None and after != None and after.info is not before.info:
+            diff = TrainInformation.list_changes(list(after.info), list(before.info))
+            changes = len(diff.added) + len(diff.removed) + len(diff.changed)
+        schedule.record(distributor, changes, () if after == None else after.info, time.time())
+
+    distributors = _valid_distributors()
+    _map(refresh, schedule.due(distributors, time.time()))
+    return schedule.next_wait(distributors, time.time())
+
+def stop_refresher(timeout: float|None = None) -> None:
+    """Stop background refresher started by :func:`start_refresher`.
+
+    Parameters
+    ----------
+    timeout : float | None, optional
+        Wait for running refresh to finish up to this seconds, by default None (wait forever)
+    """
+
+    global _refresher, _schedule
+    if _refresher != None:
+        _refresher.stop(timeout=timeout)
+        _refresher = None
+        _schedule = None
+
+async def async_run_refresher(interval: float = 30) -> None:
+    """Refresh caches every interval seconds until cancelled.
+
+    Asynchronous version of :func:`start_refresher`. Run this as a task, e.g.
+    ``asyncio.create_task(async_run_refresher())``, and cancel the task to stop.
+
+    Parameters
+    ----------
+    interval : float, optional
+        Seconds between refreshes, by default 30
+    """
+
+    if interval <= 0:
+        raise ValueError("Interval must be positive.")
+
+    global _async_refreshers
+    _async_refreshers += 1
+    try:
+        while True:
+            try:
+                await _async_refresh_cache(expire_second=interval)
+            except Exception:
+                _logger.exception("Failed to refresh cache.")
+            await asyncio.sleep(interval)
+    finally:
+        _async_refreshers -= 1
+
+def _is_refreshed_in_background() -> bool:
+    return (_refresher != None and _refresher.is_alive()) or _async_refreshers > 0
+
+def _fresh_second(distributor: Distributor) -> float:
+    """Age of cache returned without downloading."""
+
+    if not _is_refreshed_in_background():
+        return distributor.expire_second
+    schedule = _schedule
+    if schedule != None:
+        # Allow as much delay as stale_second allows after the scheduled refresh.
+        return max(distributor.stale_second, schedule.max_age(distributor) + distributor.stale_second - distributor.expire_second)
+    return distributor.stale_second
+
+def _load_memory(distributor: Distributor) -> list[TrainInformation]|None:
+    """Return information in memory tier if it is fresh, without touching backend."""
+
+    memory = _memory_cache.get(distributor.name)
+    if memory == None or memory.age() > _fresh_second(distributor):
+        return None
+    metrics.count("cache_lookups", {"distributor": distributor.name, "tier": "memory"})
+    return list(memory.info)
+
+def _fetch_all(distributors: list[Distributor], max_try: int) -> list[list[TrainInformation]]:
+    """Fetch information of each distributor, in the same order.
+
+    Fresh information in memory tier is taken on the calling thread,
+    and only distributors which need backend I/O or download are fetched in thread pool.
+    """
+
+    results = [ _load_memory(distributor) for distributor in distributors ]
+    pending = [ i for i, result in enumerate(results) if result == None ]
+    if pending:
+        fetched = _map(lambda distributor: _fetch_single(distributor=distributor, max_try=max_try), [ distributors[i] for i in pending ])
+        for i, result in zip(pending, fetched):
+            results[i] = result
+    return results # type: ignore
+
+def _fetch_single(distributor: Distributor, max_try:int) -> list[TrainInformation]:
+
+    cache = _load(distributor=distributor, expire_second=_fresh_second(distributor))
+    if cache != None:
+        return cache
+
+    if is_circuit_open(distributor):
+        return _load_stale(distributor=distributor)
+
+    try:
+        get = _set(distributor=distributor, max_try=max_try, expire_second=distributor.expire_second)
+    except RETRYABLE_ERRORS as e:
+        _log_download_failure(distributor, e)
+        return _load_stale(distributor=distributor)
+    if get != None:
+        return get
+
+    return _load_stale(distributor=distributor)
+
+async def _async_fetch_all(distributors: list[Distributor], max_try: int) -> list[list[TrainInformation]]:
+    """Asynchronous version of :func:`_fetch_all`."""
+
+    results = [ _load_memory(distributor) for distributor in distributors ]
+    pending = [ i for i, result in enumerate(results) if result == None ]
+    if pending:
+        fetched = await asyncio.gather(*[ _async_fetch_single(distributor=distributors[i], max_try=max_try) for i in pending ])
+        for i, result in zip(pending, fetched):
+            results[i] = result
+    return results # type: ignore
+
+async def _async_fetch_single(distributor: Distributor, max_try:int) -> list[TrainInformation]:
+
+    cache = await asyncio.to_thread(_load, distributor=distributor, expire_second=_fresh_second(distributor))
+    if cache != None:
+        return cache
+
+    if is_circuit_open(distributor):
+        return await asyncio.to_thread(_load_stale, distributor=distributor)
+
+    try:
+        get = await _async_set(distributor=distributor, max_try=max_try, expire_second=distributor.expire_second)
+    except RETRYABLE_ERRORS as e:
+        _log_download_failure(distributor, e)
+        return await asyncio.to_thread(_load_stale, distributor=distributor)
+    if get != None:
+        return get
+
+    return await asyncio.to_thread(_load_stale, distributor=distributor)
+
+def _log_download_failure(distributor: Distributor, e: Exception) -> None:
+
+    if not isinstance(e, CircuitOpenError):
+        _logger.warning("Failed to download information of %s, loading stale cache: %s", distributor.name, e)
+
+def _load_stale(distributor: Distributor) -> list[TrainInformation]:
+    """Load cache up to stale_second old after failing to download or while circuit of distributor is open."""
+
+    cache_force = _load(distributor=distributor, expire_second=distributor.stale_second)
+    if cache_force != None:
+        metrics.count("stale_serves", {"distributor": distributor.name})
+        return cache_force
+    else:
+        metrics.count("too_old", {"distributor": distributor.name})
+        raise TooOldCacheError
+
+def _concat(results: list[list[TrainInformation]], only_abnormal:bool) -> list[TrainInformation]:
+
+    result: list[TrainInformation] = []
+    for single_result in results:
+        result += single_result
+
+    if only_abnormal:
+        return [ single for single in result if single.train_information_status ]
+    else:
+        return result
 
 def fetch_info(only_abnormal:bool = False, max_try:int = 1) -> list[TrainInformation]:
     """Load and Concat train information.
 
     Information are loaded from cache basically.
     If cache is old, it tries to download information.
-    Nonetheless if failed to download, it loads cache forcibly.
+    Nonetheless if failed to download because of server or network, it loads cache forcibly.
+    While circuit breaker of a distributor is open, its cache is loaded forcibly without downloading.
     If cache is too old, it raises TooOldCache Error.
+    Distributors are loaded in parallel, and information is concatenated in order of registration.
 
+    Parameters
+    ----------
+    only_abnormal : bool, optional
+        If True, all return value have abnormal information such as delay.
+    max_try : int, optional
+        Try to download information up to max_try times, by default 1
+
+    Returns
+    -------
+    list[TrainInformation]
+        List of train information.
+
+    Raises
+    ------
+    TooOldCacheError
+        Load cache forcibly but it was too old.
+    """
+
+    return _concat(_fetch_all(_valid_distributors(), max_try=max_try), only_abnormal=only_abnormal)
+
+async def async_fetch_info(only_abnormal:bool = False, max_try:int = 1) -> list[TrainInformation]:
+    """Asynchronous version of :func:`fetch_info`.
+
+    Information of all distributors are loaded or downloaded concurrently,
+    and concatenated in the same order as :func:`fetch_info`.
+    Cache is read, decoded and written in worker threads, so only information fresh in memory is returned on the event loop.
 
     Parameters
     ----------
@@ -129,28 +735,79 @@ def fetch_info(only_abnormal:bool = False, max_try:int = 1) -> list[TrainInforma
         Load cache forcibly but it was too old.
     """
 
-    result: list[TrainInformation] = []
+    return _concat(await _async_fetch_all(_valid_distributors(), max_try=max_try), only_abnormal=only_abnormal)
 
-    for distributor in Distributor:
-        if not distributor.is_valid():
-            continue
-        cache = _load(distributor=distributor, expire_second=80)
-        if cache != None:
-            result += cache
-            continue
+def _build_snapshot(distributors: list[Distributor], results: list[list[TrainInformation]]) -> Snapshot:
+    """Return snapshot of results, reusing the last one if no cache has been updated since."""
 
-        get = _set(distributor=distributor, max_try=max_try)
-        if get != None:
-            result += get
-            continue
+    global _snapshot, _snapshot_sources
 
-        cache_force = _load(distributor=distributor, expire_second=140)
-        if cache_force != None:
-            result += cache_force
+    sources: list[tuple[TrainInformation, ...]] = []
+    for distributor, result in zip(distributors, results):
+        memory = _memory_cache.get(distributor.name)
+        if memory != None and len(memory.info) == len(result) and all( a is b for a, b in zip(memory.info, result) ):
+            sources.append(memory.info)
         else:
-            raise TooOldCacheError
+            sources.append(tuple(result))
 
-    if only_abnormal:
-        return [ single for single in result if single.train_information_status ]
-    else:
-        return result
+    snapshot = _snapshot
+    if snapshot != None and len(sources) == len(_snapshot_sources) and all( a is b for a, b in zip(sources, _snapshot_sources) ):
+        return snapshot
+
+    snapshot = Snapshot(itertools.chain.from_iterable(sources), version=next(_snapshot_versions))
+    _snapshot, _snapshot_sources = snapshot, tuple(sources)
+    return snapshot
+
+def _current_snapshot(distributors: list[Distributor]) -> Snapshot|None:
+    """Return the last snapshot if it is still fresh, without copying anything from memory tier."""
+
+    snapshot = _snapshot
+    if snapshot == None or len(distributors) != len(_snapshot_sources):
+        return None
+
+    for distributor, source in zip(distributors, _snapshot_sources):
+        memory = _memory_cache.get(distributor.name)
+        if memory == None or memory.info is not source or memory.age() > _fresh_second(distributor):
+            return None
+
+    for distributor in distributors:
+        metrics.count("cache_lookups", {"distributor": distributor.name, "tier": "memory"})
+    return snapshot
+
+def fetch_snapshot(max_try:int = 1) -> Snapshot:
+    """Load train information as an indexed snapshot.
+
+    Information is loaded in the same way as :func:`fetch_info`.
+    Snapshot is built only when some cache has been updated, and shared between calls otherwise,
+    as well as JSON rendered by :meth:`Snapshot.render_json`. Its version increases whenever it is rebuilt.
+
+    Parameters
+    ----------
+    max_try : int, optional
+        Try to download information up to max_try times, by default 1
+
+    Returns
+    -------
+    Snapshot
+        Snapshot of train information.
+
+    Raises
+    ------
+    TooOldCacheError
+        Load cache forcibly but it was too old.
+    """
+
+    distributors = _valid_distributors()
+    snapshot = _current_snapshot(distributors)
+    if snapshot != None:
+        return snapshot
+    return _build_snapshot(distributors, _fetch_all(distributors, max_try=max_try))
+
+async def async_fetch_snapshot(max_try:int = 1) -> Snapshot:
+    """Asynchronous version of :func:`fetch_snapshot`."""
+
+    distributors = _valid_distributors()
+    snapshot = _current_snapshot(distributors)
+    if snapshot != None:
+        return snapshot
+    return _build_snapshot(distributors, await _async_fetch_all(distributors, max_try=max_try))
@@ -0,0 +1,360 @@
+"""Columnar export of train information for analytics.
+
+Each column is a flat array. Timestamps are int64 Unix seconds, where missing value is the minimum of int64
+(NaT of ``numpy.datetime64``), and strings are dictionary-encoded as int32 codes, where missing value is -1.
+Arrays are ``array.array``, which NumPy and Arrow use without copying.
+NumPy and pyarrow are optional, and needed only by :meth:`Columns.to_numpy`, :meth:`Columns.to_arrow`
+and :meth:`Columns.write_parquet`.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+from array import array
+from datetime import datetime
+from typing import Generic, Hashable, Iterable, TypeVar
+
+from . import binary_format
+from .odpt_components import (Distributor, MultiLanguageDict,
+                              MultiLanguageString, TrainInformation,
+                              _TrainInfo_attribute2key)
+
+_T = TypeVar("_T")
+
+MISSING_TIMESTAMP = -2**63
+"""Timestamp of missing value."""
+
+LANGUAGES = ("ja", "en", "ko", "zh-Hans", "zh-Hant", "ja-Hrkt")
+
+_STRING_COLUMNS = {
+    "operator": "odpt:operator",
+    "rail_direction": "odpt:railDirection",
+    "station_from": "odpt:stationFrom",
+    "station_to": "odpt:stationTo",
+}
+
+_MULTI_LANGUAGE_COLUMNS = {
+    "status": "odpt:trainInformationStatus",
+    "text": "odpt:trainInformationText",
+    "area": "odpt:trainInformationArea",
+    "kind": "odpt:trainInformationKind",
+    "range": "odpt:trainInformationRange",
+    "cause": "odpt:trainInformationCause",
+}
+
+_TIMESTAMP_COLUMNS = {
+    "date": "dc:date",
+    "valid": "dct:valid",
+    "time_of_origin": "odpt:timeOfOrigin",
+    "resume_estimate": "odpt:resumeEstimate",
+}
+
+_PREFIXES = ("odpt.Operator:", "odpt.RailDirection:", "odpt.Station:")
+
+def _strip_prefix(value: str) -> str:
+    for prefix in _PREFIXES:
+        if value.startswith(prefix):
+            return value[len(prefix):]
+    return value
+
+class DictionaryColumn(Generic[_T]):
+    """Dictionary-encoded column.
+
+    Value of row i is ``values[codes[i]]``, or None if ``codes[i]`` is -1.
+    """
+
+    codes: array[int]
+    """Index of value of each row, int32."""
+    values: list[_T]
+    """Distinct values."""
+
+    def __init__(self) -> None:
+        self.codes = array("i")
+        self.values = []
+        self._index: dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, row: int) -> _T|None:
+        code = self.codes[row]
+        return None if code < 0 else self.values[code]
+
+    def _append(self, key: Hashable, value: _T|None) -> None:
+
+        if value is None:
+            self.codes.append(-1)
+            return
+
+        code = self._index.get(key)
+        if code == None:
+            code = self._index[key] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+class Columns():
+    """Train information in columns.
+
+    Columns are attributes of the same names:
+
+    - line : Line ID like "TWR.Rinkai", or company ID if information is about whole of railway company.
+    - operator, rail_direction, station_from, station_to : IDs without prefix.
+    - status, text, area, kind, range, cause : Multi-language strings as dictionaries like {"ja": "遅延", "en": "Delay"}.
+    - date, valid, time_of_origin, resume_estimate : Timestamps.
+    - recorded, change : Time and kind ("added", "changed" or "cleared") of change. Only in history.
+    """
+
+    line: DictionaryColumn[str]
+    operator: DictionaryColumn[str]
+    rail_direction: DictionaryColumn[str]
+    station_from: DictionaryColumn[str]
+    station_to: DictionaryColumn[str]
+    status: DictionaryColumn[MultiLanguageDict]
+    text: DictionaryColumn[MultiLanguageDict]
+    area: DictionaryColumn[MultiLanguageDict]
+    kind: DictionaryColumn[MultiLanguageDict]
+    range: DictionaryColumn[MultiLanguageDict]
+    cause: DictionaryColumn[MultiLanguageDict]
+    date: array[int]
+    valid: array[int]
+    time_of_origin: array[int]
+    resume_estimate: array[int]
+    recorded: array[int]|None
+    change: DictionaryColumn[str]|None
+
+    def __init__(self, history: bool = False) -> None:
+
+        self.line = DictionaryColumn()
+        for name in _STRING_COLUMNS:
+            setattr(self, name, DictionaryColumn())
+        for name in _MULTI_LANGUAGE_COLUMNS:
+            setattr(self, name, DictionaryColumn())
+        for name in _TIMESTAMP_COLUMNS:
+            setattr(self, name, array("q"))
+        self.recorded = array("q") if history else None
+        self.change = DictionaryColumn() if history else None
+        self._timestamps: dict[str, int] = {}
+        self._string_columns: list[tuple[DictionaryColumn[str], str]] = [ (getattr(self, name), key) for name, key in _STRING_COLUMNS.items() ]
+        self._multi_language_columns: list[tuple[DictionaryColumn[MultiLanguageDict], str]] = [ (getattr(self, name), key) for name, key in _MULTI_LANGUAGE_COLUMNS.items() ]
+        self._timestamp_columns: list[tuple[array[int], str]] = [ (getattr(self, name), key) for name, key in _TIMESTAMP_COLUMNS.items() ]
+
+    def __len__(self) -> int:
+        return len(self.line)
+
+    def names(self) -> list[str]:
+        """Return names of columns."""
+
+        names = ["line", *_STRING_COLUMNS, *_MULTI_LANGUAGE_COLUMNS, *_TIMESTAMP_COLUMNS]
+        if self.recorded != None:
+            names += ["recorded", "change"]
+        return names
+
+    def _timestamp(self, value: object) -> int:
+
+        if isinstance(value, datetime):
+            return int(value.timestamp())
+        if not isinstance(value, str):
+            return MISSING_TIMESTAMP
+
+        timestamp = self._timestamps.get(value)
+        if timestamp == None:
+            try:
+                timestamp = int(datetime.fromisoformat(value).timestamp())
+            except ValueError:
+                timestamp = MISSING_TIMESTAMP
+            self._timestamps[value] = timestamp
+        return timestamp
+
+    def _append(self, record: dict[str,object], line: str|None = None) -> None:
+        """Append record, whose values are either decoded or JSON values."""
+
+        if line == None:
+            line = ""
+            for key, prefix in [("owl:sameAs", "odpt.TrainInformation:"), ("odpt:railway", "odpt.Railway:"), ("odpt:operator", "odpt.Operator:")]:
+                value = record.get(key)
+                if isinstance(value, str) and value:
+                    line = value.replace(prefix, "")
+                    break
+        self.line._append(line, line)
+
+        for column, key in self._string_columns:
+            value = record.get(key)
+            if type(value) is str:
+                column._append(value, _strip_prefix(value))
+            else:
+                column.codes.append(-1)
+
+        for column, key in self._multi_language_columns:
+            value = record.get(key)
+            if value is None:
+                column.codes.append(-1)
+            elif type(value) is dict:
+                column._append(tuple(value.items()), value)
+            elif isinstance(value, MultiLanguageString):
+                column._append(value.key(), value.to_dict())
+            else:
+                column.codes.append(-1)
+
+        for timestamps, key in self._timestamp_columns:
+            timestamps.append(self._timestamp(record.get(key)))
+
+    def _append_change(self, recorded: float, change: str, line: str, record: dict[str,object]) -> None:
+
+        assert self.recorded != None and self.change != None
+        self._append(record, line=line)
+        self.recorded.append(int(recorded))
+        self.change._append(change, change)
+
+    def to_numpy(self) -> dict[str, object]:
+        """Return columns as NumPy arrays without copying.
+
+        Timestamps are ``datetime64[s]`` and dictionary-encoded columns are int32 codes,
+        whose values are in ``values`` of the column.
+
+        Returns
+        -------
+        dict[str, numpy.ndarray]
+            Array of each column name.
+
+        Raises
+        ------
+        ImportError
+            NumPy is not installed.
+        """
+
+        import numpy # type: ignore
+
+        result: dict[str, object] = {}
+        for name in self.names():
+            column = getattr(self, name)
+            if isinstance(column, DictionaryColumn):
+                result[name] = numpy.frombuffer(column.codes, dtype=numpy.int32)
+            else:
+                result[name] = numpy.frombuffer(column, dtype="datetime64[s]")
+        return result
+
+    def to_arrow(self) -> object:
+        """Return columns as a pyarrow Table.
+
+        Data buffers of timestamps and dictionary codes are shared without copying.
+        Multi-language columns are split into a column per language, e.g. "text_ja" and "text_en".
+
+        Returns
+        -------
+        pyarrow.Table
+
+        Raises
+        ------
+        ImportError
+            pyarrow is not installed.
+        """
+
+        import pyarrow # type: ignore
+
+        def validity(values: array[int], missing: int) -> object:
+            if missing not in values:
+                return None
+            bitmap = bytearray((len(values) + 7) // 8)
+            for row, value in enumerate(values):
+                if value != missing:
+                    bitmap[row >> 3] |= 1 << (row & 7)
+            return pyarrow.py_buffer(bitmap)
+
+        def dictionary(column: DictionaryColumn, values: list[str|None]) -> object:
+            indices = pyarrow.Array.from_buffers(pyarrow.int32(), len(column.codes), [validity(column.codes, -1), pyarrow.py_buffer(column.codes)])
+            return pyarrow.DictionaryArray.from_arrays(indices, pyarrow.array(values, type=pyarrow.string()))
+
+        arrays: dict[str, object] = {}
+        for name in self.names():
+            column = getattr(self, name)
+            if name in _MULTI_LANGUAGE_COLUMNS:
+                for language in LANGUAGES:
+                    values = [ value.get(language) for value in column.values ]
+                    if language == "ja" or any( value != None for value in values ):
+                        arrays["%s_%s" % (name, language.replace("-", "_").lower())] = dictionary(column, values)
+            elif isinstance(column, DictionaryColumn):
+                arrays[name] = dictionary(column, column.values)
+            else:
+                arrays[name] = pyarrow.Array.from_buffers(pyarrow.timestamp("s", tz="Asia/Tokyo"), len(column), [validity(column, MISSING_TIMESTAMP), pyarrow.py_buffer(column)])
+
+        return pyarrow.table(arrays)
+
+    def write_parquet(self, path: str, **kwargs: object) -> None:
+        """Write columns to Parquet file.
+
+        Parameters
+        ----------
+        path : str
+        **kwargs
+            Passed to ``pyarrow.parquet.write_table``.
+
+        Raises
+        ------
+        ImportError
+            pyarrow is not installed.
+        """
+
+        import pyarrow.parquet # type: ignore
+
+        pyarrow.parquet.write_table(self.to_arrow(), path, **kwargs)
+
+def _append_payload(columns: Columns, data: bytes|mmap.mmap) -> None:
+
+    if data[:len(binary_format.MAGIC)] == binary_format.MAGIC:
+        records: Iterable[object] = binary_format.iter_dicts(data)
+    else:
+        records = json.loads(bytes(data))
+        if not isinstance(records, list):
+            raise ValueError("Not a JSON list.")
+
+    for record in records:
+        if not isinstance(record, dict):
+            raise ValueError("Array has invalid type object.")
+        columns._append(record)
+
+def from_payload(data: bytes|mmap.mmap) -> Columns:
+    """Build columns from JSON or binary cache data, without making TrainInformation.
+
+    Raises
+    ------
+    ValueError
+        Data is invalid.
+    """
+
+    columns = Columns()
+    _append_payload(columns, data)
+    return columns
+
+def from_cache(distributors: Iterable[Distributor]|None = None) -> Columns:
+    """Build columns from the current cache of distributors, without making TrainInformation.
+
+    Cache is neither refreshed nor checked for expiry.
+
+    Parameters
+    ----------
+    distributors : Iterable[Distributor] | None, optional
+        By default, all distributors whose consumerKey is set.
+
+    Raises
+    ------
+    ValueError
+        Cache is broken.
+    """
+
+    from . import cache
+
+    columns = Columns()
+    for distributor in cache._valid_distributors() if distributors == None else distributors:
+        entry = cache._backend.get(cache._build_cache_key(distributor))
+        if entry != None:
+            _append_payload(columns, entry.data)
+    return columns
+
+def from_info(info: Iterable[TrainInformation]) -> Columns:
+    """Build columns from train information, e.g. a :class:`~odpttraininfo.Snapshot`."""
+
+    columns = Columns()
+    for single in info:
+        columns._append({ key: getattr(single, attribute) for attribute, key in _TrainInfo_attribute2key.items() })
+    return columns
@@ -1,4 +1,33 @@
-from .cache import set_cache_dir
-from .odpt_components import output_with_none
+import importlib
+from typing import TYPE_CHECKING
 
-__all__ = ["set_cache_dir","output_with_none"]
\ No newline at end of file
+if TYPE_CHECKING:
+    from .cache import (set_cache_backend, set_cache_dir, set_cache_format,
+                        set_lock_timeout, set_max_workers)
+    from .odpt_client import (set_circuit_breaker, set_http_options,
+                              set_retry_policy)
+    from .odpt_components import output_with_none
+
+__all__ = ["set_cache_dir","set_cache_backend","set_cache_format","set_lock_timeout","set_max_workers","set_http_options","set_retry_policy","set_circuit_breaker","output_with_none"]
+
+_lazy_attributes: dict[str, str] = {
+    "set_cache_dir": "cache",
+    "set_cache_backend": "cache",
+    "set_cache_format": "cache",
+    "set_lock_timeout": "cache",
+    "set_max_workers": "cache",
+    "set_http_options": "odpt_client",
+    "set_retry_policy": "odpt_client",
+    "set_circuit_breaker": "odpt_client",
+    "output_with_none": "odpt_components",
+}
+"""Module of each name, imported on first access."""
+
+def __getattr__(name: str) -> object:
+
+    if name not in _lazy_attributes:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    return getattr(importlib.import_module("." + _lazy_attributes[name], __package__), name)
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_lazy_attributes))
@@ -54,6 +54,10 @@ class NotFound(HTTPException):
     def __str__(self) -> str:
         return "%s URL: %s" % (super().__str__(), self.url)
 
+class TooManyRequests(HTTPException):
+    """HTTP status code was 429."""
+    pass
+
 class UnknownHTTPError(HTTPException):
     """HTTP status code was unexpected."""
     pass
@@ -64,3 +68,43 @@ class OdptServerError(HTTPException):
 
 class TooOldCacheError(OdptException):
     pass
+
+class CircuitOpenError(OdptException):
+    """Request was not sent because circuit breaker of distributor is open."""
+
+    distributor: str
+    """Name of distributor."""
+
+    retry_in: float
+    """Seconds until a request is let through again."""
+
+    def __init__(self, distributor: str, retry_in: float) -> None:
+        self.distributor = distributor
+        self.retry_in = retry_in
+
+    def __str__(self) -> str:
+        return "Circuit of %s is open. Retry in %.1f seconds." % (self.distributor, self.retry_in)
+
+class ChangeEventsExpiredError(OdptException):
+    """Requested change events are no longer retained. Reload whole information instead."""
+
+    since: str
+    """Requested resume token."""
+
+    oldest: str
+    """Token of the oldest retained event, or of the next event if none is retained."""
+
+    def __init__(self, since: str, oldest: str) -> None:
+        self.since = since
+        self.oldest = oldest
+
+    def __str__(self) -> str:
+        epoch, _, seq = self.since.rpartition(":")
+        oldest_epoch, _, oldest_seq = self.oldest.rpartition(":")
+        if epoch != oldest_epoch or not seq.isdigit() or int(seq) >= int(oldest_seq):
+            return "Token %s was not issued by this process. Oldest retained event is %s." % (self.since, self.oldest)
+        return "Events after %s are expired. Oldest retained event is %s." % (self.since, self.oldest)
+
+class RedisError(OdptException):
+    """Redis server returned an error reply."""
+    pass
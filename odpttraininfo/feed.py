@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import queue
+import threading
+import uuid
+from collections import deque
+from typing import AsyncIterator, Callable, Literal, NamedTuple, Sequence
+
+from .errors import ChangeEventsExpiredError
+from .odpt_components import TrainInformation
+
+_logger = logging.getLogger(__name__)
+
+class ChangeEvent(NamedTuple):
+    """Change of information about a line."""
+
+    seq: int
+    """Sequence number, increasing by 1 per event in this process."""
+    kind: Literal["added", "changed", "cleared"]
+    """"added" if information about the line appeared, "changed" if it was updated, "cleared" if it disappeared."""
+    line: str
+    """Line ID like "TWR.Rinkai", or company ID if information is about whole of railway company."""
+    info: TrainInformation|None
+    """New information. None if cleared."""
+    previous: TrainInformation|None
+    """Old information. None if added."""
+    epoch: str
+    """ID of the feed which issued the event, different in each process."""
+
+    @property
+    def token(self) -> str:
+        """Token to resume from this event by :func:`changes_since` or :func:`async_watch`, even after reconnecting."""
+
+        return _token(self.epoch, self.seq)
+
+def _token(epoch: str, seq: int) -> str:
+    return "%s:%d" % (epoch, seq)
+
+def _line_of(info: TrainInformation) -> str:
+    try:
+        return info.get_line()
+    except ValueError:
+        return ""
+
+class ChangeFeed():
+    """Log of change events between consecutive information of each source.
+
+    Events are computed only after someone starts watching,
+    and the latest max_events events are retained for resuming.
+    Resume token is made of epoch of the feed and seq of the event,
+    so that a token issued by another process (e.g. before restart) is never mistaken for one of this feed.
+    Callbacks are called in a dispatcher thread of the feed in order of events,
+    so that slow callbacks don't delay the thread which published them, e.g. holding lock of cache.
+    """
+
+    epoch: str
+    """ID of this feed, random in each process."""
+
+    def __init__(self, max_events: int = 10000) -> None:
+
+        self.epoch = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._enabled = False
+        self._last: dict[str, Sequence[TrainInformation]] = {}
+        self._log: deque[ChangeEvent] = deque(maxlen=max_events)
+        self._callbacks: list[Callable[[list[ChangeEvent]], None]] = []
+        self._waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self._dispatches: queue.SimpleQueue[tuple[list[Callable[[list[ChangeEvent]], None]], list[ChangeEvent]]|threading.Event] = queue.SimpleQueue()
+        self._dispatcher: threading.Thread|None = None
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the latest event, or 0 if there is none."""
+
+        return self._seq
+
+    @property
+    def token(self) -> str:
+        """Token to resume from the latest event."""
+
+        return _token(self.epoch, self._seq)
+
+    def publish(self, source: str, info: Sequence[TrainInformation]) -> None:
+        """Record the latest information of source and notify changes since the previous one."""
+
+        with self._lock:
+            old = self._last.get(source, ())
+            self._last[source] = info
+            if old is info or not self._enabled:
+                return
+
+            changes = TrainInformation.list_changes(list(info), list(old))
+            events: list[ChangeEvent] = []
+            for info_new in changes.added:
+                events.append(self._event("added", _line_of(info_new), info_new, None))
+            for info_old, info_new in changes.changed:
+                events.append(self._event("changed", _line_of(info_new), info_new, info_old))
+            for info_old in changes.removed:
+                events.append(self._event("cleared", _line_of(info_old), None, info_old))
+            if not events:
+                return
+
+            self._log.extend(events)
+            if self._callbacks:
+                # Queued under lock, so that callbacks receive events in order of seq.
+                self._dispatches.put((list(self._callbacks), events))
+            waiters = list(self._waiters)
+
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Event loop is closed.
+                self._waiters.discard((loop, event))
+
+    def _event(self, kind: Literal["added", "changed", "cleared"], line: str, info: TrainInformation|None, previous: TrainInformation|None) -> ChangeEvent:
+        self._seq += 1
+        return ChangeEvent(self._seq, kind, line, info, previous, self.epoch)
+
+    def _dispatch(self) -> None:
+        """Body of dispatcher thread."""
+
+        while True:
+            item = self._dispatches.get()
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            callbacks, events = item
+            for callback in callbacks:
+                try:
+                    callback(events)
+                except Exception:
+                    _logger.exception("Change event callback raised an exception.")
+
+    def subscribe(self, callback: Callable[[list[ChangeEvent]], None]) -> Callable[[], None]:
+        """Call callback with events of each refresh.
+
+        Callback is called in the dispatcher thread of the feed, not in the thread which refreshed cache.
+
+        Returns
+        -------
+        Callable[[], None]
+            Function to unsubscribe.
+        """
+
+        with self._lock:
+            self._enabled = True
+            self._callbacks.append(callback)
+            if self._dispatcher == None:
+                self._dispatcher = threading.Thread(target=self._dispatch, name="odpttraininfo-feed", daemon=True)
+                self._dispatcher.start()
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+
+        return unsubscribe
+
+    def flush(self, timeout: float|None = None) -> bool:
+        """Wait until callbacks are called with events published so far.
+
+        Returns
+        -------
+        bool
+            False if timed out.
+        """
+
+        done = threading.Event()
+        with self._lock:
+            if self._dispatcher == None:
+                return True
+            self._dispatches.put(done)
+        return done.wait(timeout)
+
+    def since(self, token: str) -> list[ChangeEvent]:
+        """Return events after the event of token.
+
+        Raises
+        ------
+        ChangeEventsExpiredError
+            Some events after token are no longer retained,
+            or token was issued by another feed, e.g. by another process or before restart.
+        """
+
+        with self._lock:
+            self._enabled = True
+            return self._since(token)
+
+    def _since(self, token: str) -> list[ChangeEvent]:
+
+        oldest = self._log[0].seq if self._log else self._seq + 1
+        epoch, _, seq_text = token.rpartition(":")
+        if epoch != self.epoch or not seq_text.isdigit() or int(seq_text) > self._seq:
+            raise ChangeEventsExpiredError(token, _token(self.epoch, oldest))
+        seq = int(seq_text)
+        if seq == self._seq:
+            return []
+        if seq < oldest - 1:
+            raise ChangeEventsExpiredError(token, _token(self.epoch, oldest))
+        return list(itertools.islice(self._log, seq - oldest + 1, None))
+
+    async def async_iter(self, since: str|None = None) -> AsyncIterator[ChangeEvent]:
+        """Iterate events after the event of token since (latest event if None) forever."""
+
+        with self._lock:
+            self._enabled = True
+            token = self.token if since == None else since
+            # Check token before waiting for the first event.
+            self._since(token)
+
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        self._waiters.add(waiter)
+        try:
+            while True:
+                waiter[1].clear()
+                events = self.since(token)
+                for event in events:
+                    token = event.token
+                    yield event
+                if not events:
+                    await waiter[1].wait()
+        finally:
+            self._waiters.discard(waiter)
+
+_feed = ChangeFeed()
+
+def publish(source: str, info: Sequence[TrainInformation]) -> None:
+    _feed.publish(source, info)
+
+def current_token() -> str:
+    """Return token to resume from the latest change event."""
+
+    return _feed.token
+
+def watch(callback: Callable[[list[ChangeEvent]], None]) -> Callable[[], None]:
+    """Register callback which is called with change events whenever cache is refreshed.
+
+    Callback is called in a dispatcher thread in order of events, shortly after cache is refreshed.
+
+    Parameters
+    ----------
+    callback : Callable[[list[ChangeEvent]], None]
+
+    Returns
+    -------
+    Callable[[], None]
+        Function to unregister callback.
+    """
+
+    return _feed.subscribe(callback)
+
+def changes_since(token: str) -> list[ChangeEvent]:
+    """Return change events after the event of token.
+
+    Parameters
+    ----------
+    token : str
+        :attr:`ChangeEvent.token` of the last event the client has received, or :func:`current_token`.
+
+    Returns
+    -------
+    list[ChangeEvent]
+
+    Raises
+    ------
+    ChangeEventsExpiredError
+        Some events after token are no longer retained, or token was issued by another process.
+        Reload whole information instead.
+    """
+
+    return _feed.since(token)
+
+def async_watch(since: str|None = None) -> AsyncIterator[ChangeEvent]:
+    """Iterate change events asynchronously.
+
+    Parameters
+    ----------
+    since : str | None, optional
+        Resume from events after the event of this token. If None, only new events are iterated.
+
+    Returns
+    -------
+    AsyncIterator[ChangeEvent]
+
+    Raises
+    ------
+    ChangeEventsExpiredError
+        Some events after since are no longer retained, or since was issued by another process.
+    """
+
+    return _feed.async_iter(since)
@@ -0,0 +1,373 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, Literal, NamedTuple
+
+from .columnar import Columns
+from .odpt_components import TrainInformation, to_json_default
+from .snapshot import _strip_prefix
+from .feed import ChangeEvent, _line_of, watch
+
+_JST = timezone(timedelta(hours=+9), 'JST')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recorded REAL NOT NULL,
+    line TEXT NOT NULL,
+    direction TEXT NOT NULL DEFAULT '',
+    kind TEXT NOT NULL,
+    info TEXT
+);
+CREATE INDEX IF NOT EXISTS history_recorded ON history (recorded);
+"""
+
+_INDEXES = """
+DROP INDEX IF EXISTS history_line_recorded;
+CREATE INDEX IF NOT EXISTS history_line_direction_recorded ON history (line, direction, recorded);
+"""
+
+_Key = tuple[str, str]
+"""Line and direction."""
+
+class HistoryEntry(NamedTuple):
+    """Change of information about a line at a time."""
+
+    recorded: datetime
+    """Time when the change was observed."""
+    line: str
+    """Line ID like "TWR.Rinkai", or company ID."""
+    direction: str
+    """Rail direction like "Inbound", or empty string if information is about both directions."""
+    kind: Literal["added", "changed", "cleared"]
+    """Kind of change. See :class:`~odpttraininfo.feed.ChangeEvent`."""
+    info: TrainInformation|None
+    """Information after the change. None if cleared."""
+
+def _to_timestamp(time_: datetime|float) -> float:
+    if isinstance(time_, datetime):
+        return time_.timestamp()
+    return time_
+
+def _direction_of(info: TrainInformation) -> str:
+    return "" if not info.rail_direction else _strip_prefix(info.rail_direction)
+
+_COLUMNS = "recorded, line, direction, kind, info"
+
+class HistoryStore():
+    """Append-only store of changes of train information in a SQLite database.
+
+    Only changes between consecutive snapshots are recorded,
+    compared in the same way as :meth:`TrainInformation.__eq__` (ID and timestamps are ignored).
+    Information is kept per line and rail direction,
+    and changes are indexed by them and time, so range queries don't replay the whole history.
+
+    Parameters
+    ----------
+    path : str
+        Path of database file.
+    retention : timedelta | None, optional
+        Compact changes older than this automatically. If None (default), history is kept forever.
+    compact_interval : timedelta, optional
+        Minimum interval of automatic compaction, by default 1 hour.
+    """
+
+    path: str
+    retention: timedelta|None
+    compact_interval: timedelta
+
+    def __init__(self, path: str, retention: timedelta|None = None, compact_interval: timedelta = timedelta(hours=1)) -> None:
+
+        self.path = path
+        self.retention = retention
+        self.compact_interval = compact_interval
+        self._local = threading.local()
+        self._last_compacted = time.time()
+        self._lock = threading.Lock()
+        self._current: dict[_Key, TrainInformation]|None = None
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+            if "direction" not in [ row[1] for row in connection.execute("PRAGMA table_info(history)") ]:
+                # Database made before direction was recorded.
+                connection.execute("ALTER TABLE history ADD COLUMN direction TEXT NOT NULL DEFAULT ''")
+            connection.executescript(_INDEXES)
+
+    def _connect(self) -> sqlite3.Connection:
+
+        connection: sqlite3.Connection|None = getattr(self._local, "connection", None)
+        if connection == None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def attach(self, baseline: Iterable[TrainInformation]|None = None) -> Callable[[], None]:
+        """Record changes whenever cache is refreshed in this process.
+
+        The current information is recorded first as baseline by :meth:`record_baseline`,
+        so that changes while no process was attached (e.g. during restart) are recorded as well.
+        Attach only one process (e.g. the one running refresher) to the same database,
+        otherwise the same changes are recorded by each process.
+
+        Parameters
+        ----------
+        baseline : Iterable[TrainInformation] | None, optional
+            Current information of all distributors. By default, :func:`~odpttraininfo.fetch_snapshot`.
+
+        Returns
+        -------
+        Callable[[], None]
+            Function to detach.
+
+        Raises
+        ------
+        TooOldCacheError
+            Failed to fetch baseline.
+        """
+
+        detach = watch(self.record)
+        try:
+            if baseline == None:
+                from .cache import fetch_snapshot
+                baseline = fetch_snapshot()
+            self.record_baseline(baseline)
+        except BaseException:
+            detach()
+            raise
+        return detach
+
+    def record(self, events: list[ChangeEvent], recorded: datetime|float|None = None) -> None:
+        """Append change events.
+
+        Events which don't change the recorded information, e.g. "added" of the same information, are ignored.
+
+        Parameters
+        ----------
+        events : list[ChangeEvent]
+        recorded : datetime | float | None, optional
+            Time of the changes, by default now.
+        """
+
+        updates: list[tuple[_Key, TrainInformation|None]] = []
+        for event in events:
+            info = event.info if event.info != None else event.previous
+            updates.append(((event.line, "" if info == None else _direction_of(info)), event.info))
+        self._append(updates, recorded)
+
+    def record_baseline(self, info: Iterable[TrainInformation], recorded: datetime|float|None = None) -> None:
+        """Record information as the whole current state.
+
+        Information which differs from the recorded one is recorded as "added" or "changed",
+        and recorded information missing from info is recorded as "cleared".
+
+        Parameters
+        ----------
+        info : Iterable[TrainInformation]
+            Current information of all distributors.
+        recorded : datetime | float | None, optional
+            Time of the changes, by default now.
+        """
+
+        self._append([ ((_line_of(single), _direction_of(single)), single) for single in info ], recorded, clear_missing=True)
+
+    def _load_current(self) -> dict[_Key, TrainInformation]:
+        """Return the latest recorded information of each line and direction, loading it on first call."""
+
+        if self._current == None:
+            connection = self._connect()
+            current: dict[_Key, TrainInformation] = {}
+            for line, direction in connection.execute("SELECT DISTINCT line, direction FROM history").fetchall():
+                row = self._latest(line, direction, None)
+                if row != None and row[3] != "cleared":
+                    current[(line, direction)] = TrainInformation(json.loads(row[4]))
+            self._current = current
+        return self._current
+
+    def _append(self, updates: list[tuple[_Key, TrainInformation|None]], recorded: datetime|float|None, clear_missing: bool = False) -> None:
+        """Append updates which change the recorded information.
+
+        If clear_missing, recorded information missing from updates is cleared.
+        """
+
+        timestamp = time.time() if recorded == None else _to_timestamp(recorded)
+
+        with self._lock:
+            current = self._load_current()
+            if clear_missing:
+                keys = { key for key, _ in updates }
+                updates = updates + [ (key, None) for key in current if key not in keys ]
+            rows: list[tuple[float, str, str, str, str|None]] = []
+            for key, info in updates:
+                old = current.get(key)
+                if info == None:
+                    if old == None:
+                        continue
+                    del current[key]
+                    rows.append((timestamp, *key, "cleared", None))
+                else:
+                    if old != None and old == info:
+                        continue
+                    current[key] = info
+                    rows.append((timestamp, *key, "added" if old == None else "changed", json.dumps(info, ensure_ascii=False, default=to_json_default)))
+
+            if rows:
+                with self._connect() as connection:
+                    connection.executemany("INSERT INTO history (recorded, line, direction, kind, info) VALUES (?, ?, ?, ?, ?)", rows)
+
+        if self.retention != None and time.time() - self._last_compacted >= self.compact_interval.total_seconds():
+            self._last_compacted = time.time()
+            self.compact(time.time() - self.retention.total_seconds())
+
+    @staticmethod
+    def _to_entry(row: tuple[float, str, str, str, str|None]) -> HistoryEntry:
+        recorded, line, direction, kind, info = row
+        return HistoryEntry(
+            datetime.fromtimestamp(recorded, _JST),
+            line,
+            direction,
+            kind, # type: ignore
+            None if info == None else TrainInformation(json.loads(info)),
+        )
+
+    def _latest(self, line: str, direction: str, when: float|None) -> tuple[float, str, str, str, str|None]|None:
+        """Return the latest row of line and direction recorded at or before when."""
+
+        return self._connect().execute(
+            "SELECT %s FROM history WHERE line = ? AND direction = ? AND recorded <= ? ORDER BY recorded DESC, id DESC LIMIT 1" % _COLUMNS,
+            (line, direction, float("inf") if when == None else when)
+        ).fetchone()
+
+    def _status_at(self, line: str, when: float, direction: str|None) -> list[HistoryEntry]:
+        """Return the latest entry of each direction of line at the time, unless cleared."""
+
+        if direction == None:
+            directions = [ row[0] for row in self._connect().execute("SELECT DISTINCT direction FROM history WHERE line = ?", (line,)) ]
+        else:
+            directions = [direction]
+
+        result: list[HistoryEntry] = []
+        for direction_ in sorted(directions):
+            row = self._latest(line, direction_, when)
+            if row != None and row[3] != "cleared":
+                result.append(self._to_entry(row))
+        return result
+
+    def at(self, line: str, when: datetime|float, direction: str|None = None) -> list[TrainInformation]:
+        """Return information about line at the time, one per rail direction.
+
+        Parameters
+        ----------
+        line : str
+            Line ID like "JR-East.ChuoRapid".
+        when : datetime | float
+            Datetime or unix time.
+        direction : str | None, optional
+            Rail direction like "Inbound", or empty string for information about both directions.
+            By default, information of all directions.
+
+        Returns
+        -------
+        list[TrainInformation]
+            Empty if there was none.
+        """
+
+        return [ entry.info for entry in self._status_at(_strip_prefix(line), _to_timestamp(when), direction) if entry.info != None ]
+
+    def changes(self, line: str, start: datetime|float, end: datetime|float, direction: str|None = None) -> list[HistoryEntry]:
+        """Return changes of line (of direction, if given) recorded in start < time <= end, in order of time."""
+
+        if direction == None:
+            rows = self._connect().execute(
+                "SELECT %s FROM history WHERE line = ? AND recorded > ? AND recorded <= ? ORDER BY recorded, id" % _COLUMNS,
+                (_strip_prefix(line), _to_timestamp(start), _to_timestamp(end))
+            ).fetchall()
+        else:
+            rows = self._connect().execute(
+                "SELECT %s FROM history WHERE line = ? AND direction = ? AND recorded > ? AND recorded <= ? ORDER BY recorded, id" % _COLUMNS,
+                (_strip_prefix(line), direction, _to_timestamp(start), _to_timestamp(end))
+            ).fetchall()
+        return [ self._to_entry(row) for row in rows ]
+
+    def status(self, line: str, start: datetime|float, end: datetime|float, direction: str|None = None) -> list[HistoryEntry]:
+        """Return status of line between start and end.
+
+        The first entries are the status of each direction at start (if any), followed by the changes until end.
+
+        Parameters
+        ----------
+        line : str
+            Line ID like "JR-East.ChuoRapid".
+        start : datetime | float
+        end : datetime | float
+        direction : str | None, optional
+            Rail direction like "Inbound". By default, all directions.
+        """
+
+        return self._status_at(_strip_prefix(line), _to_timestamp(start), direction) + self.changes(line, start, end, direction)
+
+    def to_columns(self, start: datetime|float, end: datetime|float, line: str|None = None) -> Columns:
+        """Return changes recorded in start < time <= end as columns, without making TrainInformation.
+
+        Parameters
+        ----------
+        start : datetime | float
+        end : datetime | float
+        line : str | None, optional
+            Line ID like "JR-East.ChuoRapid". By default, changes of all lines.
+
+        Returns
+        -------
+        Columns
+            Columns including "recorded" and "change".
+        """
+
+        if line == None:
+            cursor = self._connect().execute(
+                "SELECT %s FROM history WHERE recorded > ? AND recorded <= ? ORDER BY recorded, id" % _COLUMNS,
+                (_to_timestamp(start), _to_timestamp(end))
+            )
+        else:
+            cursor = self._connect().execute(
+                "SELECT %s FROM history WHERE line = ? AND recorded > ? AND recorded <= ? ORDER BY recorded, id" % _COLUMNS,
+                (_strip_prefix(line), _to_timestamp(start), _to_timestamp(end))
+            )
+
+        columns = Columns(history=True)
+        for recorded, line_, direction, kind, info in cursor:
+            if info != None:
+                record = json.loads(info)
+            else:
+                record = { "odpt:railDirection": direction } if direction else {}
+            columns._append_change(recorded, kind, line_, record)
+        return columns
+
+    def compact(self, before: datetime|float) -> int:
+        """Drop changes older than before, keeping the status of each line and direction at that time.
+
+        Parameters
+        ----------
+        before : datetime | float
+
+        Returns
+        -------
+        int
+            Number of deleted changes.
+        """
+
+        timestamp = _to_timestamp(before)
+        with self._connect() as connection:
+            # Latest change of each line and direction before the time is the status at that time.
+            # Keep it unless it was cleared, and delete all the older ones.
+            cursor = connection.execute(
+                "DELETE FROM history WHERE recorded < ? AND id NOT IN ("
+                "    SELECT id FROM history AS latest WHERE kind != 'cleared' AND recorded < ? AND id = ("
+                "        SELECT id FROM history WHERE line = latest.line AND direction = latest.direction AND recorded < ? ORDER BY recorded DESC, id DESC LIMIT 1"
+                "    )"
+                ")",
+                (timestamp, timestamp, timestamp)
+            )
+            return cursor.rowcount
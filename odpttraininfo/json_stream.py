@@ -0,0 +1,109 @@
+"""Incremental decoding of a JSON array."""
+
+import codecs
+import json
+import zlib
+from typing import Iterable, Iterator
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARACTERS = "0123456789.eE+-"
+
+def gunzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Decompress gzip stream chunk by chunk."""
+
+    decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    data = decompressor.flush()
+    if data:
+        yield data
+
+class _Reader():
+    """Text buffer filled from chunks of UTF-8 bytes on demand."""
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.position = 0
+        self.finished = False
+
+    def fill(self) -> bool:
+        """Drop consumed text and append the next chunk. Return False if input has already ended."""
+
+        if self.finished:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk == None:
+            self.finished = True
+        self.buffer = self.buffer[self.position:] + self._text_decoder.decode(chunk or b"", final=self.finished)
+        self.position = 0
+        return True
+
+    def peek(self) -> str|None:
+        """Skip whitespace and return the next character, or None at the end of input."""
+
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in _WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.fill():
+                return None
+
+    def decode(self) -> object:
+        """Decode a JSON value at the current position."""
+
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                # Value may continue to the next chunk.
+                if self.fill():
+                    continue
+                raise
+            if isinstance(value, (int, float)) and not isinstance(value, bool) \
+                    and not self.buffer[end:].strip(_NUMBER_CHARACTERS) and self.fill():
+                # Number may continue to the next chunk.
+                continue
+            self.position = end
+            return value
+
+def iter_array(chunks: Iterable[bytes]) -> Iterator[object]:
+    """Yield elements of a JSON array encoded in UTF-8, as soon as each element is received.
+
+    Only the current element and the unread part of the current chunk are kept in memory.
+
+    Raises
+    ------
+    ValueError
+        Input is not a JSON array.
+    """
+
+    reader = _Reader(chunks)
+
+    if reader.peek() != "[":
+        raise ValueError("JSON is not an array.")
+    reader.position += 1
+
+    if reader.peek() == "]":
+        reader.position += 1
+    else:
+        while True:
+            if reader.peek() == None:
+                raise ValueError("JSON array is not closed.")
+            yield reader.decode()
+            match reader.peek():
+                case ",":
+                    reader.position += 1
+                case "]":
+                    reader.position += 1
+                    break
+                case _:
+                    raise ValueError("Expected ',' or ']' in JSON array.")
+
+    if reader.peek() != None:
+        raise ValueError("Extra data after JSON array.")
@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+
+_thread_locks: dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+class RefreshLock():
+    """Lock to let only one caller refresh a cache.
+
+    Callers in the same process are serialized by a thread lock,
+    and callers in other processes by ``flock`` on a lock file.
+    Lock file is ignored on platforms without ``fcntl``.
+    """
+
+    lock_path: str
+    """Path of lock file."""
+
+    def __init__(self, lock_path: str) -> None:
+
+        self.lock_path = os.path.abspath(lock_path)
+        with _thread_locks_guard:
+            self._thread_lock = _thread_locks.setdefault(self.lock_path, threading.Lock())
+        self._fd: int|None = None
+
+    def acquire(self, timeout: float) -> bool:
+        """Acquire lock.
+
+        Parameters
+        ----------
+        timeout : float
+            Give up after waiting this seconds.
+
+        Returns
+        -------
+        bool
+            True if acquired, False if timed out.
+        """
+
+        deadline = time.monotonic() + timeout
+
+        if not self._thread_lock.acquire(timeout=max(timeout, 0)):
+            return False
+        if fcntl is None:
+            return True
+
+        try:
+            os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+            try:
+                fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o666)
+            except PermissionError:
+                # Lock file made by other user. flock works on a read-only file as well.
+                fd = os.open(self.lock_path, os.O_RDONLY)
+        except OSError:
+            self._thread_lock.release()
+            raise
+
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self._fd = fd
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    self._thread_lock.release()
+                    return False
+                time.sleep(0.05)
+
+    def release(self) -> None:
+
+        if self._fd != None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Iterator, TypeVar
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+_T = TypeVar("_T")
+
+CounterHook = Callable[[str, float, dict[str,str]], None]
+"""Called with name, value and labels of counter whenever it is incremented."""
+
+SpanHook = Callable[["Span"], None]
+"""Called with span when it starts or ends."""
+
+class Span():
+    """Timed operation like a download or a cache lookup.
+
+    Attributes are added while running, e.g. HTTP status code of a request.
+    """
+
+    __slots__ = ("name", "attributes", "parent", "start", "end", "error")
+
+    name: str
+    """Name of operation like "download"."""
+    attributes: dict[str,object]
+    """Attributes of operation like {"distributor": "ODPT_CENTER"}."""
+    parent: Span|None
+    """Span running when this span started, in the same thread or task."""
+    start: float
+    """Unix time when started."""
+    end: float|None
+    """Unix time when ended. None while running."""
+    error: BaseException|None
+    """Exception raised in span, if any."""
+
+    def __init__(self, name: str, attributes: dict[str,object], parent: Span|None) -> None:
+
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+        self.start = time.time()
+        self.end = None
+        self.error = None
+
+    @property
+    def duration(self) -> float|None:
+        """Seconds from start to end. None while running."""
+
+        if self.end == None:
+            return None
+        return self.end - self.start
+
+_counter_hooks: list[CounterHook] = []
+_span_hooks: list[tuple[SpanHook|None, SpanHook]] = []
+_current_span: contextvars.ContextVar[Span|None] = contextvars.ContextVar("odpttraininfo_span", default=None)
+
+def add_counter_hook(hook: CounterHook) -> Callable[[], None]:
+    """Register hook which is called whenever a counter is incremented.
+
+    Counters are:
+
+    - "cache_lookups" (distributor, tier) : tier is "memory", "backend", "previous", "expired" or "miss".
+    - "stale_serves" (distributor) : Downloading failed and cache up to 140sec old was returned.
+    - "too_old" (distributor) : Downloading failed and cache was too old.
+    - "http_responses" (distributor, status) : status is HTTP status code, or "error" if no response.
+    - "download_retries" (distributor)
+    - "network_seconds" (distributor) : Time waiting for response body.
+    - "parse_seconds" (distributor) : Time decoding response body.
+
+    Hook is called in the thread which incremented the counter. It must be fast and must not raise.
+
+    Parameters
+    ----------
+    hook : CounterHook
+        Called with name, value and labels.
+
+    Returns
+    -------
+    Callable[[], None]
+        Function to unregister hook.
+    """
+
+    _counter_hooks.append(hook)
+    return lambda: _counter_hooks.remove(hook)
+
+def add_span_hook(on_end: SpanHook, on_start: SpanHook|None = None) -> Callable[[], None]:
+    """Register hooks which are called when a span starts and ends.
+
+    Spans are "cache.set", "download", "http.request" (nested in "download") and "decode".
+    Hooks are called in the thread or task running the span,
+    so they can be bridged to a tracer like OpenTelemetry.
+
+    Parameters
+    ----------
+    on_end : SpanHook
+        Called with the span when it ends.
+    on_start : SpanHook | None, optional
+        Called with the span when it starts.
+
+    Returns
+    -------
+    Callable[[], None]
+        Function to unregister hooks.
+    """
+
+    entry = (on_start, on_end)
+    _span_hooks.append(entry)
+    return lambda: _span_hooks.remove(entry)
+
+def count(name: str, labels: dict[str,str], value: float = 1) -> None:
+    """Increment counter and notify hooks."""
+
+    for hook in _counter_hooks:
+        hook(name, value, labels)
+
+@contextmanager
+def span(name: str, attributes: dict[str,object]) -> Iterator[Span]:
+    """Run block as a span and notify hooks."""
+
+    current = Span(name, attributes, _current_span.get())
+    token = _current_span.set(current)
+    hooks = list(_span_hooks)
+    for on_start, _ in hooks:
+        if on_start != None:
+            on_start(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = e
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end = time.time()
+        for _, on_end in hooks:
+            on_end(current)
+
+class Stopwatch():
+    """Total time spent in iterators wrapped by it."""
+
+    seconds: float
+
+    def __init__(self) -> None:
+        self.seconds = 0
+
+    def wrap(self, iterator: Iterator[_T]) -> Iterator[_T]:
+
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.seconds += time.perf_counter() - started
+            yield item
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(labels: tuple[tuple[str,str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join( '%s="%s"' % (key, _escape(value)) for key, value in labels ) + "}"
+
+class PrometheusExporter():
+    """Aggregate counters and spans and render them in Prometheus text format.
+
+    Counters are exported as "<prefix>_<name>_total",
+    and durations of spans as summary "<prefix>_span_seconds" labeled by span name and distributor.
+
+    Parameters
+    ----------
+    prefix : str, optional
+        Prefix of metric names, by default "odpttraininfo"
+    """
+
+    prefix: str
+
+    def __init__(self, prefix: str = "odpttraininfo") -> None:
+
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[tuple[tuple[str,str], ...], float]] = {}
+        self._spans: dict[tuple[tuple[str,str], ...], list[float]] = {}
+        self._removers: list[Callable[[], None]] = []
+
+    def install(self) -> PrometheusExporter:
+        """Start collecting metrics."""
+
+        if not self._removers:
+            self._removers = [add_counter_hook(self._on_count), add_span_hook(self._on_span_end)]
+        return self
+
+    def uninstall(self) -> None:
+        """Stop collecting metrics. Collected values are kept."""
+
+        for remove in self._removers:
+            remove()
+        self._removers = []
+
+    def _on_count(self, name: str, value: float, labels: dict[str,str]) -> None:
+
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def _on_span_end(self, span: Span) -> None:
+
+        labels = [("span", span.name)]
+        distributor = span.attributes.get("distributor")
+        if isinstance(distributor, str):
+            labels.append(("distributor", distributor))
+        key = tuple(labels)
+        with self._lock:
+            summary = self._spans.setdefault(key, [0, 0])
+            summary[0] += 1
+            summary[1] += span.duration or 0
+
+    def render(self) -> str:
+        """Return collected metrics in Prometheus text exposition format."""
+
+        lines: list[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                metric = "%s_%s_total" % (self.prefix, name)
+                lines.append("# TYPE %s counter" % metric)
+                for labels, value in sorted(series.items()):
+                    lines.append("%s%s %r" % (metric, _format_labels(labels), float(value)))
+            if self._spans:
+                metric = "%s_span_seconds" % self.prefix
+                lines.append("# TYPE %s summary" % metric)
+                for labels, (number, total) in sorted(self._spans.items()):
+                    lines.append("%s_count%s %d" % (metric, _format_labels(labels), number))
+                    lines.append("%s_sum%s %r" % (metric, _format_labels(labels), float(total)))
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, host: str = "") -> ThreadingHTTPServer:
+        """Serve metrics over HTTP in a background thread.
+
+        Call shutdown() of the returned server to stop.
+        """
+
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                body = exporter.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
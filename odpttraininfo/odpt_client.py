@@ -1,27 +1,259 @@
-import json
+import asyncio
+import http.client
+import threading
 import time
 import urllib.parse
-import urllib.request
+from contextlib import contextmanager
+from email.message import Message
+from typing import Iterator, NamedTuple, TypedDict
 from urllib.error import HTTPError
 
 
-from .errors import (Forbidden, InvalidConsumerKeyError, InvalidParameterError,
-                     NotFound, OdptServerError, UnknownHTTPError)
-from .odpt_components import (Distributor, TrainInformation,
-                              TrainInformation_jsondict)
+from . import metrics
+from .errors import (CircuitOpenError, Forbidden, InvalidConsumerKeyError,
+                     InvalidParameterError, NotFound, OdptServerError,
+                     TooManyRequests, UnknownHTTPError)
+from .json_stream import gunzip, iter_array
+from .odpt_components import Distributor, TrainInformation
+from .retry import CircuitBreaker, RetryPolicy, parse_retry_after
+from .session import Session, iter_chunks
 
 
+class Validator(TypedDict, total=False):
+    """Validator headers of a response, sent back to make a conditional request."""
+
+    etag: str
+    """Value of ETag header."""
+    last_modified: str
+    """Value of Last-Modified header."""
+
+class DownloadResult(NamedTuple):
+    """Result of :func:`download_if_modified`."""
+
+    info: list[TrainInformation]|None
+    """List of train information, or None if not modified."""
+    validator: Validator
+    """Validator to send with the next request."""
+
+RETRYABLE_ERRORS: tuple[type[Exception], ...] = (OdptServerError, TooManyRequests, CircuitOpenError, OSError, http.client.HTTPException, ValueError)
+"""Exceptions raised when download failed because of server or network rather than the request itself."""
+
+_session: Session|None = None
+_session_lock = threading.Lock()
+
+_retry_policy: RetryPolicy = RetryPolicy()
+_circuit_breaker: CircuitBreaker|None = CircuitBreaker()
+
+def set_http_options(pool_size: int = 4, connect_timeout: float = 10, read_timeout: float = 30) -> None:
+    """Set options of HTTP connections to distributors.
+
+    Parameters
+    ----------
+    pool_size : int, optional
+        Maximum number of idle connections kept alive per host, by default 4
+    connect_timeout : float, optional
+        Timeout seconds to establish a connection, by default 10
+    read_timeout : float, optional
+        Timeout seconds to wait for response data, by default 30
+    """
+
+    global _session
+    new_session = Session(pool_size=pool_size, connect_timeout=connect_timeout, read_timeout=read_timeout)
+    with _session_lock:
+        old_session = _session
+        _session = new_session
+    if old_session != None:
+        old_session.close()
+
+def set_retry_policy(policy: RetryPolicy) -> None:
+    """Set how to retry downloading after a retryable failure.
+
+    Parameters
+    ----------
+    policy : RetryPolicy
+    """
+
+    global _retry_policy
+    _retry_policy = policy
+
+def set_circuit_breaker(breaker: CircuitBreaker|None) -> None:
+    """Set circuit breaker of distributors.
+
+    Parameters
+    ----------
+    breaker : CircuitBreaker | None
+        If None, requests are always sent.
+    """
+
+    global _circuit_breaker
+    _circuit_breaker = breaker
+
+def is_circuit_open(distributor: Distributor) -> bool:
+    """Return whether requests to distributor are refused now by circuit breaker."""
+
+    breaker = _circuit_breaker
+    return breaker != None and breaker.is_open(distributor.name)
+
+def _get_session() -> Session:
+
+    global _session
+    with _session_lock:
+        if _session == None:
+            _session = Session()
+        return _session
+
+def _build_url(distributor: Distributor) -> str:
+
+    query = {}
+    query["acl:consumerKey"] = distributor.consumer_key
+
+    return "%s?%s" % (distributor.URL, urllib.parse.urlencode(query))
+
+def _build_validator(headers: Message, old: Validator) -> Validator:
+
+    validator: Validator = {}
+    etag = headers.get("ETag", old.get("etag"))
+    if etag: validator["etag"] = etag
+    last_modified = headers.get("Last-Modified", old.get("last_modified"))
+    if last_modified: validator["last_modified"] = last_modified
+    return validator
+
+@contextmanager
+def _open(distributor: Distributor, validator: Validator) -> Iterator[tuple[Iterator[TrainInformation]|None, Validator]]:
+    """Send a single request to distributor and yield iterator decoding its body incrementally.
+
+    Iterator is None if the server responded 304 Not Modified to validator.
+    """
+
+    headers = {"Accept-Encoding": "gzip"}
+    if "etag" in validator:
+        headers["If-None-Match"] = validator["etag"]
+    if "last_modified" in validator:
+        headers["If-Modified-Since"] = validator["last_modified"]
+
+    url = _build_url(distributor)
+    labels = {"distributor": distributor.name}
+
+    with metrics.span("http.request", dict(labels)) as span:
+        responded = False
+        try:
+            with _get_session().stream(url, headers=headers) as response:
+                responded = True
+                span.attributes["status"] = response.status
+                metrics.count("http_responses", {**labels, "status": str(response.status)})
+
+                if response.status == 304:
+                    response.read()
+                    yield None, _build_validator(response.headers, validator)
+                    return
+                if not 200 <= response.status < 300:
+                    response.read()
+                    raise HTTPError(url, response.status, response.reason, response.headers, None)
+
+                # Decoding pulls chunks from network, so time waiting for them is subtracted.
+                network = metrics.Stopwatch()
+                decoding = metrics.Stopwatch()
+                chunks = network.wrap(iter_chunks(response))
+                if response.headers.get("Content-Encoding", "").lower() == "gzip":
+                    chunks = gunzip(chunks)
+                try:
+                    yield decoding.wrap(_decode_stream(chunks)), _build_validator(response.headers, {})
+                finally:
+                    span.attributes["network_seconds"] = network.seconds
+                    span.attributes["parse_seconds"] = decoding.seconds - network.seconds
+                    metrics.count("network_seconds", labels, network.seconds)
+                    metrics.count("parse_seconds", labels, decoding.seconds - network.seconds)
+        except Exception:
+            if not responded:
+                metrics.count("http_responses", {**labels, "status": "error"})
+            raise
+
+def _decode_stream(chunks: Iterator[bytes]) -> Iterator[TrainInformation]:
+
+    for single in iter_array(chunks):
+        if not isinstance(single, dict):
+            raise ValueError("Array has invalid type object.")
+        yield TrainInformation(single)
+
+def _request(distributor: Distributor, validator: Validator) -> tuple[list[TrainInformation]|None, Validator]:
+    """Send a single request to distributor and decode its body.
+
+    Body is None if the server responded 304 Not Modified to validator.
+    """
+
+    with _open(distributor, validator) as (info, validator):
+        if info == None:
+            return None, validator
+        return list(info), validator
+
+def iter_info(distributor: Distributor) -> Iterator[TrainInformation]:
+    """Download train information from distributor and yield it one by one while receiving.
+
+    Neither the whole response nor the whole list is kept in memory.
+    Unlike :func:`download`, it doesn't retry and doesn't touch cache.
+
+    Parameters
+    ----------
+    distributor : Distributor
+        Distributor of infomation source.
+
+    Yields
+    ------
+    TrainInformation
+        Train information. Nothing is yielded if consumerKey is unset.
+
+    Raises
+    ------
+    Same as :func:`download`.
+    """
+
+    if not distributor.is_valid():
+        return
+
+    try:
+        with _open(distributor, {}) as (info, _):
+            if info != None:
+                yield from info
+    except HTTPError as e:
+        _raise_for_http_error(e, distributor, True)
+        raise
+
+def _raise_for_http_error(e: HTTPError, distributor: Distributor, is_last_try: bool) -> None:
+    """Raise the exception corresponding to e.
+
+    Return without raising only if the error is retryable (status code 429 or 500-599) and retries are left.
+    """
+
+    match e.code:
+        case 400:
+            raise InvalidParameterError(e)
+        case 401:
+            raise InvalidConsumerKeyError(e)
+        case 403:
+            raise Forbidden(e)
+        case 404:
+            raise NotFound(e, distributor.value)
+        case 429:
+            if is_last_try:
+                raise TooManyRequests(e)
+        case code if 500 <= code < 600:
+            if is_last_try:
+                raise OdptServerError(e)
+        case _:
+            raise UnknownHTTPError(e)
+
 def download(distributor: Distributor, max_try:int = 4) -> list[TrainInformation]|None:
     """Download train information from distributor.
 
-    If response status code was 500-599, this function retries up to max_try times.
+    If download failed by network error or response status code was 429 or 500-599,
+    this function retries up to max_try times, waiting as set by :func:`~odpttraininfo.config.set_retry_policy`.
 
     Parameters
     ----------
     distributor : Distributor
         Distributor of infomation source.
     max_try : int, optional
-        If response status code was 500-599, it retries up to this value.(default = 4)
+        If download failed retryably, it retries up to this value.(default = 4)
 
     Returns
     -------
@@ -38,48 +270,128 @@ def download(distributor: Distributor, max_try:int = 4) -> list[TrainInformation
         HTTP status code was 403.
     NotFound
         HTTP status code was 404.
+    TooManyRequests
+        HTTP status code was 429.
     OdptServerError
         HTTP status code was 500-599.
     UnknownHTTPError
         HTTP status code was unexpected.
+    CircuitOpenError
+        Circuit breaker of distributor is open.
+    """
+
+    result = download_if_modified(distributor=distributor, validator={}, max_try=max_try)
+    if result == None:
+        return None
+    return result.info
+
+def download_if_modified(distributor: Distributor, validator: Validator, max_try:int = 4) -> DownloadResult|None:
+    """Download train information from distributor unless it is not modified since validator was returned.
+
+    Parameters
+    ----------
+    distributor : Distributor
+        Distributor of infomation source.
+    validator : Validator
+        Validator returned with the last download. If empty, information is always downloaded.
+    max_try : int, optional
+        If download failed retryably, it retries up to this value.(default = 4)
+
+    Returns
+    -------
+    DownloadResult|None
+        Downloaded information and its validator, or None if consumerKey is unset.
+
+    Raises
+    ------
+    Same as :func:`download`.
     """
 
     if not distributor.is_valid():
         return None
 
-    query = {}
-    query["acl:consumerKey"] = distributor.consumer_key
+    info:list[TrainInformation]|None = []
+    labels = {"distributor": distributor.name}
 
-    json_dict:list[TrainInformation_jsondict] = []
+    breaker = _circuit_breaker
+    started = time.monotonic()
 
-    for try_count in range(max_try):
-        try:
-            with urllib.request.urlopen("%s?%s" % (distributor.URL, urllib.parse.urlencode(query))) as f:
-                json_dict = json.load(f)
-            break
-        except HTTPError as e:
-            match e.code:
-                case 400:
-                    raise InvalidParameterError(e)
-                case 401:
-                    raise InvalidConsumerKeyError(e)
-                case 403:
-                    raise Forbidden(e)
-                case 404:
-                    raise NotFound(e, distributor.value)
-                case code if 500 <= code < 600:
-                    if try_count == max_try-1:
-                        raise OdptServerError(e)
-                    else:
-                        time.sleep(1+try_count)
-                        continue
-                case _:
-                    raise UnknownHTTPError(e)
-        except Exception as e:
-            if try_count == max_try-1:
-                raise
+    with metrics.span("download", dict(labels)):
+        for try_count in range(max_try):
+            if breaker != None:
+                breaker.before_request(distributor.name)
+            try:
+                info, validator = _request(distributor, validator)
+            except Exception as e:
+                delay = _retry_delay(e, distributor, breaker, try_count, max_try, started)
+            else:
+                if breaker != None:
+                    breaker.record_success(distributor.name)
+                break
+            metrics.count("download_retries", labels)
+            time.sleep(delay)
+
+    return DownloadResult(info, validator)
+
+def _retry_delay(e: Exception, distributor: Distributor, breaker: CircuitBreaker|None, try_count: int, max_try: int, started: float) -> float:
+    """Return seconds to wait before retrying after e, or raise the exception corresponding to e if giving up."""
+
+    retry_after = None
+    if isinstance(e, HTTPError):
+        if e.code != 429 and not 500 <= e.code < 600:
+            # Server is working, though request is wrong.
+            if breaker != None:
+                breaker.record_success(distributor.name)
+            _raise_for_http_error(e, distributor, True)
+        retry_after = parse_retry_after(e.headers)
+
+    opened = breaker != None and breaker.record_failure(distributor.name, retry_after)
+    delay = None
+    if not opened and try_count < max_try-1:
+        delay = _retry_policy.delay(try_count+1, retry_after)
+    if delay == None or not _retry_policy.allows(time.monotonic() - started, delay):
+        if isinstance(e, HTTPError):
+            _raise_for_http_error(e, distributor, True)
+        raise e
+    return delay
+
+async def async_download(distributor: Distributor, max_try:int = 4) -> list[TrainInformation]|None:
+    """Asynchronous version of :func:`download`.
+
+    The request runs in a worker thread and waiting between retries doesn't block the event loop.
+    Parameters, return value and exceptions are the same as :func:`download`.
+    """
+
+    result = await async_download_if_modified(distributor=distributor, validator={}, max_try=max_try)
+    if result == None:
+        return None
+    return result.info
+
+async def async_download_if_modified(distributor: Distributor, validator: Validator, max_try:int = 4) -> DownloadResult|None:
+    """Asynchronous version of :func:`download_if_modified`."""
+
+    if not distributor.is_valid():
+        return None
+
+    info:list[TrainInformation]|None = []
+    labels = {"distributor": distributor.name}
+
+    breaker = _circuit_breaker
+    started = time.monotonic()
+
+    with metrics.span("download", dict(labels)):
+        for try_count in range(max_try):
+            if breaker != None:
+                breaker.before_request(distributor.name)
+            try:
+                info, validator = await asyncio.to_thread(_request, distributor, validator)
+            except Exception as e:
+                delay = _retry_delay(e, distributor, breaker, try_count, max_try, started)
             else:
-                time.sleep(1+try_count)
-                continue
+                if breaker != None:
+                    breaker.record_success(distributor.name)
+                break
+            metrics.count("download_retries", labels)
+            await asyncio.sleep(delay)
 
-    return TrainInformation.from_list(json_dict)
+    return DownloadResult(info, validator)
@@ -1,12 +1,20 @@
 from __future__ import annotations
 
 import json
+import sys
 from datetime import datetime
-from enum import Enum
+from operator import attrgetter
 import os
-from typing import Optional, TypedDict
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional, TypedDict
 from uuid import UUID
 
+from . import metrics
+
+try:
+    import orjson # type: ignore
+except ImportError:
+    orjson = None
+
 output_with_none: bool = False
 
 _MultiLanguageDictRequired = TypedDict("_MultiLanguageDictRequired", {
@@ -24,41 +32,54 @@ _MultiLanguageDictOptional = TypedDict("_MultiLanguageDictOptional", {
 class MultiLanguageDict(_MultiLanguageDictRequired,_MultiLanguageDictOptional):
     pass
 
+def _intern(value: str|None) -> str|None:
+    """Intern value, since the same texts and IDs repeat across records and snapshots."""
+
+    if value == None:
+        return None
+    return sys.intern(value)
+
 class MultiLanguageString():
 
+    __slots__ = ("ja", "en", "ko", "zh_hans", "zh_hant", "ja_hrkt")
+
     ja: str
     """Japanese"""
-    en: Optional[str] = None
+    en: Optional[str]
     """English"""
-    ko: Optional[str] = None
+    ko: Optional[str]
     """Korean"""
-    zh_hans: Optional[str] = None
+    zh_hans: Optional[str]
     """Simplified Chinese"""
-    zh_hant: Optional[str] = None
+    zh_hant: Optional[str]
     """Traditional Chinese"""
-    ja_hrkt: Optional[str] = None
+    ja_hrkt: Optional[str]
     """Japanese Hiragana/Katakana (no kanji)"""
 
     def __init__(self, dic:dict[str,str]|None = None) -> None:
         if not dic:
-            self.ja = ""
-            return
-        if "ja" in dic:
-            self.ja = dic["ja"]
-        else:
-            self.ja = ""
-        if "en" in dic: self.en = dic["en"]
-        if "ko" in dic: self.ko = dic["ko"]
-        if "zh-Hans" in dic: self.zh_hans = dic["zh-Hans"]
-        if "zh-Hant" in dic: self.zh_hant = dic["zh-Hant"]
-        if "ja-Hrkt" in dic: self.ja_hrkt = dic["ja-Hrkt"]
+            dic = {}
+        self.ja = sys.intern(dic.get("ja") or "")
+        self.en = _intern(dic.get("en"))
+        self.ko = _intern(dic.get("ko"))
+        self.zh_hans = _intern(dic.get("zh-Hans"))
+        self.zh_hant = _intern(dic.get("zh-Hant"))
+        self.ja_hrkt = _intern(dic.get("ja-Hrkt"))
 
     def __eq__(self, __o: object) -> bool:
         if isinstance(__o, type(self)):
-            return self.to_dict() == __o.to_dict()
+            return self.key() == __o.key()
         if __o is None:
             return False
-        raise NotImplementedError
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+    def key(self) -> tuple[str|None, ...]:
+        """Return hashable key, which is equal if and only if :meth:`to_dict` is equal."""
+
+        return (self.ja, self.en or None, self.ko or None, self.zh_hans or None, self.zh_hant or None, self.ja_hrkt or None)
 
     def to_dict(self) -> MultiLanguageDict:
         result:MultiLanguageDict = {
@@ -131,6 +152,74 @@ _TrainInfo_key2attribute:dict[str,str] = {
     _TrainInfo_attribute2key[key]:key for key in _TrainInfo_attribute2key
 }
 
+multilanguage_str_keys = [
+    "odpt:trainInformationStatus",
+    "odpt:trainInformationText",
+    "odpt:trainInformationArea",
+    "odpt:trainInformationKind",
+    "odpt:trainInformationRange",
+    "odpt:trainInformationCause",
+]
+
+datetime_keys = [
+    "dc:date",
+    "dct:valid",
+    "odpt:timeOfOrigin",
+    "odpt:resumeEstimate",
+]
+
+def _invalid_type() -> ValueError:
+    return ValueError("Dictionary has invalid type object.")
+
+def _decode_str(value: object) -> str:
+    if not isinstance(value, str):
+        raise _invalid_type()
+    return sys.intern(value)
+
+def _decode_datetime(value: object) -> datetime|str:
+    if not isinstance(value, str):
+        raise _invalid_type()
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        # Keep malformed date as it is.
+        return sys.intern(value)
+
+def _decode_id(value: object) -> UUID|str:
+    if not isinstance(value, str):
+        raise _invalid_type()
+    try:
+        return UUID(value)
+    except ValueError:
+        # Not a UUID URN.
+        return value
+
+def _decode_multi_language(value: object) -> MultiLanguageString:
+    if not isinstance(value, dict):
+        raise _invalid_type()
+    return MultiLanguageString(value)
+
+def _decode_str_list(value: object) -> list[str]:
+    if not isinstance(value, list):
+        raise _invalid_type()
+    return [ _decode_str(single) for single in value ]
+
+_TrainInfo_decoder:dict[str,tuple[str,Callable[[object],object]]] = {}
+"""Attribute name and decoder of each key."""
+
+for _key, _attribute in _TrainInfo_key2attribute.items():
+    if _key in datetime_keys:
+        _TrainInfo_decoder[_key] = (_attribute, _decode_datetime)
+    elif _key in multilanguage_str_keys:
+        _TrainInfo_decoder[_key] = (_attribute, _decode_multi_language)
+    elif _key == "@id":
+        _TrainInfo_decoder[_key] = (_attribute, _decode_id)
+    elif _key == "odpt:transferRailways":
+        _TrainInfo_decoder[_key] = (_attribute, _decode_str_list)
+    else:
+        _TrainInfo_decoder[_key] = (_attribute, _decode_str)
+del _key, _attribute
+
 def to_json_default(o: object):
     if isinstance(o, MultiLanguageString):
         return o.to_dict()
@@ -142,78 +231,133 @@ def to_json_default(o: object):
         return o.urn
     raise TypeError( repr(o) + " is not serializable." )
 
+if orjson != None:
+    _dumps: Callable[[object], bytes] = orjson.dumps
+else:
+    _json_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    def _dumps(value: object) -> bytes:
+        return _json_encoder.encode(value).encode('utf-8')
+
+def _encode_value(value: object) -> bytes:
+    if type(value) is MultiLanguageString:
+        return _dumps(value.to_dict())
+    if type(value) is datetime:
+        return b'"' + value.isoformat().encode('ascii') + b'"'
+    if type(value) is UUID:
+        return b'"' + value.urn.encode('ascii') + b'"'
+    return _dumps(value)
+
+_TrainInfo_json_layout:tuple[tuple[str, bytes], ...] = tuple(
+    (attribute, _dumps(key) + b":") for attribute, key in _TrainInfo_attribute2key.items()
+)
+"""Attribute name and encoded key followed by colon of each field, in output order."""
+
+def dump_json(info: Iterable[TrainInformation]) -> bytes:
+    """Encode list of train information to compact JSON in UTF-8.
+
+    Encoded bytes of each record are cached in it (see :meth:`TrainInformation.to_json_bytes`),
+    so encoding the same records again is almost a concatenation.
+    orjson is used if installed.
+
+    Parameters
+    ----------
+    info : Iterable[TrainInformation]
+
+    Returns
+    -------
+    bytes
+    """
+
+    return b"[" + b",".join([ single.to_json_bytes() for single in info ]) + b"]"
+
 class TrainInformation_jsondict(_TrainInfo_json_required, _TrainInfo_json_optional):
     pass
 
+_TrainInfo_content_attributes:tuple[str, ...] = tuple(
+    attribute for attribute in _TrainInfo_attribute2key if attribute not in ["id","date","valid","time_of_origin"]
+)
+
+_TrainInfo_content_getter = attrgetter(*_TrainInfo_content_attributes)
+
+class TrainInformationChanges(NamedTuple):
+    """Result of :meth:`TrainInformation.list_changes`."""
+
+    added: list[TrainInformation]
+    """Information only in the new list."""
+    removed: list[TrainInformation]
+    """Information only in the old list."""
+    changed: list[tuple[TrainInformation, TrainInformation]]
+    """Pairs of old and new information about the same line whose content differs."""
+
 class TrainInformation():
 
+    __slots__ = tuple(_TrainInfo_attribute2key) + ("_json",)
+
     # Common
     context: str
     id: UUID|str
     type: str
     date: datetime
-    valid: Optional[datetime] = None
+    valid: Optional[datetime]
     operator: str
-    time_of_origin: Optional[datetime] = None # Required in both distributor, but sometimes missing.
-    railway: Optional[str] = None
-    train_information_status: Optional[MultiLanguageString] = None
+    time_of_origin: Optional[datetime] # Required in both distributor, but sometimes missing.
+    railway: Optional[str]
+    train_information_status: Optional[MultiLanguageString]
     train_information_text: MultiLanguageString
 
     # Only ODPT-center
-    same_as: Optional[str] = None
-    rail_direction: Optional[str] = None
-    train_information_area: Optional[MultiLanguageString] = None
-    train_information_kind: Optional[MultiLanguageString] = None
-    station_from: Optional[str] = None
-    station_to: Optional[str] = None
-    train_information_range: Optional[MultiLanguageString] = None
-    train_information_cause: Optional[MultiLanguageString] = None
-    transfer_railways: Optional[list[str]] = None
-    resume_estimate: Optional[datetime] = None
+    same_as: Optional[str]
+    rail_direction: Optional[str]
+    train_information_area: Optional[MultiLanguageString]
+    train_information_kind: Optional[MultiLanguageString]
+    station_from: Optional[str]
+    station_to: Optional[str]
+    train_information_range: Optional[MultiLanguageString]
+    train_information_cause: Optional[MultiLanguageString]
+    transfer_railways: Optional[list[str]]
+    resume_estimate: Optional[datetime]
+
+    _json: tuple[bool, bytes]|None
+    """Value of output_with_none and JSON encoded with it."""
 
     def __init__(self, dic:TrainInformation_jsondict|dict[str,object]) -> None:
 
-        for key in dic:
-            if key in _TrainInfo_key2attribute:
-                attribute = _TrainInfo_key2attribute[key]
-                match dic[key]:
-                    case str(value):
-                        try:
-                            date_time = datetime.fromisoformat(value)
-                            self.__setattr__(attribute,date_time)
-                            continue
-                        except ValueError:
-                            pass
-                        try:
-                            # @id
-                            uuid = UUID(value)
-                            self.__setattr__(attribute,uuid)
-                            continue
-                        except ValueError:
-                            pass
-                        self.__setattr__(attribute,value)
-                    case list(value):
-                        # odpt:transferRailways
-                        self.__setattr__(attribute,value)
-                    case dict(value):
-                        multi_lang = MultiLanguageString(value)
-                        self.__setattr__(attribute,multi_lang)
-                    case None:
-                        self.__setattr__(attribute,None)
-                    case _:
-                        ValueError("Dictionary has invalid type object.")
-            else:
+        for attribute in self.__slots__:
+            self.__setattr__(attribute,None)
+
+        for key, value in dic.items():
+            decoder = _TrainInfo_decoder.get(key)
+            if decoder == None:
                 raise RuntimeWarning("Dictionary has unknown key '%s'." % key)
+            attribute, decode = decoder
+            self.__setattr__(attribute, None if value is None else decode(value))
 
     def __eq__(self, __o: object) -> bool:
         if isinstance(__o, type(self)):
-            for attribute in _TrainInfo_attribute2key.keys():
-                if attribute in ["id","date","valid","time_of_origin"]:
-                    continue
-                if self.__getattribute__(attribute) != __o.__getattribute__(attribute):
-                    return False
-            return True
-        raise NotImplementedError
+            return self.content_key() == __o.content_key()
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.content_key())
+
+    def content_key(self) -> tuple[object, ...]:
+        """Return hashable key of the content.
+
+        ID and timestamps are ignored, as well as :meth:`__eq__`.
+        """
+
+        return tuple(
+            value.key() if type(value) is MultiLanguageString else tuple(value) if type(value) is list else value
+            for value in _TrainInfo_content_getter(self)
+        )
+
+    def identity_key(self) -> tuple[str|None, str|None, str|None, str|None]:
+        """Return key identifying which line (or company) and direction the information is about.
+
+        Information about the same line in consecutive snapshots has the same identity key.
+        """
+
+        return (self.same_as, self.railway, self.operator, self.rail_direction)
 
     @classmethod
     def from_jsonlist(cls, string:str) -> list[TrainInformation]:
@@ -224,16 +368,62 @@ class TrainInformation():
     @classmethod
     def from_list(cls, list_: list[dict[str,object]]|list[TrainInformation_jsondict]) -> list[TrainInformation]:
 
-        return [TrainInformation(single) for single in list_]
+        with metrics.span("decode", {"records": len(list_)}):
+            return [TrainInformation(single) for single in list_]
 
     @classmethod
     def list_diff(cls, new: list[TrainInformation], old: list[TrainInformation]) -> tuple[list[TrainInformation], list[TrainInformation]]:
 
-        added = [info_new for info_new in new if info_new not in old]
-        removed = [info_old for info_old in old if info_old not in new]
+        new_keys = [ info_new.content_key() for info_new in new ]
+        old_keys = [ info_old.content_key() for info_old in old ]
+        new_set = set(new_keys)
+        old_set = set(old_keys)
+
+        added = [ info_new for info_new, key in zip(new, new_keys) if key not in old_set ]
+        removed = [ info_old for info_old, key in zip(old, old_keys) if key not in new_set ]
 
         return added, removed
 
+    @classmethod
+    def list_changes(cls, new: list[TrainInformation], old: list[TrainInformation]) -> TrainInformationChanges:
+        """Compare two lists in linear time.
+
+        Information whose content is equal in both lists is unchanged.
+        Among the rest, information with the same :meth:`identity_key` in both lists is changed,
+        and the others are added or removed.
+
+        Parameters
+        ----------
+        new : list[TrainInformation]
+        old : list[TrainInformation]
+
+        Returns
+        -------
+        TrainInformationChanges
+        """
+
+        added, removed = cls.list_diff(new, old)
+
+        removed_by_identity: dict[tuple[str|None, ...], list[TrainInformation]] = {}
+        for info_old in removed:
+            removed_by_identity.setdefault(info_old.identity_key(), []).append(info_old)
+
+        changes = TrainInformationChanges([], [], [])
+        changed_old: set[int] = set()
+
+        for info_new in added:
+            candidates = removed_by_identity.get(info_new.identity_key())
+            if candidates:
+                info_old = candidates.pop(0)
+                changed_old.add(id(info_old))
+                changes.changed.append((info_old, info_new))
+            else:
+                changes.added.append(info_new)
+
+        changes.removed.extend( info_old for info_old in removed if id(info_old) not in changed_old )
+
+        return changes
+
     def to_dict(self) -> dict[str,object]:
 
         result:dict[str,object] = {}
@@ -254,6 +444,29 @@ class TrainInformation():
         dic = self.to_dict()
         return json.dumps(dic, default=to_json_default, indent=indent)
 
+    def to_json_bytes(self) -> bytes:
+        """Return compact JSON encoded in UTF-8.
+
+        Result is cached in the instance, assuming it is not modified after that.
+        """
+
+        cached = self._json
+        if cached != None and cached[0] == output_with_none:
+            return cached[1]
+
+        parts: list[bytes] = []
+        for attribute, prefix in _TrainInfo_json_layout:
+            value = getattr(self, attribute)
+            if value is None:
+                if output_with_none:
+                    parts.append(prefix + b"null")
+            else:
+                parts.append(prefix + _encode_value(value))
+
+        encoded = b"{" + b",".join(parts) + b"}"
+        self._json = (output_with_none, encoded)
+        return encoded
+
     def get_company(self) -> str:
         """Return ID of company.
 
@@ -288,37 +501,145 @@ class TrainInformation():
             return self.operator.replace("odpt.Operator:","")
         raise ValueError("Can't find Line or Company.")
 
-multilanguage_str_keys = [
-    "odpt:trainInformationStatus",
-    "odpt:trainInformationText",
-    "odpt:trainInformationArea",
-    "odpt:trainInformationKind",
-    "odpt:trainInformationRange",
-    "odpt:trainInformationCause",
-]
 
+_dotenv_loaded = False
+
+def _load_dotenv() -> None:
+    """Load .env once, if python-dotenv is installed."""
+
+    global _dotenv_loaded
+    if _dotenv_loaded:
+        return
+    _dotenv_loaded = True
+    try:
+        from dotenv import load_dotenv # type: ignore
+        load_dotenv()
+    except ImportError:
+        pass
+
+class _DistributorRegistry(type):
+    """Metaclass letting :class:`Distributor` be iterated and indexed like an enum."""
+
+    _registry: dict[str, Distributor]
+
+    def __iter__(cls) -> Iterator[Distributor]:
+        return iter(list(cls._registry.values()))
+
+    def __len__(cls) -> int:
+        return len(cls._registry)
+
+    def __getitem__(cls, name: str) -> Distributor:
+        return cls._registry[name]
+
+    def __contains__(cls, distributor: object) -> bool:
+        return isinstance(distributor, Distributor) and cls._registry.get(distributor.name) is distributor
 
-class Distributor(Enum):
-    """Enumerates of API distributor.
+class Distributor(metaclass=_DistributorRegistry):
+    """API distributor.
+
+    Registered distributors are iterated in order of registration, like an enum,
+    and information from them is concatenated in that order.
+    ``Distributor.ODPT_CENTER`` is registered by default.
 
     Parameters
     ----------
-    Enum : str
-        Value is an endpoint URL.
+    name : str
+        Name identifying distributor, used as a cache key.
+        Consumer key is read from environment variable "<name>_TOKEN" unless given.
+    URL : str
+        Endpoint URL.
+    consumer_key : str | None, optional
+        consumerKey of API.
+    expire_second : float, optional
+        Cache younger than this is used without downloading, by default 80
+    stale_second : float, optional
+        Cache younger than this is used if failed to download, by default 140
     """
 
-    ODPT_CENTER = ("https://api.odpt.org/api/v4/odpt:TrainInformation")
+    _registry: dict[str, Distributor] = {}
+
+    ODPT_CENTER: Distributor
 
-    def __init__(self, URL:str) -> None:
+    name: str
+    URL: str
+    expire_second: float
+    stale_second: float
 
-        try:
-            from dotenv import load_dotenv # type: ignore
-            load_dotenv()
-        except ImportError:
-            pass
+    def __init__(self, name: str, URL: str, consumer_key: str|None = None, expire_second: float = 80, stale_second: float = 140) -> None:
 
+        if expire_second > stale_second:
+            raise ValueError("expire_second must not be greater than stale_second.")
+
+        self.name = name
         self.URL = URL
-        self.consumer_key: str|None = os.getenv(self.name+"_TOKEN", None)
+        self._consumer_key = consumer_key
+        # Environment variable is read on first access, so that .env is not searched on import.
+        self._consumer_key_loaded = consumer_key != None
+        self.expire_second = expire_second
+        self.stale_second = stale_second
+
+    @property
+    def consumer_key(self) -> str|None:
+        """consumerKey of API."""
+
+        if not self._consumer_key_loaded:
+            _load_dotenv()
+            self._consumer_key = os.getenv(self.name+"_TOKEN", None)
+            self._consumer_key_loaded = True
+        return self._consumer_key
+
+    @consumer_key.setter
+    def consumer_key(self, key: str|None) -> None:
+        self._consumer_key = key
+        self._consumer_key_loaded = True
+
+    def __repr__(self) -> str:
+        return "<Distributor.%s: %r>" % (self.name, self.URL)
+
+    @property
+    def value(self) -> str:
+        """Endpoint URL."""
+
+        return self.URL
+
+    @classmethod
+    def register(cls, name: str, URL: str, consumer_key: str|None = None, expire_second: float = 80, stale_second: float = 140) -> Distributor:
+        """Register distributor to fetch information from.
+
+        Parameters are the same as :class:`Distributor`.
+
+        Returns
+        -------
+        Distributor
+            Registered distributor. Also available as ``Distributor[name]``.
+
+        Raises
+        ------
+        ValueError
+            Distributor of the same name is already registered.
+        """
+
+        distributor = cls(name, URL, consumer_key=consumer_key, expire_second=expire_second, stale_second=stale_second)
+        registry = dict(cls._registry)
+        if registry.setdefault(name, distributor) is not distributor:
+            raise ValueError("Distributor '%s' is already registered." % name)
+        # Replace instead of updating, so that iterating threads are not affected.
+        cls._registry = registry
+        return distributor
+
+    @classmethod
+    def unregister(cls, name: str) -> None:
+        """Stop fetching information from distributor.
+
+        Raises
+        ------
+        KeyError
+            Distributor is not registered.
+        """
+
+        registry = dict(cls._registry)
+        del registry[name]
+        cls._registry = registry
 
     def set_consumer_key(self, key: str) -> None:
         """Set consumerKey
@@ -342,3 +663,5 @@ class Distributor(Enum):
             return False
         else:
             return True
+
+Distributor.ODPT_CENTER = Distributor.register("ODPT_CENTER", "https://api.odpt.org/api/v4/odpt:TrainInformation")
@@ -0,0 +1,48 @@
+import logging
+import threading
+from typing import Callable
+
+_logger = logging.getLogger(__name__)
+
+class Refresher():
+    """Daemon thread which calls refresh function periodically.
+
+    If refresh function returns seconds, the next refresh waits for it instead of interval.
+    """
+
+    interval: float
+    """Seconds between the end of a refresh and the start of the next one."""
+
+    def __init__(self, refresh: Callable[[], float|None], interval: float) -> None:
+
+        if interval <= 0:
+            raise ValueError("Interval must be positive.")
+
+        self.interval = interval
+        self._refresh = refresh
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="odpttraininfo-refresher", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: float|None = None) -> None:
+        """Stop refreshing and wait for the running refresh to finish up to timeout seconds."""
+
+        self._stop_event.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        return self._thread.is_alive() and not self._stop_event.is_set()
+
+    def _run(self) -> None:
+
+        while not self._stop_event.is_set():
+            wait = None
+            try:
+                wait = self._refresh()
+            except Exception:
+                # Keep refreshing. Callers fall back to downloading by themselves if cache gets too old.
+                _logger.exception("Failed to refresh cache.")
+            self._stop_event.wait(self.interval if wait == None else wait)
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.message import Message
+from email.utils import parsedate_to_datetime
+from typing import Literal
+
+from . import metrics
+from .errors import CircuitOpenError
+
+
+class RetryPolicy():
+    """How to retry downloading after a retryable failure.
+
+    Failures are network errors, invalid responses, and HTTP status codes 429 and 500-599.
+    The n-th retry waits base_delay * multiplier ** (n-1) seconds up to max_delay,
+    shortened randomly by up to jitter of it so that clients don't retry all at once.
+    If the server sends Retry-After, the retry waits at least that long.
+
+    Parameters
+    ----------
+    base_delay : float, optional
+        Seconds to wait before the first retry, by default 1
+    multiplier : float, optional
+        Factor by which the delay grows on each retry, by default 2
+    max_delay : float, optional
+        Maximum seconds to wait before a retry, by default 8
+    jitter : float, optional
+        Fraction of delay which is randomized, from 0 (no jitter) to 1 (full jitter), by default 0.5
+    deadline : float | None, optional
+        Give up instead of retrying if the download would take more than this seconds in total.
+        If None (default), retries are limited only by max_try.
+    max_retry_after : float, optional
+        Give up instead of retrying if Retry-After is longer than this seconds, by default 60
+    """
+
+    base_delay: float
+    multiplier: float
+    max_delay: float
+    jitter: float
+    deadline: float|None
+    max_retry_after: float
+
+    def __init__(self, base_delay: float = 1, multiplier: float = 2, max_delay: float = 8, jitter: float = 0.5, deadline: float|None = None, max_retry_after: float = 60) -> None:
+
+        if base_delay < 0 or max_delay < 0 or max_retry_after < 0:
+            raise ValueError("Delay must not be negative.")
+        if multiplier < 1:
+            raise ValueError("Multiplier must be 1 or more.")
+        if not 0 <= jitter <= 1:
+            raise ValueError("Jitter must be between 0 and 1.")
+        if deadline != None and deadline <= 0:
+            raise ValueError("Deadline must be positive.")
+
+        self.base_delay = base_delay
+        self.multiplier = multiplier
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.deadline = deadline
+        self.max_retry_after = max_retry_after
+
+    def delay(self, retry_count: int, retry_after: float|None = None) -> float|None:
+        """Return seconds to wait before the retry_count-th retry, or None to give up.
+
+        Parameters
+        ----------
+        retry_count : int
+            1 for the first retry.
+        retry_after : float | None, optional
+            Seconds of Retry-After header of the failed response, if any.
+        """
+
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (retry_count - 1))
+        delay -= delay * self.jitter * random.random()
+        if retry_after != None:
+            if retry_after > self.max_retry_after:
+                return None
+            delay = max(delay, retry_after)
+        return delay
+
+    def allows(self, elapsed: float, delay: float) -> bool:
+        """Return whether retrying after delay is within deadline, when elapsed seconds have passed since the first try."""
+
+        return self.deadline == None or elapsed + delay <= self.deadline
+
+def parse_retry_after(headers: Message|None) -> float|None:
+    """Return seconds of Retry-After header, which is either seconds or HTTP-date, or None if absent or invalid."""
+
+    if headers == None:
+        return None
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo == None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+class _Circuit():
+    """State of circuit of a distributor."""
+
+    __slots__ = ("failures", "opened_until")
+
+    def __init__(self) -> None:
+        self.failures = 0
+        self.opened_until: float|None = None
+
+class CircuitBreaker():
+    """Per-distributor circuit breaker, which stops requests to a distributor failing repeatedly.
+
+    After failure_threshold consecutive failed tries, the circuit of the distributor opens
+    and requests fail with :class:`~odpttraininfo.errors.CircuitOpenError` immediately,
+    for which :func:`~odpttraininfo.fetch_info` returns stale cache.
+    After reset_timeout seconds (or Retry-After, if longer), one request is let through as a probe,
+    and others are refused for another reset_timeout seconds.
+    If the probe succeeds, the circuit closes, otherwise it opens again.
+
+    Parameters
+    ----------
+    failure_threshold : int, optional
+        Number of consecutive failures to open circuit, by default 3
+    reset_timeout : float, optional
+        Seconds until a probe is let through, by default 30
+    """
+
+    failure_threshold: int
+    reset_timeout: float
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30) -> None:
+
+        if failure_threshold < 1:
+            raise ValueError("Failure threshold must be 1 or more.")
+        if reset_timeout < 0:
+            raise ValueError("Reset timeout must not be negative.")
+
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._circuits: dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, name: str) -> _Circuit:
+
+        circuit = self._circuits.get(name)
+        if circuit == None:
+            circuit = self._circuits[name] = _Circuit()
+        return circuit
+
+    def state(self, name: str) -> Literal["closed", "open", "half_open"]:
+        """Return state of circuit of distributor name.
+
+        "half_open" means that the next request is let through as a probe.
+        """
+
+        with self._lock:
+            circuit = self._circuit(name)
+            if circuit.opened_until == None:
+                return "closed"
+            if circuit.opened_until <= time.monotonic():
+                return "half_open"
+            return "open"
+
+    def is_open(self, name: str) -> bool:
+        """Return whether request to distributor name would be refused now."""
+
+        with self._lock:
+            circuit = self._circuit(name)
+            return circuit.opened_until != None and circuit.opened_until > time.monotonic()
+
+    def before_request(self, name: str) -> None:
+        """Check that request to distributor name is allowed.
+
+        Raises
+        ------
+        CircuitOpenError
+            Circuit is open.
+        """
+
+        with self._lock:
+            circuit = self._circuit(name)
+            if circuit.opened_until == None:
+                return
+            now = time.monotonic()
+            if circuit.opened_until > now:
+                raise CircuitOpenError(name, circuit.opened_until - now)
+            # Let this request probe, and refuse others until it finishes or times out.
+            circuit.opened_until = now + self.reset_timeout
+
+    def record_success(self, name: str) -> None:
+        """Record that the server responded properly."""
+
+        with self._lock:
+            circuit = self._circuit(name)
+            was_open = circuit.opened_until != None
+            circuit.failures = 0
+            circuit.opened_until = None
+        if was_open:
+            metrics.count("circuit_state_changes", {"distributor": name, "state": "closed"})
+
+    def record_failure(self, name: str, retry_after: float|None = None) -> bool:
+        """Record a failed try, and return whether the circuit is open now."""
+
+        with self._lock:
+            circuit = self._circuit(name)
+            circuit.failures += 1
+            if circuit.failures < self.failure_threshold:
+                return False
+            circuit.opened_until = time.monotonic() + max(self.reset_timeout, retry_after or 0)
+        metrics.count("circuit_state_changes", {"distributor": name, "state": "open"})
+        return True
+
+    def reset(self, name: str|None = None) -> None:
+        """Close circuit of distributor name, or all circuits if None."""
+
+        with self._lock:
+            if name == None:
+                self._circuits.clear()
+            else:
+                self._circuits.pop(name, None)
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime
+from typing import Sequence
+
+from .odpt_components import Distributor, TrainInformation
+
+
+class _State():
+    """Schedule of a distributor."""
+
+    __slots__ = ("interval", "last_time", "next_time", "tokens", "token_time")
+
+    def __init__(self, interval: float, now: float, tokens: float) -> None:
+        self.interval = interval
+        self.last_time = now
+        self.next_time = now
+        self.tokens = tokens
+        self.token_time = now
+
+class AdaptiveSchedule():
+    """Refresh schedule adapting to how often information of each distributor changes.
+
+    Whenever a refresh finds changes, the interval is halved down to min_interval,
+    and otherwise it is increased by half up to max_interval.
+    If information has dct:valid in the future, the next refresh is brought forward to just after it.
+    Requests to each distributor are limited to request_budget per budget_period by a token bucket,
+    so requests saved while information is calm can be spent in bursts during disruptions.
+
+    Parameters
+    ----------
+    min_interval : float, optional
+        Minimum seconds between refreshes, by default 15
+    max_interval : float, optional
+        Maximum seconds between refreshes, by default 300
+    request_budget : int | None, optional
+        Maximum number of requests to each distributor per budget_period. If None (default), unlimited.
+    budget_period : float, optional
+        Seconds of period of request_budget, by default 86400 (a day)
+    burst : int, optional
+        Maximum number of requests saved for bursts, by default 20
+    """
+
+    min_interval: float
+    max_interval: float
+    request_budget: int|None
+    budget_period: float
+    burst: int
+
+    def __init__(self, min_interval: float = 15, max_interval: float = 300, request_budget: int|None = None, budget_period: float = 86400, burst: int = 20) -> None:
+
+        if min_interval <= 0:
+            raise ValueError("Interval must be positive.")
+        if min_interval > max_interval:
+            raise ValueError("min_interval must not be greater than max_interval.")
+        if request_budget != None and request_budget < 1:
+            raise ValueError("Request budget must be 1 or more.")
+        if budget_period <= 0 or burst < 1:
+            raise ValueError("Budget period and burst must be positive.")
+
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.request_budget = request_budget
+        self.budget_period = budget_period
+        self.burst = burst
+        self._states: dict[str, _State] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, distributor: Distributor, now: float) -> _State:
+
+        state = self._states.get(distributor.name)
+        if state == None:
+            state = self._states[distributor.name] = _State(self.min_interval, now, float(self.burst))
+        return state
+
+    def _refill(self, state: _State, now: float) -> None:
+
+        if self.request_budget == None:
+            return
+        rate = self.request_budget / self.budget_period
+        state.tokens = min(float(self.burst), state.tokens + (now - state.token_time) * rate)
+        state.token_time = now
+
+    def interval(self, distributor: Distributor) -> float:
+        """Return the current interval of distributor."""
+
+        with self._lock:
+            return self._state(distributor, time.time()).interval
+
+    def max_age(self, distributor: Distributor) -> float:
+        """Return how old cache of distributor gets before the next refresh."""
+
+        with self._lock:
+            state = self._state(distributor, time.time())
+            return state.next_time - state.last_time
+
+    def due(self, distributors: Sequence[Distributor], now: float) -> list[Distributor]:
+        """Return distributors to refresh now, taking a token of request budget from each."""
+
+        result: list[Distributor] = []
+        with self._lock:
+            for distributor in distributors:
+                state = self._state(distributor, now)
+                if state.next_time > now:
+                    continue
+                self._refill(state, now)
+                if self.request_budget != None:
+                    if state.tokens < 1:
+                        # Wait for the next token.
+                        state.next_time = now + (1 - state.tokens) * self.budget_period / self.request_budget
+                        continue
+                    state.tokens -= 1
+                result.append(distributor)
+        return result
+
+    def record(self, distributor: Distributor, changes: int, info: Sequence[TrainInformation], now: float) -> None:
+        """Schedule the next refresh after refreshing.
+
+        Parameters
+        ----------
+        distributor : Distributor
+        changes : int
+            Number of lines whose information changed since the last refresh.
+        info : Sequence[TrainInformation]
+            Information after refresh.
+        now : float
+        """
+
+        hint = min(( single.valid.timestamp() for single in info if isinstance(single.valid, datetime) and single.valid.timestamp() > now ), default=None)
+
+        with self._lock:
+            state = self._state(distributor, now)
+            if changes > 0:
+                state.interval = max(self.min_interval, state.interval / 2)
+            else:
+                state.interval = min(self.max_interval, state.interval * 1.5)
+            state.last_time = now
+            state.next_time = now + state.interval
+            if hint != None and hint + 1 < state.next_time:
+                state.next_time = max(now + self.min_interval, hint + 1)
+
+    def next_wait(self, distributors: Sequence[Distributor], now: float) -> float:
+        """Return seconds until any of distributors is due."""
+
+        with self._lock:
+            next_time = min(( self._state(distributor, now).next_time for distributor in distributors ), default=now + self.max_interval)
+        return max(0, next_time - now)
@@ -0,0 +1,240 @@
+import base64
+import http.client
+import queue
+import urllib.parse
+from contextlib import contextmanager
+from email.message import Message
+from typing import Iterator, NamedTuple
+
+_REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+_MAX_REDIRECTS = 10
+"""Same limit as ``urllib.request``."""
+
+_PoolKey = tuple[str, str, int|None, str|None]
+"""Scheme, host and port of URL, and URL of proxy."""
+
+def _proxy_headers(proxy: str) -> dict[str,str]:
+    """Return headers to authenticate with credentials in URL of proxy."""
+
+    parsed = urllib.parse.urlsplit(proxy)
+    if parsed.username == None:
+        return {}
+    credentials = "%s:%s" % (urllib.parse.unquote(parsed.username), urllib.parse.unquote(parsed.password or ""))
+    return {"Proxy-Authorization": "Basic " + base64.b64encode(credentials.encode()).decode("ascii")}
+
+class Response(NamedTuple):
+    """Response read entirely from a connection."""
+
+    status: int
+    reason: str
+    headers: Message
+    body: bytes
+
+class Session():
+    """HTTP client keeping connections alive and reusing them.
+
+    Idle connections are pooled per host, up to pool_size per host.
+    It is thread-safe, so the same session is shared between threads and asyncio worker threads.
+    Like ``urllib.request.urlopen``, proxies are taken from environment variables such as ``HTTPS_PROXY`` and ``NO_PROXY``
+    (and system settings on macOS and Windows), and redirects are followed.
+    """
+
+    pool_size: int
+    """Maximum number of idle connections kept per host."""
+
+    connect_timeout: float
+    """Timeout seconds to establish a connection."""
+
+    read_timeout: float
+    """Timeout seconds to wait for data from an established connection."""
+
+    def __init__(self, pool_size: int = 4, connect_timeout: float = 10, read_timeout: float = 30) -> None:
+
+        if pool_size < 1:
+            raise ValueError("Pool size must be 1 or more.")
+
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._pools: dict[_PoolKey, queue.LifoQueue[http.client.HTTPConnection]] = {}
+
+    def _pool(self, key: _PoolKey) -> queue.LifoQueue[http.client.HTTPConnection]:
+        # dict.setdefault is atomic, so no lock is needed.
+        return self._pools.setdefault(key, queue.LifoQueue(maxsize=self.pool_size))
+
+    @staticmethod
+    def _proxy(scheme: str, host: str) -> str|None:
+        """Return URL of proxy to host, or None to connect directly."""
+
+        # Heavy to import, and needed only when a connection is made.
+        import urllib.request
+
+        proxy = urllib.request.getproxies().get(scheme)
+        if not proxy or urllib.request.proxy_bypass(host):
+            return None
+        if "://" not in proxy:
+            proxy = "http://" + proxy
+        return proxy
+
+    def _connect(self, key: _PoolKey) -> http.client.HTTPConnection:
+
+        scheme, host, port, proxy = key
+        if scheme not in ("http", "https"):
+            raise ValueError("Unsupported scheme '%s'." % scheme)
+
+        connection_host, connection_port = host, port
+        if proxy != None:
+            parsed = urllib.parse.urlsplit(proxy)
+            connection_host, connection_port = parsed.hostname or "", parsed.port
+
+        connection: http.client.HTTPConnection
+        if scheme == "https":
+            connection = http.client.HTTPSConnection(connection_host, connection_port, timeout=self.connect_timeout)
+            if proxy != None:
+                # Tunnel TLS through proxy by CONNECT.
+                connection.set_tunnel(host, port, headers=_proxy_headers(proxy))
+        else:
+            connection = http.client.HTTPConnection(connection_host, connection_port, timeout=self.connect_timeout)
+
+        connection.connect()
+        if connection.sock != None:
+            connection.sock.settimeout(self.read_timeout)
+        return connection
+
+    def request(self, url: str, headers: dict[str,str]|None = None) -> Response:
+        """Send GET request and read the whole response.
+
+        Parameters
+        ----------
+        url : str
+        headers : dict[str,str] | None, optional
+            Request headers.
+
+        Returns
+        -------
+        Response
+        """
+
+        with self.stream(url, headers) as r:
+            return Response(r.status, r.reason, r.headers, r.read())
+
+    @contextmanager
+    def stream(self, url: str, headers: dict[str,str]|None = None) -> Iterator[http.client.HTTPResponse]:
+        """Send GET request and yield response whose body is not read yet.
+
+        Connection is reused only if the body has been read to the end.
+        Redirects are followed up to 10 times, and then the redirect response is yielded.
+
+        Parameters
+        ----------
+        url : str
+        headers : dict[str,str] | None, optional
+            Request headers.
+
+        Yields
+        ------
+        http.client.HTTPResponse
+        """
+
+        for redirect_count in range(_MAX_REDIRECTS + 1):
+            response, connection, pool = self._open(url, headers or {})
+            location = response.getheader("Location")
+            if response.status not in _REDIRECT_STATUSES or location == None or redirect_count == _MAX_REDIRECTS:
+                break
+            try:
+                # Read the rest so that connection can be reused.
+                response.read()
+            except BaseException:
+                connection.close()
+                raise
+            self._release(connection, pool, response)
+            url = urllib.parse.urljoin(url, location)
+
+        try:
+            yield response
+        except BaseException:
+            connection.close()
+            raise
+
+        self._release(connection, pool, response)
+
+    def _open(self, url: str, headers: dict[str,str]) -> tuple[http.client.HTTPResponse, http.client.HTTPConnection, queue.LifoQueue[http.client.HTTPConnection]]:
+        """Send GET request by a pooled or new connection, and return response with the connection and its pool."""
+
+        parsed = urllib.parse.urlsplit(url)
+        host = parsed.hostname or ""
+        proxy = self._proxy(parsed.scheme, host)
+        key = (parsed.scheme, host, parsed.port, proxy)
+        if proxy != None and parsed.scheme == "http":
+            # Plain HTTP proxy takes absolute URL and credentials with each request.
+            target = urllib.parse.urlunsplit(parsed._replace(fragment=""))
+            headers = {**_proxy_headers(proxy), **headers}
+        else:
+            target = parsed.path or "/"
+            if parsed.query:
+                target += "?" + parsed.query
+
+        pool = self._pool(key)
+
+        try:
+            connection = pool.get_nowait()
+            reused = True
+        except queue.Empty:
+            connection = self._connect(key)
+            reused = False
+
+        try:
+            response = self._send(connection, target, headers)
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            connection.close()
+            if not reused:
+                raise
+            # Server closed the idle connection. Retry once with a new one.
+            connection = self._connect(key)
+            try:
+                response = self._send(connection, target, headers)
+            except BaseException:
+                connection.close()
+                raise
+        except BaseException:
+            connection.close()
+            raise
+
+        return response, connection, pool
+
+    @staticmethod
+    def _release(connection: http.client.HTTPConnection, pool: queue.LifoQueue[http.client.HTTPConnection], response: http.client.HTTPResponse) -> None:
+        """Return connection to pool if its response has been read to the end, otherwise close it."""
+
+        if response.will_close or not response.isclosed():
+            connection.close()
+        else:
+            try:
+                pool.put_nowait(connection)
+            except queue.Full:
+                connection.close()
+
+    @staticmethod
+    def _send(connection: http.client.HTTPConnection, target: str, headers: dict[str,str]) -> http.client.HTTPResponse:
+
+        connection.request("GET", target, headers=headers)
+        return connection.getresponse()
+
+    def close(self) -> None:
+        """Close all idle connections."""
+
+        for pool in list(self._pools.values()):
+            while True:
+                try:
+                    pool.get_nowait().close()
+                except queue.Empty:
+                    break
+
+def iter_chunks(response: http.client.HTTPResponse, size: int = 65536) -> Iterator[bytes]:
+    """Read body of response chunk by chunk."""
+
+    while True:
+        chunk = response.read(size)
+        if not chunk:
+            return
+        yield chunk
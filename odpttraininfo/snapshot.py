@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import gzip
+from typing import Iterable, Iterator
+
+from . import odpt_components
+from .odpt_components import TrainInformation, dump_json
+
+_EMPTY: tuple[TrainInformation, ...] = ()
+
+def _strip_prefix(id_: str) -> str:
+    """Strip prefix like "odpt.Railway:" from ID."""
+
+    return id_.split(":", 1)[-1]
+
+class Snapshot():
+    """Immutable list of train information with indexes.
+
+    Indexes are built once in constructor, so each query takes constant time.
+    IDs in queries may be given with or without prefix, e.g. both "odpt.Railway:TWR.Rinkai" and "TWR.Rinkai".
+
+    Parameters
+    ----------
+    info : Iterable[TrainInformation]
+    version : int, optional
+        Version of snapshot, which increases whenever information is updated, by default 0
+    """
+
+    __slots__ = ("_info", "_version", "_rendered", "_abnormal", "_by_company", "_by_line", "_by_station", "_by_transfer_railway")
+
+    def __init__(self, info: Iterable[TrainInformation], version: int = 0) -> None:
+
+        self._info = tuple(info)
+        self._version = version
+        self._rendered: dict[tuple[bool, str|None, bool, bool], bytes] = {}
+
+        by_company: dict[str, list[TrainInformation]] = {}
+        by_line: dict[str, list[TrainInformation]] = {}
+        by_station: dict[str, list[TrainInformation]] = {}
+        by_transfer_railway: dict[str, list[TrainInformation]] = {}
+
+        for single in self._info:
+            if single.operator:
+                by_company.setdefault(_strip_prefix(single.operator), []).append(single)
+            for line in { _strip_prefix(id_) for id_ in (single.same_as, single.railway) if id_ }:
+                by_line.setdefault(line, []).append(single)
+            if not (single.same_as or single.railway) and single.operator:
+                # Information about whole of railway company.
+                by_line.setdefault(_strip_prefix(single.operator), []).append(single)
+            for station in { _strip_prefix(id_) for id_ in (single.station_from, single.station_to) if id_ }:
+                by_station.setdefault(station, []).append(single)
+            for railway in { _strip_prefix(id_) for id_ in single.transfer_railways or [] }:
+                by_transfer_railway.setdefault(railway, []).append(single)
+
+        self._abnormal = tuple( single for single in self._info if single.train_information_status )
+        self._by_company = { key: tuple(value) for key, value in by_company.items() }
+        self._by_line = { key: tuple(value) for key, value in by_line.items() }
+        self._by_station = { key: tuple(value) for key, value in by_station.items() }
+        self._by_transfer_railway = { key: tuple(value) for key, value in by_transfer_railway.items() }
+
+    def __len__(self) -> int:
+        return len(self._info)
+
+    def __iter__(self) -> Iterator[TrainInformation]:
+        return iter(self._info)
+
+    def __getitem__(self, index: int) -> TrainInformation:
+        return self._info[index]
+
+    @property
+    def version(self) -> int:
+        """Version of snapshot, e.g. to use as ETag."""
+
+        return self._version
+
+    def to_list(self) -> list[TrainInformation]:
+        """Return all information as a new list."""
+
+        return list(self._info)
+
+    def abnormal(self) -> tuple[TrainInformation, ...]:
+        """Return information which has status such as delay."""
+
+        return self._abnormal
+
+    def companies(self) -> list[str]:
+        """Return IDs of companies like "TWR"."""
+
+        return list(self._by_company)
+
+    def by_company(self, company: str) -> tuple[TrainInformation, ...]:
+        """Return information operated by company.
+
+        Parameters
+        ----------
+        company : str
+            Company ID like "TWR" or "odpt.Operator:TWR".
+        """
+
+        return self._by_company.get(_strip_prefix(company), _EMPTY)
+
+    def by_line(self, line: str) -> tuple[TrainInformation, ...]:
+        """Return information about line.
+
+        Parameters
+        ----------
+        line : str
+            Line ID like "TWR.Rinkai", which is compared with owl:sameAs and odpt:railway.
+            Company ID matches information about whole of railway company.
+        """
+
+        return self._by_line.get(_strip_prefix(line), _EMPTY)
+
+    def by_station(self, station: str) -> tuple[TrainInformation, ...]:
+        """Return information whose affected section starts or ends at station.
+
+        Parameters
+        ----------
+        station : str
+            Station ID like "TWR.Rinkai.Shinonome".
+        """
+
+        return self._by_station.get(_strip_prefix(station), _EMPTY)
+
+    def by_transfer_railway(self, railway: str) -> tuple[TrainInformation, ...]:
+        """Return information which lists railway in odpt:transferRailways.
+
+        Parameters
+        ----------
+        railway : str
+            Railway ID like "TWR.Rinkai".
+        """
+
+        return self._by_transfer_railway.get(_strip_prefix(railway), _EMPTY)
+
+    def render_json(self, only_abnormal: bool = False, company: str|None = None, compress: bool = False) -> bytes:
+        """Return information encoded by :func:`~odpttraininfo.dump_json`.
+
+        Result is memoized in the snapshot, so rendering the same snapshot again returns the same bytes object.
+
+        Parameters
+        ----------
+        only_abnormal : bool, optional
+            If True, only information which has status such as delay.
+        company : str | None, optional
+            If given, only information operated by company like "TWR".
+        compress : bool, optional
+            If True, compress by gzip.
+        """
+
+        if company != None:
+            company = _strip_prefix(company)
+            if company not in self._by_company:
+                # Don't memoize unknown companies, whose number is unbounded.
+                return gzip.compress(b"[]", mtime=0) if compress else b"[]"
+
+        key = (only_abnormal, company, compress, odpt_components.output_with_none)
+        rendered = self._rendered.get(key)
+        if rendered != None:
+            return rendered
+
+        if compress:
+            rendered = gzip.compress(self.render_json(only_abnormal, company), mtime=0)
+        else:
+            info = self._info if company == None else self._by_company[company]
+            if only_abnormal:
+                info = tuple( single for single in info if single.train_information_status )
+            rendered = dump_json(info)
+
+        self._rendered[key] = rendered
+        return rendered
@@ -0,0 +1,195 @@
+"""Fixtures shared by tests: local stand-in servers and isolation from environment."""
+
+import socket
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterator
+
+import pytest
+
+from odpttraininfo import cache
+from odpttraininfo.backends import FileSystemBackend
+from odpttraininfo.odpt_components import Distributor
+
+_PROXY_VARIABLES = ["http_proxy", "https_proxy", "no_proxy", "all_proxy", "HTTP_PROXY", "HTTPS_PROXY", "NO_PROXY", "ALL_PROXY"]
+
+@pytest.fixture(autouse=True)
+def _no_proxy(monkeypatch: pytest.MonkeyPatch) -> None:
+    for name in _PROXY_VARIABLES:
+        monkeypatch.delenv(name, raising=False)
+
+class Handler(BaseHTTPRequestHandler):
+    """Base handler of stand-in servers, speaking HTTP/1.1 quietly."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def send_body(self, status: int, body: bytes, headers: dict[str,str]|None = None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+@pytest.fixture
+def register(monkeypatch: pytest.MonkeyPatch, tmp_path) -> Callable[[str], Distributor]:
+    """Isolate cache in tmp_path, and return function registering the only distributor of URL."""
+
+    monkeypatch.setattr(Distributor, "_registry", {})
+    monkeypatch.setattr(cache, "_backend", FileSystemBackend(str(tmp_path)))
+    monkeypatch.setattr(cache, "_memory_cache", {})
+
+    def register(url: str) -> Distributor:
+        return Distributor.register("TEST", url + "/", consumer_key="key")
+
+    return register
+
+@pytest.fixture
+def serve() -> Iterator[Callable[[type[BaseHTTPRequestHandler]], str]]:
+    """Start a server with handler class in a background thread, and return its base URL."""
+
+    servers: list[ThreadingHTTPServer] = []
+
+    def start(handler: type[BaseHTTPRequestHandler]) -> str:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        servers.append(server)
+        return "http://127.0.0.1:%d" % server.server_address[1]
+
+    yield start
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+class FakeRedis(socketserver.ThreadingTCPServer):
+    """Stand-in Redis server speaking RESP2, supporting only commands used by RedisBackend.
+
+    Keys are kept in memory; expiry set by ``SET ... PX`` is checked on access.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _FakeRedisHandler)
+        self.data: dict[bytes, bytes|dict[bytes, bytes]] = {}
+        self.expires: dict[bytes, float] = {}
+        self.commands: list[list[bytes]] = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        self._sockets: list[socket.socket] = []
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def drop_connections(self) -> None:
+        """Close every client connection, as a restarting server does."""
+
+        with self.lock:
+            sockets, self._sockets = self._sockets, []
+        for client in sockets:
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            client.close()
+
+    def _alive(self, key: bytes) -> bool:
+
+        if key in self.expires and self.expires[key] <= time.time():
+            del self.expires[key]
+            self.data.pop(key, None)
+        return key in self.data
+
+    def run(self, args: list[bytes]) -> bytes:
+
+        command, args = args[0].upper(), args[1:]
+        with self.lock:
+            self.commands.append([command] + args)
+            match command:
+                case b"HSET":
+                    self._alive(args[0])
+                    hash = self.data.setdefault(args[0], {})
+                    if not isinstance(hash, dict):
+                        return b"-WRONGTYPE Operation against a key holding the wrong kind of value\r\n"
+                    added = 0
+                    for i in range(1, len(args), 2):
+                        added += args[i] not in hash
+                        hash[args[i]] = args[i+1]
+                    return b":%d\r\n" % added
+                case b"HMGET":
+                    hash = self.data.get(args[0], {}) if self._alive(args[0]) else {}
+                    assert isinstance(hash, dict)
+                    return b"*%d\r\n" % (len(args) - 1) + b"".join(_bulk(hash.get(field)) for field in args[1:])
+                case b"GET":
+                    value = self.data.get(args[0]) if self._alive(args[0]) else None
+                    assert not isinstance(value, dict)
+                    return _bulk(value)
+                case b"SET":
+                    options = [ option.upper() for option in args[2:] ]
+                    if b"NX" in options and self._alive(args[0]):
+                        return _bulk(None)
+                    self.data[args[0]] = args[1]
+                    self.expires.pop(args[0], None)
+                    if b"PX" in options:
+                        self.expires[args[0]] = time.time() + int(args[2 + options.index(b"PX") + 1]) / 1000
+                    return b"+OK\r\n"
+                case b"DEL":
+                    deleted = 0
+                    for key in args:
+                        deleted += self._alive(key)
+                        self.data.pop(key, None)
+                        self.expires.pop(key, None)
+                    return b":%d\r\n" % deleted
+                case _:
+                    return b"-ERR unknown command '%s'\r\n" % command
+
+def _bulk(value: bytes|None) -> bytes:
+
+    if value == None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+class _FakeRedisHandler(socketserver.StreamRequestHandler):
+
+    server: FakeRedis
+
+    def handle(self) -> None:
+
+        with self.server.lock:
+            self.server.connections += 1
+            self.server._sockets.append(self.request)
+        try:
+            while True:
+                line = self.rfile.readline()
+                if not line.startswith(b"*"):
+                    return
+                args = []
+                for _ in range(int(line[1:])):
+                    length = int(self.rfile.readline()[1:])
+                    args.append(self.rfile.read(length + 2)[:-2])
+                self.wfile.write(self.server.run(args))
+        except (OSError, ValueError):
+            return
+
+@pytest.fixture
+def redis_server() -> Iterator[FakeRedis]:
+    """Start a stand-in Redis server in a background thread."""
+
+    server = FakeRedis()
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    yield server
+
+    server.shutdown()
+    server.drop_connections()
+    server.server_close()
@@ -0,0 +1,242 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from odpttraininfo.backends import CacheBackend, FileSystemBackend
+from odpttraininfo.backends.redis import RedisBackend
+from odpttraininfo.backends.sqlite import SQLiteBackend
+from odpttraininfo.lock import fcntl
+
+from conftest import FakeRedis
+
+
+@pytest.fixture(params=["filesystem", "sqlite", "redis"])
+def backend(request: pytest.FixtureRequest, tmp_path) -> CacheBackend:
+
+    match request.param:
+        case "filesystem":
+            return FileSystemBackend(str(tmp_path))
+        case "sqlite":
+            return SQLiteBackend(str(tmp_path / "cache.sqlite3"))
+        case _:
+            server: FakeRedis = request.getfixturevalue("redis_server")
+            return RedisBackend(port=server.port)
+
+def test_missing_key(backend: CacheBackend):
+
+    assert backend.stat("A.json") == None
+    assert backend.get("A.json") == None
+    assert backend.touch("A.json") == None
+    assert backend.get_validator("A.json") == {}
+
+def test_get_returns_saved_data(backend: CacheBackend):
+
+    stat = backend.set("A.json", b"[1]")
+    entry = backend.get("A.json")
+    assert entry != None
+    assert entry.data[:] == b"[1]"
+    assert entry.stat == stat == backend.stat("A.json")
+    assert abs(stat.updated - time.time()) < 5
+
+    # Chunks are joined.
+    backend.set("A.json", iter([b"[1,", b"2]"]))
+    entry = backend.get("A.json")
+    assert entry != None
+    assert entry.data[:] == b"[1,2]"
+    assert entry.stat.version != stat.version
+
+def test_touch_changes_version_only(backend: CacheBackend):
+
+    stat = backend.set("A.json", b"[1]")
+    time.sleep(0.02)
+    touched = backend.touch("A.json")
+    assert touched != None
+    before, after = touched
+    assert before == stat
+    assert after.version != stat.version
+    assert after.updated > stat.updated
+    entry = backend.get("A.json")
+    assert entry != None
+    assert entry.data[:] == b"[1]"
+    assert entry.stat == after
+
+def test_validator(backend: CacheBackend):
+
+    backend.set("A.json", b"[1]")
+    backend.set_validator("A.json", {"etag": '"x"'})
+    assert backend.get_validator("A.json") == {"etag": '"x"'}
+    assert backend.get_validator("B.json") == {}
+    backend.set_validator("A.json", {})
+    assert backend.get_validator("A.json") == {}
+
+def test_lock_excludes_other_holder(backend: CacheBackend):
+
+    lock = backend.lock("A.json")
+    other = backend.lock("A.json")
+    assert lock.acquire(1)
+    assert not other.acquire(0.1)
+    # Lock of another key is independent.
+    unrelated = backend.lock("B.json")
+    assert unrelated.acquire(0.1)
+    unrelated.release()
+
+    lock.release()
+    assert other.acquire(0.1)
+    other.release()
+
+def test_lock_waits_for_holder_in_other_thread(backend: CacheBackend):
+
+    lock = backend.lock("A.json")
+    assert lock.acquire(1)
+    releaser = threading.Timer(0.2, lock.release)
+    releaser.start()
+
+    started = time.monotonic()
+    other = backend.lock("A.json")
+    assert other.acquire(5)
+    assert time.monotonic() - started >= 0.15
+    other.release()
+    releaser.join()
+
+def test_filesystem_keeps_previous_data(tmp_path):
+
+    backend = FileSystemBackend(str(tmp_path))
+    assert backend.get_previous("A.json") == None
+    backend.set("A.json", b"[1]")
+    backend.set("A.json", b"[2]")
+    previous = backend.get_previous("A.json")
+    assert previous != None
+    assert previous.data[:] == b"[1]"
+
+@pytest.mark.parametrize("umask", [0o022, 0o007])
+def test_filesystem_files_follow_umask(tmp_path, umask: int):
+
+    backend = FileSystemBackend(str(tmp_path))
+    old_umask = os.umask(umask)
+    try:
+        backend.set("A.json", b"[1]")
+        backend.set_validator("A.json", {"etag": '"x"'})
+    finally:
+        os.umask(old_umask)
+    for name in ["A.json", "A.json.validator.json"]:
+        assert os.stat(tmp_path / name).st_mode & 0o777 == 0o666 & ~umask
+    assert sorted(os.listdir(tmp_path)) == ["A.json", "A.json.validator.json"]
+
+def test_filesystem_backend_leaves_umask_alone(tmp_path):
+
+    # Changing process-wide umask would affect files created by other threads meanwhile.
+    script = (
+        "import os\n"
+        "def umask(mask): raise AssertionError('umask was changed')\n"
+        "os.umask = umask\n"
+        "from odpttraininfo.backends import FileSystemBackend\n"
+        "FileSystemBackend(%r).set('A.json', b'[1]')\n" % str(tmp_path)
+    )
+    subprocess.run([sys.executable, "-c", script], check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.mark.skipif(fcntl is None, reason="flock is not available")
+def test_filesystem_lock_excludes_other_process(tmp_path):
+
+    backend = FileSystemBackend(str(tmp_path))
+    lock = backend.lock("A.json")
+    assert lock.acquire(1)
+    lock.release()
+
+    # flock on another open file, as another process holding the lock does.
+    fd = os.open(tmp_path / "A.lock", os.O_RDWR)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        assert not lock.acquire(0.1)
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        assert lock.acquire(0.1)
+        lock.release()
+    finally:
+        os.close(fd)
+
+def test_sqlite_keeps_previous_data(tmp_path):
+
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"))
+    backend.set("A.json", b"[1]")
+    assert backend.get_previous("A.json") == None
+    backend.set("A.json", b"[2]")
+    backend.set_validator("A.json", {"etag": '"x"'})
+    backend.set("A.json", b"[3]")
+
+    previous = backend.get_previous("A.json")
+    assert previous != None
+    assert previous.data == b"[2]"
+    # Validator is kept by upsert.
+    assert backend.get_validator("A.json") == {"etag": '"x"'}
+
+def test_sqlite_shared_by_backends_of_same_file(tmp_path):
+
+    path = str(tmp_path / "cache.sqlite3")
+    first, second = SQLiteBackend(path), SQLiteBackend(path)
+    stat = first.set("A.json", b"[1]")
+    assert second.stat("A.json") == stat
+    assert first.lock("A.json").acquire(1)
+    assert not second.lock("A.json").acquire(0.1)
+
+def test_sqlite_lock_expires(tmp_path):
+
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), lock_ttl=0.2)
+    stale, other = backend.lock("A.json"), backend.lock("A.json")
+    assert stale.acquire(1)
+    assert other.acquire(2)
+    # Holder whose lock expired doesn't release lock of the new holder.
+    stale.release()
+    assert not backend.lock("A.json").acquire(0.1)
+
+def test_redis_set_is_single_hset(redis_server: FakeRedis):
+
+    backend = RedisBackend(port=redis_server.port, prefix="test:")
+    stat = backend.set("A.json", [b"[1,", b"2]"])
+    hsets = [ command for command in redis_server.commands if command[0] == b"HSET" ]
+    assert hsets == [[b"HSET", b"test:A.json", b"data", b"[1,2]", b"updated", repr(stat.updated).encode(), b"version", stat.version]]
+
+def test_redis_shared_by_nodes(redis_server: FakeRedis):
+
+    first, second = RedisBackend(port=redis_server.port), RedisBackend(port=redis_server.port)
+    stat = first.set("A.json", b"[1]")
+    assert second.stat("A.json") == stat
+    first.set_validator("A.json", {"etag": '"x"'})
+    assert second.get_validator("A.json") == {"etag": '"x"'}
+    assert first.lock("A.json").acquire(1)
+    assert not second.lock("A.json").acquire(0.1)
+
+def test_redis_lock_expires(redis_server: FakeRedis):
+
+    backend = RedisBackend(port=redis_server.port, lock_ttl=0.2)
+    stale, other = backend.lock("A.json"), backend.lock("A.json")
+    assert stale.acquire(1)
+    assert other.acquire(2)
+    # Holder whose lock expired doesn't release lock of the new holder.
+    stale.release()
+    assert not backend.lock("A.json").acquire(0.1)
+    other.release()
+    assert backend.lock("A.json").acquire(0.1)
+
+def test_redis_reconnects_after_connection_lost(redis_server: FakeRedis):
+
+    backend = RedisBackend(port=redis_server.port)
+    backend.set("A.json", b"[1]")
+    assert redis_server.connections == 1
+
+    redis_server.drop_connections()
+    entry = backend.get("A.json")
+    assert entry != None
+    assert entry.data == b"[1]"
+    assert redis_server.connections == 2
+
+def test_redis_connection_per_thread(redis_server: FakeRedis):
+
+    backend = RedisBackend(port=redis_server.port)
+    backend.set("A.json", b"[1]")
+    thread = threading.Thread(target=backend.get, args=("A.json",))
+    thread.start()
+    thread.join()
+    assert redis_server.connections == 2
@@ -0,0 +1,104 @@
+import mmap
+import pickle
+
+import pytest
+
+from odpttraininfo import binary_format
+from odpttraininfo.odpt_components import TrainInformation
+
+
+def info(line: str, text: str, **extra: object) -> TrainInformation:
+    return TrainInformation({
+        "@id": "urn:ucode:_" + line,
+        "@type": "odpt:TrainInformation",
+        "dc:date": "2024-01-01T09:00:00+09:00",
+        "owl:sameAs": "odpt.TrainInformation:" + line,
+        "odpt:railway": "odpt.Railway:" + line,
+        "odpt:operator": "odpt.Operator:" + line.split(".")[0],
+        "odpt:trainInformationText": {"ja": text, "en": "Text"},
+        **extra,
+    })
+
+INFO = [
+    info("OP.X", "平常運転"),
+    info("OP.Y", "遅延", **{"odpt:railDirection": "odpt.RailDirection:Inbound", "odpt:transferRailways": ["odpt.Railway:OP.Z"]}),
+]
+
+def test_round_trip():
+
+    views = binary_format.loads(binary_format.dumps(INFO))
+    assert views == INFO
+    for view, single in zip(views, INFO):
+        assert isinstance(view, binary_format.TrainInformationView)
+        assert view.to_json() == single.to_json()
+        assert view.date == single.date
+        assert view.rail_direction == single.rail_direction
+
+def test_round_trip_from_mmap(tmp_path):
+
+    path = tmp_path / "cache.bin"
+    path.write_bytes(binary_format.dumps(INFO))
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    assert binary_format.loads(buffer) == INFO
+
+def test_empty():
+
+    assert binary_format.loads(binary_format.dumps([])) == []
+
+def test_fields_are_decoded_on_access():
+
+    (view,) = binary_format.loads(binary_format.dumps(INFO[:1]))
+    assert "train_information_text" not in _assigned(view)
+    assert view.train_information_text == INFO[0].train_information_text
+    assert "train_information_text" in _assigned(view)
+    # Assigned value is kept instead of the record.
+    view.railway = "odpt.Railway:OP.W"
+    assert view.railway == "odpt.Railway:OP.W"
+
+def _assigned(view: TrainInformation) -> set[str]:
+
+    assigned = set()
+    for attribute in binary_format._attributes:
+        try:
+            TrainInformation.__dict__[attribute].__get__(view)
+        except AttributeError:
+            continue
+        assigned.add(attribute)
+    return assigned
+
+def test_iter_dicts_returns_json_values():
+
+    dicts = list(binary_format.iter_dicts(binary_format.dumps(INFO)))
+    assert dicts[1]["odpt:transferRailways"] == ["odpt.Railway:OP.Z"]
+    assert dicts[0]["dc:date"] == "2024-01-01T09:00:00+09:00"
+    assert "odpt:railDirection" not in dicts[0]
+
+def test_pickled_as_plain_information():
+
+    (view,) = binary_format.loads(binary_format.dumps(INFO[:1]))
+    restored = pickle.loads(pickle.dumps(view))
+    assert type(restored) is TrainInformation
+    assert restored == INFO[0]
+
+@pytest.mark.parametrize("buffer", [b"", b"[]", b"ODPTTI\x01\x00", binary_format.MAGIC, binary_format.MAGIC + b"\x02\x00\x00\x00\x10\x00\x00\x00"])
+def test_invalid_buffer(buffer: bytes):
+
+    with pytest.raises(ValueError):
+        binary_format.loads(buffer)
+
+@pytest.mark.parametrize("cut", [1, 4, 20, 100])
+def test_truncated_buffer_is_rejected_on_load(cut: int):
+
+    data = binary_format.dumps(INFO)
+    with pytest.raises(ValueError):
+        binary_format.loads(data[:-cut])
+    with pytest.raises(ValueError):
+        list(binary_format.iter_dicts(data[:-cut]))
+
+def test_broken_value_is_rejected_on_load():
+
+    data = bytearray(binary_format.dumps(INFO))
+    data[data.index("平常".encode('utf-8'))] ^= 0xff
+    with pytest.raises(ValueError):
+        binary_format.loads(bytes(data))
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from odpttraininfo import cache
+from odpttraininfo.odpt_components import TrainInformation
+
+from conftest import Handler
+
+BODY = json.dumps([{
+    "owl:sameAs": "odpt.TrainInformation:OP.X",
+    "odpt:railway": "odpt.Railway:OP.X",
+    "odpt:operator": "odpt.Operator:OP",
+    "odpt:trainInformationText": {"ja": "平常運転"},
+}]).encode('utf-8')
+
+def test_async_fetch_with_more_callers_than_executor_threads(serve, register):
+
+    requests: list[float] = []
+
+    class Server(Handler):
+        def do_GET(self):
+            requests.append(time.monotonic())
+            time.sleep(0.3)
+            self.send_body(200, BODY, {"Content-Type": "application/json"})
+
+    register(serve(Server))
+
+    async def main() -> list[list[object]]:
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=2))
+        callers = [ cache.async_fetch_info() for _ in range(16) ]
+        return await asyncio.wait_for(asyncio.gather(*callers), 5)
+
+    results = asyncio.run(main())
+    assert all( len(result) == 1 for result in results )
+    assert len(requests) == 1
+
+def test_broken_binary_cache_falls_back_to_previous(register, monkeypatch: pytest.MonkeyPatch, tmp_path):
+
+    monkeypatch.setattr(cache, "_cache_format", "binary")
+    distributor = register("http://127.0.0.1:1")
+    first = TrainInformation.from_jsonlist(BODY.decode('utf-8'))
+    second = TrainInformation.from_jsonlist(BODY.decode('utf-8').replace("平常運転", "遅延"))
+    cache._save(distributor, first)
+    cache._save(distributor, second)
+    assert cache._load(distributor) == second
+
+    # Truncate in place, keeping mtime fresh.
+    path = tmp_path / "TEST.bin"
+    with open(path, "r+b") as f:
+        f.truncate(path.stat().st_size - 20)
+    cache._memory_cache.clear()
+    assert cache._load(distributor) == first
+
+class SlowLock():
+    """Lock recording threads which acquired and released it, taking time to release."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.threads: list[int] = []
+
+    def acquire(self, timeout: float) -> bool:
+        self.threads.append(threading.get_ident())
+        return self.lock.acquire(timeout=timeout)
+
+    def release(self) -> None:
+        time.sleep(0.2)
+        self.threads.append(threading.get_ident())
+        self.lock.release()
+
+def test_async_lock_is_released_in_worker_thread(serve, register, monkeypatch: pytest.MonkeyPatch):
+
+    class Server(Handler):
+        def do_GET(self):
+            self.send_body(200, BODY, {"Content-Type": "application/json"})
+
+    lock = SlowLock()
+    monkeypatch.setattr(cache._backend, "lock", lambda key: lock)
+    register(serve(Server))
+
+    async def main() -> int:
+        await cache.async_fetch_info()
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+    assert len(lock.threads) == 2
+    assert loop_thread not in lock.threads
+    assert not lock.lock.locked()
+
+def test_async_release_finishes_after_cancel():
+
+    lock = SlowLock()
+    lock.acquire(0)
+
+    async def main() -> None:
+        task = asyncio.create_task(cache._async_release(lock))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert not lock.lock.locked()
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from odpttraininfo.errors import ChangeEventsExpiredError
+from odpttraininfo.feed import ChangeFeed
+from odpttraininfo.odpt_components import TrainInformation
+
+
+def info(line: str, text: str) -> TrainInformation:
+    return TrainInformation({
+        "owl:sameAs": "odpt.TrainInformation:" + line,
+        "odpt:railway": "odpt.Railway:" + line,
+        "odpt:operator": "odpt.Operator:" + line.split(".")[0],
+        "odpt:trainInformationText": {"ja": text},
+    })
+
+def test_events_of_changes():
+
+    feed = ChangeFeed()
+    received = []
+    feed.subscribe(received.extend)
+
+    feed.publish("A", [info("OP.X", "平常"), info("OP.Y", "遅延")])
+    feed.publish("A", [info("OP.X", "遅延")])
+    assert feed.flush(1)
+
+    assert [ (event.seq, event.kind, event.line) for event in received ] == [
+        (1, "added", "OP.X"), (2, "added", "OP.Y"), (3, "changed", "OP.X"), (4, "cleared", "OP.Y"),
+    ]
+    assert feed.seq == 4
+
+def test_same_information_makes_no_event():
+
+    feed = ChangeFeed()
+    received = []
+    feed.subscribe(received.extend)
+
+    feed.publish("A", [info("OP.X", "平常")])
+    feed.publish("A", [info("OP.X", "平常")])
+    assert feed.flush(1)
+    assert len(received) == 1
+
+def test_slow_callback_doesnt_block_publisher():
+
+    feed = ChangeFeed()
+    release = threading.Event()
+    received = []
+    feed.subscribe(lambda events: release.wait(5))
+    feed.subscribe(received.extend)
+
+    started = time.monotonic()
+    for i in range(3):
+        feed.publish("A", [info("OP.X", str(i))])
+    assert time.monotonic() - started < 1
+    assert not feed.flush(0.1)
+
+    release.set()
+    assert feed.flush(5)
+    assert [ event.seq for event in received ] == [1, 2, 3]
+
+def test_since():
+
+    feed = ChangeFeed()
+    feed.subscribe(lambda events: None)
+    start = feed.token
+    feed.publish("A", [info("OP.X", "1")])
+    feed.publish("A", [info("OP.X", "2")])
+
+    events = feed.since(start)
+    assert [ event.seq for event in events ] == [1, 2]
+    assert [ event.seq for event in feed.since(events[0].token) ] == [2]
+    assert feed.since(events[1].token) == []
+    assert events[1].token == feed.token
+
+def test_since_expired():
+
+    feed = ChangeFeed(max_events=2)
+    received = []
+    feed.subscribe(received.extend)
+    for i in range(4):
+        feed.publish("A", [info("OP.X", str(i))])
+    assert feed.flush(1)
+
+    assert [ event.seq for event in feed.since(received[1].token) ] == [3, 4]
+    with pytest.raises(ChangeEventsExpiredError) as raised:
+        feed.since(received[0].token)
+    assert "expired" in str(raised.value)
+
+def test_since_from_other_process():
+
+    restarted = ChangeFeed()
+    restarted.subscribe(lambda events: None)
+    restarted.publish("A", [info("OP.X", "1")])
+
+    feed = ChangeFeed()
+    received = []
+    feed.subscribe(received.extend)
+    for i in range(3):
+        feed.publish("A", [info("OP.X", str(i))])
+
+    # Token issued before restart is rejected even if seq of this process has passed it.
+    with pytest.raises(ChangeEventsExpiredError) as raised:
+        feed.since(restarted.token)
+    assert "not issued by this process" in str(raised.value)
+    for token in [feed.epoch + ":100", "1", "", feed.epoch + ":x"]:
+        with pytest.raises(ChangeEventsExpiredError):
+            feed.since(token)
+
+def test_async_iter_resumes():
+
+    feed = ChangeFeed()
+    feed.subscribe(lambda events: None)
+    start = feed.token
+    feed.publish("A", [info("OP.X", "1")])
+
+    async def main() -> list[int]:
+        iterator = feed.async_iter(since=start)
+        first = await iterator.__anext__()
+        asyncio.get_running_loop().call_soon(feed.publish, "A", [info("OP.X", "2")])
+        second = await asyncio.wait_for(iterator.__anext__(), 1)
+        await iterator.aclose()
+        return [first.seq, second.seq]
+
+    assert asyncio.run(main()) == [1, 2]
+
+def test_async_iter_rejects_token_from_other_process():
+
+    feed = ChangeFeed()
+
+    async def main() -> None:
+        async for _ in feed.async_iter(since=ChangeFeed().token):
+            pass
+
+    with pytest.raises(ChangeEventsExpiredError):
+        asyncio.run(main())
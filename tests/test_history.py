@@ -0,0 +1,179 @@
+import sqlite3
+from datetime import timedelta
+
+import pytest
+
+from odpttraininfo import feed
+from odpttraininfo.feed import ChangeEvent
+from odpttraininfo.history import HistoryStore
+from odpttraininfo.odpt_components import TrainInformation
+
+
+def info(line: str, text: str, direction: str|None = None) -> TrainInformation:
+
+    dic: dict[str, object] = {
+        "odpt:railway": "odpt.Railway:" + line,
+        "odpt:operator": "odpt.Operator:" + line.split(".")[0],
+        "odpt:trainInformationText": {"ja": text},
+    }
+    if direction != None:
+        dic["odpt:railDirection"] = "odpt.RailDirection:" + direction
+    return TrainInformation(dic)
+
+def texts(infos: list[TrainInformation]) -> list[str]:
+    return [ single.train_information_text.ja for single in infos ]
+
+def event(kind: str, new: TrainInformation|None, old: TrainInformation|None = None) -> ChangeEvent:
+    line = (new or old).get_line() # type: ignore
+    return ChangeEvent(0, kind, line, new, old, "test") # type: ignore
+
+@pytest.fixture
+def path(tmp_path) -> str:
+    return str(tmp_path / "history.sqlite3")
+
+def test_at_and_status(path: str):
+
+    store = HistoryStore(path)
+    store.record([event("added", info("OP.X", "1"))], recorded=100)
+    store.record([event("changed", info("OP.X", "2"), info("OP.X", "1"))], recorded=200)
+    store.record([event("cleared", None, info("OP.X", "2"))], recorded=300)
+
+    assert texts(store.at("OP.X", 50)) == []
+    assert texts(store.at("odpt.Railway:OP.X", 150)) == ["1"]
+    assert texts(store.at("OP.X", 200)) == ["2"]
+    assert texts(store.at("OP.X", 350)) == []
+
+    status = store.status("OP.X", 150, 300)
+    assert [ (entry.recorded.timestamp(), entry.kind) for entry in status ] == [(100, "added"), (200, "changed"), (300, "cleared")]
+    assert status[-1].info == None
+
+def test_same_information_is_not_recorded(path: str):
+
+    store = HistoryStore(path)
+    store.record([event("added", info("OP.X", "1"))], recorded=100)
+    store.record([event("added", info("OP.X", "1"))], recorded=200)
+    store.record([event("cleared", None, info("OP.Y", "1"))], recorded=300)
+    assert [ entry.kind for entry in store.changes("OP.X", 0, 1000) ] == ["added"]
+    assert store.changes("OP.Y", 0, 1000) == []
+
+def test_directions_are_kept_separately(path: str):
+
+    store = HistoryStore(path)
+    store.record([event("added", info("OP.X", "up", "Inbound")), event("added", info("OP.X", "down", "Outbound"))], recorded=100)
+    store.record([event("cleared", None, info("OP.X", "down", "Outbound"))], recorded=200)
+
+    assert texts(store.at("OP.X", 150)) == ["up", "down"]
+    assert texts(store.at("OP.X", 150, direction="Outbound")) == ["down"]
+    # Clearing one direction leaves the other.
+    assert texts(store.at("OP.X", 250)) == ["up"]
+    assert [ (entry.direction, entry.kind) for entry in store.changes("OP.X", 0, 1000, direction="Outbound") ] == [("Outbound", "added"), ("Outbound", "cleared")]
+
+def test_compact_keeps_status(path: str):
+
+    store = HistoryStore(path)
+    store.record([event("added", info("OP.X", "1")), event("added", info("OP.Y", "1"))], recorded=100)
+    store.record([event("changed", info("OP.X", "2"), info("OP.X", "1")), event("cleared", None, info("OP.Y", "1"))], recorded=200)
+    store.record([event("changed", info("OP.X", "3"), info("OP.X", "2"))], recorded=300)
+
+    assert texts(store.at("OP.X", 250)) == ["2"]
+    status_before = store.status("OP.X", 250, 400)
+
+    # Older change of OP.X and whole history of cleared OP.Y are deleted.
+    assert store.compact(250) == 3
+    assert texts(store.at("OP.X", 250)) == ["2"]
+    assert texts(store.at("OP.X", 350)) == ["3"]
+    assert store.at("OP.Y", 250) == []
+    assert store.status("OP.X", 250, 400) == status_before
+    assert store.changes("OP.Y", 0, 1000) == []
+
+    # Compacting again deletes nothing.
+    assert store.compact(250) == 0
+    assert store.compact(1000) == 1
+    assert texts(store.at("OP.X", 1000)) == ["3"]
+
+def test_compact_per_direction(path: str):
+
+    store = HistoryStore(path)
+    store.record([event("added", info("OP.X", "up", "Inbound")), event("added", info("OP.X", "down", "Outbound"))], recorded=100)
+    store.record([event("changed", info("OP.X", "down2", "Outbound"), info("OP.X", "down", "Outbound"))], recorded=200)
+
+    assert store.compact(250) == 1
+    assert texts(store.at("OP.X", 250)) == ["up", "down2"]
+
+def test_automatic_compaction(path: str):
+
+    store = HistoryStore(path, retention=timedelta(seconds=100), compact_interval=timedelta(0))
+    store.record([event("added", info("OP.X", "1"))], recorded=100)
+    store.record([event("changed", info("OP.X", "2"), info("OP.X", "1"))], recorded=200)
+    assert [ entry.kind for entry in store.changes("OP.X", 0, 1000) ] == ["changed"]
+
+def test_reopened_store_continues_from_recorded_state(path: str):
+
+    store = HistoryStore(path)
+    store.record([event("added", info("OP.X", "1")), event("added", info("OP.Y", "1", "Inbound"))], recorded=100)
+    store.record([event("cleared", None, info("OP.Y", "1", "Inbound"))], recorded=150)
+
+    reopened = HistoryStore(path)
+    # Information recorded before restart is not recorded again.
+    reopened.record_baseline([info("OP.X", "1")], recorded=200)
+    assert len(reopened.changes("OP.X", 0, 1000)) == 1
+    reopened.record([event("added", info("OP.X", "2"))], recorded=300)
+    reopened.record([event("added", info("OP.Y", "2", "Inbound"))], recorded=300)
+    assert [ entry.kind for entry in reopened.changes("OP.X", 0, 1000) ] == ["added", "changed"]
+    assert [ entry.kind for entry in reopened.changes("OP.Y", 0, 1000) ] == ["added", "cleared", "added"]
+
+def test_baseline_clears_missing_lines(path: str):
+
+    store = HistoryStore(path)
+    store.record_baseline([info("OP.X", "1"), info("OP.Y", "1", "Inbound"), info("OP.Y", "1", "Outbound")], recorded=100)
+    store.record_baseline([info("OP.X", "2"), info("OP.Y", "1", "Outbound")], recorded=200)
+
+    assert texts(store.at("OP.X", 250)) == ["2"]
+    assert [ entry.direction for entry in store._status_at("OP.Y", 250, None) ] == ["Outbound"]
+    cleared = store.changes("OP.Y", 150, 250)
+    assert [ (entry.direction, entry.kind, entry.info) for entry in cleared ] == [("Inbound", "cleared", None)]
+
+    # Lines cleared while no process was attached are cleared after restart as well.
+    HistoryStore(path).record_baseline([], recorded=300)
+    assert store.at("OP.X", 350) == []
+    assert store.at("OP.Y", 350) == []
+
+def test_attach_records_baseline_and_changes(path: str):
+
+    store = HistoryStore(path)
+    feed.publish("test_history", [info("OP.X", "1")])
+    detach = store.attach(baseline=[info("OP.X", "1"), info("OP.Y", "1")])
+    try:
+        feed.publish("test_history", [info("OP.X", "2")])
+        assert feed._feed.flush(5)
+    finally:
+        detach()
+    feed.publish("test_history", [info("OP.X", "3")])
+    assert feed._feed.flush(5)
+
+    assert [ entry.kind for entry in store.changes("OP.X", 0, float("inf")) ] == ["added", "changed"]
+    assert texts(store.at("OP.X", float("inf"))) == ["2"]
+    # OP.Y was only in baseline, and is not cleared by events of another source.
+    assert texts(store.at("OP.Y", float("inf"))) == ["1"]
+
+def test_database_without_direction_is_migrated(path: str):
+
+    with sqlite3.connect(path) as connection:
+        connection.executescript("""
+            CREATE TABLE history (id INTEGER PRIMARY KEY AUTOINCREMENT, recorded REAL NOT NULL, line TEXT NOT NULL, kind TEXT NOT NULL, info TEXT);
+            CREATE INDEX history_line_recorded ON history (line, recorded);
+        """)
+        connection.execute("INSERT INTO history (recorded, line, kind, info) VALUES (100, 'OP.X', 'added', ?)", (info("OP.X", "1").to_json(),))
+    connection.close()
+
+    store = HistoryStore(path)
+    assert texts(store.at("OP.X", 150)) == ["1"]
+    assert store.changes("OP.X", 0, 1000)[0].direction == ""
+    store.record_baseline([info("OP.X", "1")], recorded=200)
+    assert len(store.changes("OP.X", 0, 1000)) == 1
+
+    with sqlite3.connect(path) as connection:
+        indexes = { row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'") }
+    connection.close()
+    assert "history_line_recorded" not in indexes
+    assert "history_line_direction_recorded" in indexes
@@ -0,0 +1,54 @@
+import gzip
+import json
+
+import pytest
+
+from odpttraininfo.json_stream import gunzip, iter_array
+
+ARRAY = [{"text": "平常運転", "n": 12345, "f": -1.5e3}, [], "a,]\"", 0, True, None, {"nested": [1, {"x": "]"}]}]
+TEXT = json.dumps(ARRAY, ensure_ascii=False, indent=1).encode('utf-8')
+
+def split(data: bytes, size: int) -> list[bytes]:
+    return [ data[i:i+size] for i in range(0, len(data), size) ]
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, len(TEXT)])
+def test_values_split_at_any_byte(size: int):
+
+    # Chunks split multibyte characters, strings and numbers.
+    assert list(iter_array(split(TEXT, size))) == ARRAY
+
+def test_number_at_end_of_chunk():
+
+    assert list(iter_array([b"[1", b"23", b"4, 5", b".5]"])) == [1234, 5.5]
+
+def test_elements_are_yielded_before_input_ends():
+
+    received = []
+
+    def chunks():
+        yield b'[{"a": 1}, '
+        received.append("second chunk")
+        yield b'{"b": 2}]'
+
+    elements = iter_array(chunks())
+    assert next(elements) == {"a": 1}
+    assert received == []
+    assert list(elements) == [{"b": 2}]
+
+@pytest.mark.parametrize("text", [b"[]", b" [ ] \n"])
+def test_empty(text: bytes):
+
+    assert list(iter_array([text])) == []
+
+@pytest.mark.parametrize("text", [b"", b'{"a": 1}', b"[1, 2", b"[1 2]", b"[1,]", b"[1] 2", b'["a]'])
+def test_invalid(text: bytes):
+
+    with pytest.raises(ValueError):
+        list(iter_array(split(text, 2)))
+
+@pytest.mark.parametrize("size", [1, 10, 1 << 20])
+def test_gunzip(size: int):
+
+    compressed = gzip.compress(TEXT)
+    assert b"".join(gunzip(split(compressed, size))) == TEXT
+    assert list(iter_array(gunzip(split(compressed, size)))) == ARRAY
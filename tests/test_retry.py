@@ -0,0 +1,192 @@
+import json
+import time
+from email.message import Message
+from email.utils import formatdate
+
+import pytest
+
+from odpttraininfo import odpt_client
+from odpttraininfo.errors import CircuitOpenError, Forbidden, OdptServerError, TooManyRequests
+from odpttraininfo.odpt_components import Distributor
+from odpttraininfo.retry import CircuitBreaker, RetryPolicy, parse_retry_after
+
+from conftest import Handler
+
+BODY = json.dumps([{
+    "owl:sameAs": "odpt.TrainInformation:OP.X",
+    "odpt:railway": "odpt.Railway:OP.X",
+    "odpt:operator": "odpt.Operator:OP",
+    "odpt:trainInformationText": {"ja": "平常運転"},
+}]).encode('utf-8')
+
+def headers(**values: str) -> Message:
+
+    message = Message()
+    for name, value in values.items():
+        message[name.replace("_", "-")] = value
+    return message
+
+def test_delay_grows_up_to_max():
+
+    policy = RetryPolicy(base_delay=1, multiplier=2, max_delay=5, jitter=0)
+    assert [ policy.delay(n) for n in range(1, 5) ] == [1, 2, 4, 5]
+
+def test_jitter_shortens_delay():
+
+    policy = RetryPolicy(base_delay=4, jitter=0.5)
+    delays = [ policy.delay(1) for _ in range(100) ]
+    assert all( 2 <= delay <= 4 for delay in delays )
+    assert len(set(delays)) > 1
+
+def test_retry_after():
+
+    policy = RetryPolicy(base_delay=1, jitter=0, max_retry_after=10)
+    assert policy.delay(1, 5) == 5
+    assert policy.delay(1, 0) == 1
+    assert policy.delay(1, 11) == None
+
+def test_deadline():
+
+    policy = RetryPolicy(deadline=10)
+    assert policy.allows(5, 5)
+    assert not policy.allows(5, 5.1)
+    assert RetryPolicy().allows(1000, 1000)
+
+@pytest.mark.parametrize("arguments", [{"base_delay": -1}, {"multiplier": 0.5}, {"jitter": 2}, {"deadline": 0}])
+def test_invalid_policy(arguments: dict[str, float]):
+
+    with pytest.raises(ValueError):
+        RetryPolicy(**arguments)
+
+def test_parse_retry_after():
+
+    assert parse_retry_after(None) == None
+    assert parse_retry_after(headers()) == None
+    assert parse_retry_after(headers(Retry_After="120")) == 120
+    assert parse_retry_after(headers(Retry_After="soon")) == None
+    assert 55 < parse_retry_after(headers(Retry_After=formatdate(time.time() + 60, usegmt=True))) <= 60
+    assert parse_retry_after(headers(Retry_After=formatdate(time.time() - 60, usegmt=True))) == 0
+
+def test_circuit_opens_after_consecutive_failures():
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    assert not breaker.record_failure("A")
+    breaker.record_success("A")
+    assert not breaker.record_failure("A")
+    assert breaker.record_failure("A")
+    assert breaker.state("A") == "open"
+    assert breaker.is_open("A")
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.before_request("A")
+    assert raised.value.distributor == "A"
+    assert 29 < raised.value.retry_in <= 30
+    # Circuits are per distributor.
+    assert breaker.state("B") == "closed"
+    breaker.before_request("B")
+
+def test_circuit_lets_one_probe_through():
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.1)
+    breaker.record_failure("A")
+    time.sleep(0.15)
+    assert breaker.state("A") == "half_open"
+    breaker.before_request("A")
+    # Others are refused while the probe is running.
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request("A")
+
+    breaker.record_success("A")
+    assert breaker.state("A") == "closed"
+    breaker.before_request("A")
+
+def test_failed_probe_opens_circuit_again():
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.1)
+    breaker.record_failure("A")
+    time.sleep(0.15)
+    breaker.before_request("A")
+    assert breaker.record_failure("A", retry_after=30)
+    assert breaker.is_open("A")
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.before_request("A")
+    assert raised.value.retry_in > 29
+
+def test_reset():
+
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure("A")
+    breaker.record_failure("B")
+    breaker.reset("A")
+    assert breaker.state("A") == "closed"
+    assert breaker.state("B") == "open"
+    breaker.reset()
+    assert breaker.state("B") == "closed"
+
+@pytest.fixture
+def breaker(monkeypatch: pytest.MonkeyPatch) -> CircuitBreaker:
+
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    monkeypatch.setattr(odpt_client, "_retry_policy", RetryPolicy(base_delay=0, jitter=0))
+    monkeypatch.setattr(odpt_client, "_circuit_breaker", breaker)
+    return breaker
+
+def distributor(url: str) -> Distributor:
+    return Distributor("TEST", url + "/", consumer_key="key")
+
+def responder(statuses: list[tuple[int, dict[str,str]]]) -> tuple[type[Handler], list[int]]:
+    """Return handler responding statuses in order and then 200, and list of statuses it responded."""
+
+    responded: list[int] = []
+
+    class Server(Handler):
+        def do_GET(self):
+            status, headers = statuses[len(responded)] if len(responded) < len(statuses) else (200, {})
+            responded.append(status)
+            self.send_body(status, BODY if status == 200 else b"error", {"Content-Type": "application/json", **headers})
+
+    return Server, responded
+
+def test_download_retries_server_errors(serve, breaker: CircuitBreaker):
+
+    server, responded = responder([(503, {}), (429, {})])
+    info = odpt_client.download(distributor(serve(server)))
+    assert info != None and len(info) == 1
+    assert responded == [503, 429, 200]
+    assert breaker.state("TEST") == "closed"
+
+def test_download_waits_retry_after(serve, breaker: CircuitBreaker):
+
+    server, responded = responder([(429, {"Retry-After": "1"})])
+    started = time.monotonic()
+    odpt_client.download(distributor(serve(server)))
+    assert time.monotonic() - started >= 0.9
+    assert responded == [429, 200]
+
+def test_download_gives_up_on_long_retry_after(serve, breaker: CircuitBreaker, monkeypatch: pytest.MonkeyPatch):
+
+    monkeypatch.setattr(odpt_client, "_retry_policy", RetryPolicy(base_delay=0, max_retry_after=10))
+    server, responded = responder([(429, {"Retry-After": "3600"})])
+    with pytest.raises(TooManyRequests):
+        odpt_client.download(distributor(serve(server)))
+    assert responded == [429]
+
+def test_download_doesnt_retry_client_errors(serve, breaker: CircuitBreaker):
+
+    server, responded = responder([(403, {})])
+    with pytest.raises(Forbidden):
+        odpt_client.download(distributor(serve(server)))
+    assert responded == [403]
+    assert breaker.state("TEST") == "closed"
+
+def test_open_circuit_refuses_download(serve, breaker: CircuitBreaker):
+
+    server, responded = responder([(500, {})] * 10)
+    url = serve(server)
+    with pytest.raises(OdptServerError):
+        odpt_client.download(distributor(url), max_try=10)
+    assert responded == [500] * 3
+    assert odpt_client.is_circuit_open(distributor(url))
+
+    with pytest.raises(CircuitOpenError):
+        odpt_client.download(distributor(url))
+    assert len(responded) == 3
@@ -0,0 +1,166 @@
+import json
+import os
+import time
+
+import pytest
+
+from odpttraininfo import cache, odpt_client
+from odpttraininfo.backends import CacheStat
+from odpttraininfo.odpt_components import Distributor, TrainInformation
+from odpttraininfo.retry import RetryPolicy
+from odpttraininfo.scheduler import AdaptiveSchedule
+
+from conftest import Handler
+
+A = Distributor("A", "http://127.0.0.1:1/", consumer_key="key")
+B = Distributor("B", "http://127.0.0.1:1/", consumer_key="key")
+
+def info(text: str, valid: float|None = None) -> TrainInformation:
+
+    dic: dict[str, object] = {
+        "owl:sameAs": "odpt.TrainInformation:OP.X",
+        "odpt:railway": "odpt.Railway:OP.X",
+        "odpt:operator": "odpt.Operator:OP",
+        "odpt:trainInformationText": {"ja": text},
+    }
+    if valid != None:
+        dic["dct:valid"] = time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(valid))
+    return TrainInformation(dic)
+
+def test_interval_adapts_to_changes():
+
+    schedule = AdaptiveSchedule(min_interval=10, max_interval=40)
+    intervals = []
+    for changes in [0, 0, 0, 0, 1, 1, 1]:
+        schedule.record(A, changes, [], now=0)
+        intervals.append(schedule.interval(A))
+    assert intervals == [15, 22.5, 33.75, 40, 20, 10, 10]
+
+def test_due_and_next_wait():
+
+    schedule = AdaptiveSchedule(min_interval=10, max_interval=100)
+    # Unknown distributors are due at once.
+    assert schedule.due([A, B], now=1000) == [A, B]
+    schedule.record(A, 0, [], now=1000)
+    schedule.record(B, 1, [], now=1000)
+
+    assert schedule.due([A, B], now=1010) == [B]
+    assert schedule.next_wait([A, B], now=1010) == 0
+    schedule.record(B, 1, [], now=1010)
+    assert schedule.next_wait([A, B], now=1010) == 5
+    assert schedule.due([A, B], now=1015) == [A]
+    assert schedule.due([A, B], now=1020) == [A, B]
+    assert schedule.next_wait([], now=1015) == 100
+    assert schedule.max_age(A) == 15
+
+def test_valid_brings_next_refresh_forward():
+
+    schedule = AdaptiveSchedule(min_interval=10, max_interval=300)
+    for _ in range(10):
+        schedule.record(A, 0, [], now=0)
+    assert schedule.interval(A) == 300
+
+    schedule.record(A, 0, [info("再開見込", valid=1000 + 60)], now=1000)
+    assert schedule.next_wait([A], now=1000) == 61
+    # Interval itself is kept.
+    assert schedule.interval(A) == 300
+
+    # Hint sooner than min_interval waits min_interval, and past hint is ignored.
+    schedule.record(A, 0, [info("再開見込", valid=2000 + 3)], now=2000)
+    assert schedule.next_wait([A], now=2000) == 10
+    schedule.record(A, 0, [info("再開見込", valid=3000 - 60)], now=3000)
+    assert schedule.next_wait([A], now=3000) == 300
+
+def test_request_budget():
+
+    # A token per 10 seconds, with up to 2 saved.
+    schedule = AdaptiveSchedule(min_interval=1, max_interval=1, request_budget=10, budget_period=100, burst=2)
+    assert schedule.due([A], now=0) == [A]
+    schedule.record(A, 1, [], now=0)
+    assert schedule.due([A], now=1) == [A]
+    schedule.record(A, 1, [], now=1)
+
+    # Burst is spent. Next token is 8 seconds ahead.
+    assert schedule.due([A], now=2) == []
+    assert schedule.next_wait([A], now=2) == pytest.approx(8)
+    assert schedule.due([A], now=9) == []
+    assert schedule.due([A], now=10.01) == [A]
+    schedule.record(A, 1, [], now=10.01)
+
+    # Tokens are saved up to burst while calm.
+    assert schedule.due([A], now=1000) == [A]
+    assert schedule.due([A], now=1000) == [A]
+    assert schedule.due([A], now=1000) == []
+
+@pytest.mark.parametrize("arguments", [{"min_interval": 0}, {"min_interval": 10, "max_interval": 5}, {"request_budget": 0}, {"burst": 0}])
+def test_invalid_schedule(arguments: dict[str, float]):
+
+    with pytest.raises(ValueError):
+        AdaptiveSchedule(**arguments)
+
+def test_refresh_scheduled(serve, register, monkeypatch: pytest.MonkeyPatch, tmp_path):
+
+    monkeypatch.setattr(odpt_client, "_retry_policy", RetryPolicy(base_delay=0))
+    monkeypatch.setattr(odpt_client, "_circuit_breaker", None)
+    responses = [info("平常運転"), info("遅延")]
+
+    class Server(Handler):
+        def do_GET(self):
+            if not responses:
+                self.send_body(500, b"error")
+                return
+            body = json.dumps([json.loads(responses.pop(0).to_json())]).encode('utf-8')
+            self.send_body(200, body, {"Content-Type": "application/json"})
+
+    distributor = register(serve(Server))
+    schedule = AdaptiveSchedule(min_interval=10, max_interval=100)
+
+    def make_due() -> None:
+        # Cache refreshed within min_interval is used without downloading, so make it older.
+        memory = cache._memory_cache["TEST"]
+        cache._memory_cache["TEST"] = memory._replace(stat=CacheStat(memory.stat.updated - 60, memory.stat.version))
+        old = time.time() - 60
+        os.utime(tmp_path / "TEST.json", (old, old))
+        monkeypatch.setattr(schedule._states["TEST"], "next_time", 0)
+
+    # First refresh has nothing to compare with.
+    assert 14 < cache._refresh_scheduled(schedule) <= 15
+    assert schedule.interval(distributor) == 15
+    # Not due yet.
+    assert 14 < cache._refresh_scheduled(schedule) <= 15
+
+    make_due()
+    cache._refresh_scheduled(schedule)
+    assert schedule.interval(distributor) == 10
+    assert [ single.train_information_text.ja for single in cache._memory_cache["TEST"].info ] == ["遅延"]
+
+    # Failure is logged and counts as no change.
+    make_due()
+    cache._refresh_scheduled(schedule)
+    assert schedule.interval(distributor) == 15
+
+def test_fresh_second_follows_schedule(register, monkeypatch: pytest.MonkeyPatch):
+
+    distributor = register("http://127.0.0.1:1")
+    schedule = AdaptiveSchedule(min_interval=10, max_interval=300)
+    assert cache._fresh_second(distributor) == distributor.expire_second
+
+    monkeypatch.setattr(cache, "_async_refreshers", 1)
+    assert cache._fresh_second(distributor) == distributor.stale_second
+
+    monkeypatch.setattr(cache, "_schedule", schedule)
+    for _ in range(10):
+        schedule.record(distributor, 0, [], time.time())
+    assert cache._fresh_second(distributor) == 300 + distributor.stale_second - distributor.expire_second
+
+    # Cache waiting for the scheduled refresh is served from memory.
+    now = time.time()
+    cache._memory_cache["TEST"] = cache._MemoryCache(CacheStat(now - 300, "x"), (info("平常運転"),))
+    assert cache._load_memory(distributor) != None
+    cache._memory_cache["TEST"] = cache._MemoryCache(CacheStat(now - 400, "x"), (info("平常運転"),))
+    assert cache._load_memory(distributor) == None
+
+    # Short interval still allows stale_second.
+    for _ in range(10):
+        schedule.record(distributor, 1, [], time.time())
+    assert cache._fresh_second(distributor) == distributor.stale_second
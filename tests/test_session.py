@@ -0,0 +1,145 @@
+import http.client
+import socket
+
+import pytest
+
+from odpttraininfo.session import Session
+
+from conftest import Handler
+
+
+def test_reuses_connection(serve):
+
+    ports: list[int] = []
+
+    class Server(Handler):
+        def do_GET(self):
+            ports.append(self.client_address[1])
+            self.send_body(200, b"ok")
+
+    url = serve(Server)
+    session = Session()
+    assert session.request(url + "/a").body == b"ok"
+    assert session.request(url + "/b").body == b"ok"
+    assert len(ports) == 2 and ports[0] == ports[1]
+
+def test_reconnects_after_server_closed_idle_connection(serve):
+
+    class Server(Handler):
+        def do_GET(self):
+            self.send_body(200, b"ok", {"Connection": "keep-alive"})
+            self.close_connection = True
+
+    url = serve(Server)
+    session = Session()
+    for _ in range(3):
+        assert session.request(url).body == b"ok"
+
+def test_streams_body(serve):
+
+    class Server(Handler):
+        def do_GET(self):
+            self.send_body(200, b"x" * 200000)
+
+    session = Session()
+    with session.stream(serve(Server)) as response:
+        assert response.status == 200
+        assert len(response.read()) == 200000
+
+def test_follows_redirect(serve):
+
+    class Server(Handler):
+        def do_GET(self):
+            if self.path.startswith("/old"):
+                self.send_body(301, b"moved", {"Location": "/new?acl:consumerKey=k"})
+            else:
+                self.send_body(200, self.path.encode())
+
+    response = Session().request(serve(Server) + "/old")
+    assert response.status == 200
+    assert response.body == b"/new?acl:consumerKey=k"
+
+def test_follows_redirect_to_other_host(serve):
+
+    class Target(Handler):
+        def do_GET(self):
+            self.send_body(200, b"target")
+
+    target = serve(Target)
+
+    class Server(Handler):
+        def do_GET(self):
+            self.send_body(307, b"", {"Location": target + "/api"})
+
+    assert Session().request(serve(Server)).body == b"target"
+
+def test_stops_redirect_loop(serve):
+
+    class Server(Handler):
+        def do_GET(self):
+            self.send_body(302, b"", {"Location": "/loop"})
+
+    response = Session().request(serve(Server))
+    assert response.status == 302
+
+def test_plain_http_through_proxy(serve, monkeypatch):
+
+    requests: list[tuple[str, str|None]] = []
+
+    class Proxy(Handler):
+        def do_GET(self):
+            requests.append((self.path, self.headers.get("Proxy-Authorization")))
+            self.send_body(200, b"proxied")
+
+    proxy = serve(Proxy)
+    monkeypatch.setenv("http_proxy", proxy.replace("http://", "http://user:pa%40ss@"))
+
+    response = Session().request("http://odpt.invalid/api?acl:consumerKey=k")
+    assert response.body == b"proxied"
+    assert requests == [("http://odpt.invalid/api?acl:consumerKey=k", "Basic dXNlcjpwYUBzcw==")]
+
+def test_https_tunnels_through_proxy(serve, monkeypatch):
+
+    requests: list[tuple[str, str|None]] = []
+
+    class Proxy(Handler):
+        def do_CONNECT(self):
+            requests.append((self.path, self.headers.get("Proxy-Authorization")))
+            # Refuse, since the test has no TLS server behind.
+            self.send_body(403, b"")
+
+    monkeypatch.setenv("https_proxy", serve(Proxy).replace("http://", "http://user:pass@"))
+
+    with pytest.raises(OSError):
+        Session().request("https://odpt.invalid/api")
+    assert requests == [("odpt.invalid:443", "Basic dXNlcjpwYXNz")]
+
+def test_no_proxy_bypasses_proxy(serve, monkeypatch):
+
+    class Server(Handler):
+        def do_GET(self):
+            self.send_body(200, b"direct")
+
+    url = serve(Server)
+
+    # Nothing listens on the port of proxy.
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        monkeypatch.setenv("http_proxy", "http://127.0.0.1:%d" % unused.getsockname()[1])
+    monkeypatch.setenv("no_proxy", "127.0.0.1")
+
+    assert Session().request(url).body == b"direct"
+
+def test_unsupported_scheme():
+
+    with pytest.raises(ValueError):
+        Session().request("ftp://odpt.invalid/")
+
+def test_timeout(serve):
+
+    class Server(Handler):
+        def do_GET(self):
+            self.rfile.read(1)
+
+    with pytest.raises((TimeoutError, socket.timeout, http.client.HTTPException)):
+        Session(read_timeout=0.2).request(serve(Server))